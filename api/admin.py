@@ -1,12 +1,108 @@
-from django.contrib import admin
-from .models import Lead
+from django.contrib import admin, messages
+from django.db import transaction
+from . import emails, webhooks
+from .db_routers import replica_reads
+from .models import (
+    Lead,
+    LeadEmailState,
+    LeadFinancials,
+    LeadValuation,
+    PortfolioJob,
+    SectorMultiplier,
+    WebhookEndpoint,
+    WebhookEvent,
+)
+
+
+class ReplicaChangeListMixin:
+    """
+    Serve the (read-only) changelist page from the read replica.
+    Change forms and changelist actions stay on the primary.
+    """
+    
+    def changelist_view(self, request, extra_context=None):
+        if request.method != 'GET':
+            return super().changelist_view(request, extra_context)
+        with replica_reads():
+            response = super().changelist_view(request, extra_context)
+            # The result list is a lazy queryset; render while still routed to the replica
+            if hasattr(response, 'render'):
+                response.render()
+        return response
+
+
+class LeadEmailStateInline(admin.StackedInline):
+    """
+    Read-only delivery state of the valuation email.
+    """
+    model = LeadEmailState
+    can_delete = False
+    fields = ['queued_at', 'sent_at', 'failed_at', 'error', 'provider_message_id', 'content_hash']
+    readonly_fields = fields
+    
+    def has_add_permission(self, request, obj=None):
+        return False
+
+
+class LeadFinancialsInline(admin.StackedInline):
+    """
+    Financial and business inputs of the lead (lead_financials side table).
+    """
+    model = LeadFinancials
+    can_delete = False
+    fieldsets = (
+        ('Sector Information', {
+            'fields': (
+                'shareholders_working_in_business',
+                'taking_salary',
+                'salary_adjustment',
+                'property_own_or_rent',
+                'property_market_rent_adjustment',
+                'adjust_industry_multipliers',
+                'lower_multiplier',
+                'upper_multiplier',
+                'spoken_to_accountant',
+                'spoken_to_broker',
+            )
+        }),
+        ('Financial Information', {
+            'fields': (
+                'turnover',
+                'predicted_turnover',
+                'profit',
+                'predicted_profit',
+                'non_recurring_expenses',
+                'interest_payable',
+                'interest_receivable',
+                'depreciation',
+                'amortisation',
+                'net_assets',
+            ),
+            'classes': ('collapse',)
+        }),
+    )
+
+
+class LeadValuationInline(admin.StackedInline):
+    """
+    Read-only calculated valuation (lead_valuations side table).
+    """
+    model = LeadValuation
+    can_delete = False
+    fields = ['sde', 'valuation_low', 'valuation_high']
+    readonly_fields = fields
+    
+    def has_add_permission(self, request, obj=None):
+        return False
 
 
 @admin.register(Lead)
-class LeadAdmin(admin.ModelAdmin):
+class LeadAdmin(ReplicaChangeListMixin, admin.ModelAdmin):
     """
     Admin interface configuration for Lead model.
     """
+    inlines = [LeadFinancialsInline, LeadValuationInline, LeadEmailStateInline]
+    actions = ['resend_valuation_email']
     list_display = [
         'id',
         'name',
@@ -19,12 +115,14 @@ class LeadAdmin(admin.ModelAdmin):
         'valuation_high',
         'submitted_at',
     ]
+    # One LEFT JOIN per side table instead of two queries per row
+    list_select_related = Lead.SIDE_TABLES
     list_filter = [
         'submitted_at',
-        'property_own_or_rent',
-        'shareholders_working_in_business',
-        'spoken_to_accountant',
-        'spoken_to_broker',
+        'financials__property_own_or_rent',
+        'financials__shareholders_working_in_business',
+        'financials__spoken_to_accountant',
+        'financials__spoken_to_broker',
     ]
     search_fields = [
         'name',
@@ -33,11 +131,10 @@ class LeadAdmin(admin.ModelAdmin):
         'company_sector',
     ]
     readonly_fields = [
-        'valuation_low',
-        'valuation_high',
-        'sde',
         'submitted_at',
         'updated_at',
+        'progress_saved_at',
+        'version',
     ]
     date_hierarchy = 'submitted_at'
     
@@ -46,46 +143,145 @@ class LeadAdmin(admin.ModelAdmin):
             'fields': ('name', 'email', 'phone', 'company_name', 'company_number')
         }),
         ('Sector Information', {
-            'fields': (
-                'company_sector',
-                'shareholders_working_in_business',
-                'taking_salary',
-                'salary_adjustment',
-                'property_own_or_rent',
-                'property_market_rent_adjustment',
-                'adjust_industry_multipliers',
-                'lower_multiplier',
-                'upper_multiplier',
-                'purpose',
-                'spoken_to_accountant',
-                'spoken_to_broker',
-            )
+            'fields': ('user_type', 'purpose', 'management_preference', 'company_sector')
         }),
-        ('Financial Information', {
-            'fields': (
-                'turnover',
-                'predicted_turnover',
-                'profit',
-                'predicted_profit',
-                'non_recurring_expenses',
-                'interest_payable',
-                'interest_receivable',
-                'depreciation',
-                'amortisation',
-                'net_assets',
-            ),
+        ('Metadata', {
+            'fields': ('submitted_at', 'updated_at', 'version', 'last_step', 'progress_saved_at'),
             'classes': ('collapse',)
         }),
-        ('Valuation Information', {
+    )
+    
+    @admin.display(description='Turnover', ordering='financials__turnover')
+    def turnover(self, lead):
+        return lead.turnover
+    
+    @admin.display(description='Profit', ordering='financials__profit')
+    def profit(self, lead):
+        return lead.profit
+    
+    @admin.display(description='Valuation low', ordering='valuation__valuation_low')
+    def valuation_low(self, lead):
+        return lead.valuation_low
+    
+    @admin.display(description='Valuation high', ordering='valuation__valuation_high')
+    def valuation_high(self, lead):
+        return lead.valuation_high
+    
+    @admin.action(description='Resend valuation email')
+    def resend_valuation_email(self, request, queryset):
+        queued = skipped = 0
+        with transaction.atomic():
+            for lead in queryset.select_related('valuation'):
+                if emails.queue_completion_email(lead, force=True):
+                    queued += 1
+                else:
+                    skipped += 1
+        self.message_user(request, f'Queued {queued} valuation email(s).')
+        if skipped:
+            self.message_user(
+                request,
+                f'Skipped {skipped} lead(s) without a completed valuation.',
+                level=messages.WARNING,
+            )
+
+
+@admin.register(SectorMultiplier)
+class SectorMultiplierAdmin(admin.ModelAdmin):
+    """
+    Admin interface configuration for SectorMultiplier model.
+    """
+    list_display = ['company_sector', 'lower_multiplier', 'upper_multiplier', 'updated_at']
+    search_fields = ['company_sector']
+    readonly_fields = ['updated_at']
+
+
+@admin.register(PortfolioJob)
+class PortfolioJobAdmin(admin.ModelAdmin):
+    """
+    Admin interface configuration for PortfolioJob model.
+    """
+    list_display = ['job_id', 'created_by', 'filename', 'status', 'processed_rows', 'failed_rows', 'total_rows', 'created_at']
+    list_filter = ['status', 'created_at']
+    search_fields = ['job_id', 'filename', 'created_by__username']
+    exclude = ['input_csv']
+    readonly_fields = [
+        'job_id',
+        'created_by',
+        'filename',
+        'status',
+        'total_rows',
+        'processed_rows',
+        'failed_rows',
+        'error',
+        'created_at',
+        'started_at',
+        'finished_at',
+        'updated_at',
+    ]
+    
+    def get_queryset(self, request):
+        return super().get_queryset(request).defer('input_csv')
+
+
+@admin.register(WebhookEndpoint)
+class WebhookEndpointAdmin(admin.ModelAdmin):
+    """
+    Admin interface configuration for WebhookEndpoint model.
+    Delivery state is written by the run_webhooks dispatcher.
+    """
+    list_display = ['name', 'url', 'is_active', 'circuit', 'last_event_id', 'last_delivered_at', 'last_error']
+    list_filter = ['is_active']
+    readonly_fields = [
+        'consecutive_failures',
+        'next_attempt_at',
+        'leased_until',
+        'last_delivered_at',
+        'last_error',
+        'created_at',
+        'updated_at',
+    ]
+    actions = ['reset_circuit']
+    
+    fieldsets = (
+        (None, {
+            'fields': ('name', 'url', 'secret', 'is_active')
+        }),
+        ('Delivery', {
             'fields': (
-                'sde',
-                'valuation_low',
-                'valuation_high',
+                'last_event_id', 'consecutive_failures', 'next_attempt_at', 'leased_until',
+                'last_delivered_at', 'last_error', 'created_at', 'updated_at',
             ),
         }),
-        ('Metadata', {
-            'fields': ('submitted_at', 'updated_at'),
-            'classes': ('collapse',)
-        }),
     )
+    
+    @admin.display(description='Circuit')
+    def circuit(self, endpoint):
+        return webhooks.circuit_state(endpoint)
+    
+    def save_model(self, request, obj, form, change):
+        if not change and 'last_event_id' not in form.changed_data:
+            # New endpoints start with events recorded from now on
+            obj.last_event_id = WebhookEvent.objects.order_by('-id').values_list('id', flat=True).first() or 0
+        super().save_model(request, obj, form, change)
+    
+    @admin.action(description='Close the circuit and retry now')
+    def reset_circuit(self, request, queryset):
+        updated = queryset.update(consecutive_failures=0, next_attempt_at=None, last_error='')
+        self.message_user(request, f"Reset {updated} endpoint(s).", messages.SUCCESS)
 
+
+@admin.register(WebhookEvent)
+class WebhookEventAdmin(admin.ModelAdmin):
+    """
+    Read-only view of recorded webhook events.
+    """
+    list_display = ['id', 'event_type', 'lead', 'created_at']
+    list_filter = ['event_type']
+    list_select_related = ['lead']
+    raw_id_fields = ['lead']
+    
+    def has_add_permission(self, request):
+        return False
+    
+    def has_change_permission(self, request, obj=None):
+        return False
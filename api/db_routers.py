@@ -0,0 +1,62 @@
+"""
+Primary/replica database routing.
+
+All writes, and by default all reads, go to the primary ('default'). Code that can
+tolerate replication lag opts in with replica_reads(): admin list views, exports and
+the analytics endpoints. The session lookup on the PUT path never does, so a lead
+is always readable right after the POST that created it.
+
+Without a 'replica' entry in DATABASES (DB_REPLICA_NAME unset) everything stays on
+the primary.
+"""
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.db import transaction
+
+
+PRIMARY = 'default'
+REPLICA = 'replica'
+
+_replica_reads = ContextVar('replica_reads', default=False)
+
+
+@contextmanager
+def replica_reads():
+    """
+    Route reads made inside this block (or decorated function) to the replica.
+
+    Querysets are lazy: evaluate them before leaving the block.
+    """
+    token = _replica_reads.set(True)
+    try:
+        yield
+    finally:
+        _replica_reads.reset(token)
+
+
+class PrimaryReplicaRouter:
+    """
+    Send opted-in reads to the replica and everything else to the primary.
+    """
+
+    def db_for_read(self, model, **hints):
+        if not _replica_reads.get() or REPLICA not in settings.DATABASES:
+            return PRIMARY
+        if transaction.get_connection(PRIMARY).in_atomic_block:
+            # Reads inside a write transaction must see its own writes
+            return PRIMARY
+        return REPLICA
+
+    def db_for_write(self, model, **hints):
+        # Also covers saving an instance that was loaded from the replica
+        return PRIMARY
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Both aliases hold the same data
+        return obj1._state.db in (PRIMARY, REPLICA) and obj2._state.db in (PRIMARY, REPLICA)
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # The replica gets its schema from the primary
+        return db == PRIMARY
@@ -0,0 +1,190 @@
+"""
+Valuation email pipeline.
+
+Every completion-path save calls queue_completion_email(). It hashes what the email
+would contain (recipient, name, sector, valuation range) and atomically claims the
+lead's LeadEmailState row for that hash. Only the caller that wins the claim renders
+the template and sends, after the surrounding transaction commits. Repeat PUTs and
+admin edits that leave the valuation unchanged therefore send nothing. A send that
+failed is retried by the next save; the admin "resend" action forces a new send
+through the same path.
+"""
+import hashlib
+import logging
+import threading
+from decimal import Decimal
+
+from django.conf import settings
+from django.db import IntegrityError, connection, transaction
+from django.template.loader import render_to_string
+from django.utils import timezone
+
+from .models import LeadEmailState
+
+logger = logging.getLogger(__name__)
+
+
+def _amount(value):
+    """
+    Canonical text of a money amount. Decimal('1089000') from a fresh valuation and
+    Decimal('1089000.00') read back from the database must hash the same.
+    """
+    if value is None:
+        return ''
+    return format(Decimal(value).quantize(Decimal('0.01')), 'f')
+
+
+def content_hash(lead):
+    """Fingerprint of everything the valuation email shows."""
+    return hash_content(lead.email, lead.name, lead.company_sector, lead.valuation_low, lead.valuation_high)
+
+
+def hash_content(email, name, company_sector, valuation_low, valuation_high):
+    parts = (email, name, company_sector, _amount(valuation_low), _amount(valuation_high))
+    return hashlib.sha256('\x1f'.join(str(part) for part in parts).encode()).hexdigest()
+
+
+def queue_completion_email(lead, force=False):
+    """
+    Send the valuation email for a completed lead unless this exact content was
+    already sent (or is being sent). Returns True if a send was queued.
+    """
+    if not lead.is_complete:
+        return False
+    if lead.valuation_low is None or lead.valuation_high is None:
+        logger.warning(f"Lead {lead.id} completed without valuation data. Skipping email.")
+        return False
+
+    digest = content_hash(lead)
+    if not _claim(lead, digest, force):
+        logger.debug("Email for lead ID %s unchanged, not resending", lead.id)
+        return False
+
+    transaction.on_commit(lambda: _start_send(lead, digest))
+    return True
+
+
+def _claim(lead, digest, force):
+    """
+    Record that an email with this content is being sent. Returns False if one
+    already has been, or is in flight, and force is not set.
+    """
+    now = timezone.now()
+    state = LeadEmailState.objects.filter(lead_id=lead.pk)
+    if not force:
+        # A failed send with the same content may be claimed again
+        state = state.exclude(content_hash=digest, failed_at__isnull=True)
+    if state.update(content_hash=digest, queued_at=now, sent_at=None, failed_at=None, error=''):
+        return True
+
+    try:
+        with transaction.atomic():
+            LeadEmailState.objects.create(lead_id=lead.pk, content_hash=digest, queued_at=now)
+    except IntegrityError:
+        # The row exists with this content already (or another writer just created it)
+        return False
+    return True
+
+
+def _start_send(lead, digest):
+    """Render and send in a background thread so the request isn't blocked."""
+    try:
+        subject, html_message = render(lead)
+        from_email = getattr(settings, 'DEFAULT_FROM_EMAIL', 'noreply@example.com')
+        email_thread = threading.Thread(
+            target=_send_email_async,
+            args=(subject, html_message, from_email, [lead.email], lead.id, lead.email, digest),
+            daemon=True
+        )
+        email_thread.start()
+        logger.info("Email queued for %s for lead ID %s", lead.email, lead.id)
+    except Exception as e:
+        logger.error(f"Failed to queue email for {lead.email}: {str(e)}", exc_info=True)
+        _record_result(lead.id, digest, error=e)
+
+
+def render(lead):
+    """Return (subject, html_message) of the valuation email for a lead."""
+
+    def format_currency(value):
+        """Format decimal as currency string with commas."""
+        return f"{float(value):,.0f}"
+
+    context = {
+        'lead': lead,
+        'valuation_low': lead.valuation_low,
+        'valuation_high': lead.valuation_high,
+        'valuation_low_formatted': format_currency(lead.valuation_low),
+        'valuation_high_formatted': format_currency(lead.valuation_high),
+        'sde': lead.sde,
+        'site_url': getattr(settings, 'SITE_URL', 'https://chelseacorporate.com'),
+        'backend_url': getattr(settings, 'BACKEND_URL', 'http://localhost:8000'),
+        'contact_email': getattr(settings, 'CONTACT_EMAIL', 'info@chelseacorporate.com'),
+        'contact_phone': getattr(settings, 'CONTACT_PHONE', '0117 435 4350'),
+    }
+
+    subject = f'Your Business Valuation Estimate - {lead.company_sector}'
+    return subject, render_to_string('emails/business_evaluation.html', context)
+
+
+def _send_email_async(subject, html_message, from_email, recipient_list, lead_id, recipient_email, digest):
+    """
+    Send email in a separate thread to avoid blocking the main request.
+    Uses the Resend API when MAIL_API_KEY is set (SMTP ports are blocked on Render).
+    """
+    try:
+        # Check if Resend API key is configured (recommended for Render)
+        resend_api_key = getattr(settings, 'MAIL_API_KEY', None)
+
+        if resend_api_key:
+            # Use Resend API (works on Render, no domain verification needed for testing)
+            import resend
+
+            resend.api_key = resend_api_key
+
+            params = {
+                "from": from_email,
+                "to": recipient_list,
+                "subject": subject,
+                "html": html_message,
+            }
+
+            response = resend.Emails.send(params)
+            message_id = response.get('id', '')
+
+            logger.info(
+                "Business evaluation email sent to %s for lead ID %s (Resend API, ID: %s)",
+                recipient_email, lead_id, message_id or 'N/A',
+            )
+        else:
+            # Fallback to Django's email backend (SMTP - for local development)
+            from django.core.mail import send_mail
+
+            send_mail(
+                subject=subject,
+                message='',  # Empty message, HTML only
+                from_email=from_email,
+                recipient_list=recipient_list,
+                html_message=html_message,
+                fail_silently=False,
+            )
+            message_id = ''
+            logger.info("Business evaluation email sent to %s for lead ID %s (SMTP)", recipient_email, lead_id)
+
+        _record_result(lead_id, digest, message_id=message_id)
+    except Exception as e:
+        logger.error(f"Failed to send business evaluation email to {recipient_email}: {str(e)}", exc_info=True)
+        _record_result(lead_id, digest, error=e)
+    finally:
+        # This thread has its own DB connection; don't leak it
+        connection.close()
+
+
+def _record_result(lead_id, digest, message_id='', error=None):
+    """Store the outcome of a send, unless a newer send has claimed the row since."""
+    now = timezone.now()
+    values = {'failed_at': now, 'error': str(error)} if error else {'sent_at': now, 'provider_message_id': message_id}
+    try:
+        LeadEmailState.objects.filter(lead_id=lead_id, content_hash=digest, sent_at__isnull=True).update(**values)
+    except Exception as e:
+        logger.error(f"Failed to record email state for lead ID {lead_id}: {str(e)}", exc_info=True)
@@ -0,0 +1,124 @@
+"""
+Quick "rough valuation" estimates for the landing page.
+
+Requests are validated against a small hand-rolled schema (no ModelSerializer), then
+normalized into a ValuationInput of integer pence and multiplier hundredths. That
+tuple is the memoization key, so requests that differ only in formatting
+("150000" vs "150000.00") share one cache entry. Nothing here touches the leads
+table; sector multipliers come from the in-memory table in api.multipliers.
+"""
+from decimal import Decimal, InvalidOperation
+from functools import lru_cache
+
+from django.conf import settings
+
+from api import valuation, valuation_config
+from api.multipliers import clamp_multipliers, table as sector_multipliers
+
+
+AMOUNT_FIELDS = (
+    'profit',
+    'depreciation',
+    'amortisation',
+    'non_recurring_expenses',
+    'interest_receivable',
+    'interest_payable',
+    'salary_adjustment',
+    'property_market_rent_adjustment',
+    'net_assets',
+)
+MULTIPLIER_FIELDS = ('lower_multiplier', 'upper_multiplier')
+
+MAX_AMOUNT = Decimal('1e13')  # DecimalField(max_digits=15, decimal_places=2)
+MAX_MULTIPLIER = Decimal('1e8')  # DecimalField(max_digits=10, decimal_places=2)
+
+
+def _parse_decimal(value, limit):
+    """Parse a JSON number or numeric string with at most 2 decimal places."""
+    if isinstance(value, bool) or not isinstance(value, (str, int, float)):
+        raise ValueError('A number is required.')
+    try:
+        number = Decimal(str(value).strip())
+    except InvalidOperation:
+        raise ValueError('A valid number is required.')
+    if not number.is_finite():
+        raise ValueError('A valid number is required.')
+    if abs(number) >= limit:
+        raise ValueError(f'Ensure this value is less than {limit:,.0f} in magnitude.')
+    if number != number.quantize(Decimal('0.01')):
+        raise ValueError('Ensure that there are no more than 2 decimal places.')
+    return number
+
+
+def parse_request(data):
+    """
+    Validate an estimate request and build its ValuationInput.
+
+    Returns (inputs, None) or (None, errors) where errors maps field -> message.
+    """
+    if not isinstance(data, dict):
+        return None, {'non_field_errors': 'Expected a JSON object.'}
+
+    errors = {}
+    values = {}
+    for field in AMOUNT_FIELDS + MULTIPLIER_FIELDS:
+        raw = data.get(field)
+        if raw is None or raw == '':
+            values[field] = None
+            continue
+        try:
+            values[field] = _parse_decimal(raw, MAX_MULTIPLIER if field in MULTIPLIER_FIELDS else MAX_AMOUNT)
+        except ValueError as e:
+            errors[field] = str(e)
+
+    for field in MULTIPLIER_FIELDS:
+        if values.get(field) is not None and values[field] <= 0:
+            errors[field] = 'Multiplier must be a non-zero positive number.'
+
+    property_own_or_rent = data.get('property_own_or_rent')
+    if property_own_or_rent not in (None, '', 'own', 'rent'):
+        errors['property_own_or_rent'] = "property_own_or_rent must be one of ['own', 'rent']."
+
+    if values.get('profit') is None and 'profit' not in errors:
+        errors['profit'] = 'This field is required.'
+
+    if errors:
+        return None, errors
+
+    lower_multiplier, upper_multiplier = resolve_multipliers(
+        data.get('company_sector'),
+        bool(data.get('adjust_industry_multipliers')),
+        values['lower_multiplier'],
+        values['upper_multiplier'],
+    )
+    values['lower_multiplier'] = lower_multiplier
+    values['upper_multiplier'] = upper_multiplier
+    return valuation.from_values(property_own_or_rent=property_own_or_rent, **values), None
+
+
+def resolve_multipliers(company_sector, adjust_industry_multipliers, lower_multiplier, upper_multiplier):
+    """
+    Same precedence as api.utils.resolve_multipliers, with the configured base
+    multipliers as a last resort so an estimate is always possible.
+    """
+    if not adjust_industry_multipliers and isinstance(company_sector, str):
+        sector_defaults = sector_multipliers.lookup(company_sector)
+        if sector_defaults is not None:
+            return sector_defaults
+    return clamp_multipliers(
+        lower_multiplier or valuation_config.BASE_MULTIPLIER_LOW,
+        upper_multiplier or valuation_config.BASE_MULTIPLIER_HIGH,
+    )
+
+
+@lru_cache(maxsize=getattr(settings, 'QUICK_ESTIMATE_CACHE_SIZE', 4096))
+def estimate(inputs):
+    """Memoized valuation of a normalized ValuationInput, ready to return as JSON."""
+    result = valuation.valuate(inputs)
+    return {
+        'valuation_low': str(result.low),
+        'valuation_high': str(result.high),
+        'sde': str(valuation.as_decimals(result)['sde']),
+        'lower_multiplier': str(Decimal(inputs.lower_multiplier).scaleb(-2)),
+        'upper_multiplier': str(Decimal(inputs.upper_multiplier).scaleb(-2)),
+    }
@@ -0,0 +1,244 @@
+import json
+import logging
+import os
+import random
+import resource
+import socketserver
+import statistics
+import tempfile
+import threading
+import time
+import uuid
+from decimal import Decimal
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from django.conf import settings
+from django.core.management import call_command
+from django.core.management.base import BaseCommand
+from django.db import connection, connections
+from django.utils import timezone
+
+from api.models import Lead, LeadEmailState
+
+
+class StubState:
+    """What a stand-in provider saw: arrival time per recipient, and how many calls failed."""
+
+    def __init__(self, latency, error_rate, seed):
+        self.latency = latency
+        self.error_rate = error_rate
+        self.rng = random.Random(seed)
+        self.lock = threading.Lock()
+        self.arrivals = {}
+        self.failures = 0
+
+    def receive(self, recipients):
+        """Record a delivery attempt; returns False if it should fail."""
+        arrived = time.perf_counter()
+        time.sleep(self.latency)
+        with self.lock:
+            for recipient in recipients:
+                self.arrivals.setdefault(recipient, arrived)
+            if self.rng.random() < self.error_rate:
+                self.failures += 1
+                return False
+        return True
+
+
+class ResendStubHandler(BaseHTTPRequestHandler):
+    """Answers POST /emails like the Resend API."""
+
+    def do_POST(self):
+        params = json.loads(self.rfile.read(int(self.headers['Content-Length'])))
+        if self.server.state.receive(params.get('to', [])):
+            self._reply(200, {'id': str(uuid.uuid4())})
+        else:
+            self._reply(500, {'statusCode': 500, 'name': 'application_error', 'message': 'Stub failure'})
+
+    def _reply(self, code, body):
+        payload = json.dumps(body).encode()
+        self.send_response(code)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class SMTPSinkHandler(socketserver.StreamRequestHandler):
+    """Just enough SMTP for Django's SMTP backend; messages are discarded."""
+
+    def handle(self):
+        recipients = []
+        self.wfile.write(b'220 bench-sink ESMTP\r\n')
+        while True:
+            line = self.rfile.readline()
+            if not line:
+                return
+            command = line[:4].upper()
+            if command in (b'EHLO', b'HELO'):
+                self.wfile.write(b'250 bench-sink\r\n')
+            elif command == b'RCPT':
+                recipients.append(line.decode().split('<', 1)[1].split('>', 1)[0])
+                self.wfile.write(b'250 OK\r\n')
+            elif command == b'DATA':
+                self.wfile.write(b'354 End data with <CR><LF>.<CR><LF>\r\n')
+                while self.rfile.readline() not in (b'.\r\n', b''):
+                    pass
+                delivered = self.server.state.receive(recipients)
+                recipients = []
+                self.wfile.write(b'250 OK\r\n' if delivered else b'451 Stub failure\r\n')
+            elif command == b'QUIT':
+                self.wfile.write(b'221 Bye\r\n')
+                return
+            else:
+                self.wfile.write(b'250 OK\r\n')
+
+
+class ThreadingSMTPSink(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+
+def percentile(values, fraction):
+    return sorted(values)[min(len(values) - 1, int(len(values) * fraction))]
+
+
+class Command(BaseCommand):
+    """
+    Drive N completed leads through the real post_save email path against local
+    stand-ins: a stub Resend API (MAIL_API_KEY set) and/or an SMTP sink (fallback).
+
+    Runs on a scratch SQLite database. Reports save and send throughput, the delay
+    between the save and the provider receiving the message, peak thread count,
+    max RSS, and what happened to failed sends, including whether re-saving the
+    lead retries them. Finally edits the phone of every sent lead, as an admin
+    would, which must not send any email again.
+    """
+    help = 'Benchmark the valuation email pipeline against a stub Resend API and SMTP sink'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--leads', type=int, default=200)
+        parser.add_argument('--backend', choices=['resend', 'smtp', 'both'], default='both')
+        parser.add_argument('--latency-ms', type=float, default=50.0, help='Provider latency per message')
+        parser.add_argument('--error-rate', type=float, default=0.05, help='Fraction of sends the provider rejects')
+        parser.add_argument('--timeout', type=float, default=60.0, help='Seconds to wait for sends to finish')
+        parser.add_argument('--seed', type=int, default=0)
+
+    def handle(self, *args, **options):
+        settings.WRITE_BEHIND_ENABLED = False
+        # Per-send logs (and failure tracebacks) would dominate the output
+        logging.getLogger('api.emails').setLevel(logging.CRITICAL)
+
+        with tempfile.TemporaryDirectory() as scratch:
+            connections.close_all()
+            connection.settings_dict['NAME'] = os.path.join(scratch, 'bench.sqlite3')
+            call_command('migrate', verbosity=0)
+
+            backends = ['resend', 'smtp'] if options['backend'] == 'both' else [options['backend']]
+            for backend in backends:
+                self._run(backend, options)
+
+    def _run(self, backend, options):
+        import resend
+
+        state = StubState(options['latency_ms'] / 1000, options['error_rate'], options['seed'])
+        if backend == 'resend':
+            server = ThreadingHTTPServer(('127.0.0.1', 0), ResendStubHandler)
+            resend.api_url = f'http://127.0.0.1:{server.server_address[1]}'
+            settings.MAIL_API_KEY = 're_bench'
+        else:
+            server = ThreadingSMTPSink(('127.0.0.1', 0), SMTPSinkHandler)
+            settings.MAIL_API_KEY = ''
+            settings.EMAIL_BACKEND = 'django.core.mail.backends.smtp.EmailBackend'
+            settings.EMAIL_HOST = '127.0.0.1'
+            settings.EMAIL_PORT = server.server_address[1]
+            settings.EMAIL_USE_TLS = settings.EMAIL_USE_SSL = False
+            settings.EMAIL_HOST_USER = settings.EMAIL_HOST_PASSWORD = ''
+        server.state = state
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+
+        peak_threads = [threading.active_count()]
+        sampling = threading.Event()
+
+        def sample_threads():
+            while not sampling.is_set():
+                peak_threads[0] = max(peak_threads[0], threading.active_count())
+                time.sleep(0.002)
+
+        threading.Thread(target=sample_threads, daemon=True).start()
+
+        run = uuid.uuid4().hex[:8]
+        saved_at = {}
+        started = time.perf_counter()
+        for i in range(options['leads']):
+            email = f'bench-{run}-{i}@example.com'
+            saved_at[email] = time.perf_counter()
+            # post_save queues the email; outside a transaction on_commit runs immediately
+            Lead.objects.create(
+                session_id=uuid.uuid4(),
+                name=f'Bench {i}',
+                email=email,
+                phone='+44 20 1234 5678',
+                company_sector='Technology',
+                is_complete=True,
+                valuation_low=Decimal('778000'),
+                valuation_high=Decimal('1025000'),
+                sde=Decimal('165000'),
+            )
+        save_seconds = time.perf_counter() - started
+
+        states = LeadEmailState.objects.filter(lead__email__startswith=f'bench-{run}-')
+        deadline = time.time() + options['timeout']
+        while states.filter(sent_at__isnull=True, failed_at__isnull=True).exists() and time.time() < deadline:
+            time.sleep(0.05)
+        total_seconds = time.perf_counter() - started
+        sampling.set()
+
+        sent = states.filter(sent_at__isnull=False).count()
+        failed = states.filter(failed_at__isnull=False).count()
+        pending = options['leads'] - sent - failed
+        delays = [state.arrivals[email] - saved_at[email] for email in saved_at if email in state.arrivals]
+
+        # Failure handling: a re-save of a lead whose send failed should retry it
+        provider_failures = state.failures
+        for lead in Lead.objects.filter(email_state__failed_at__isnull=False, email__startswith=f'bench-{run}-'):
+            lead.save()
+        deadline = time.time() + options['timeout']
+        while states.filter(sent_at__isnull=True, failed_at__isnull=True).exists() and time.time() < deadline:
+            time.sleep(0.05)
+        retried_sent = states.filter(sent_at__isnull=False).count() - sent
+
+        # An admin edit that doesn't change what the email shows must not send it again
+        edited_at = timezone.now()
+        edited = 0
+        for lead in Lead.objects.filter(email_state__sent_at__isnull=False, email__startswith=f'bench-{run}-'):
+            lead.phone = '+44 20 8765 4321'
+            lead.save()
+            edited += 1
+        requeued = states.filter(queued_at__gte=edited_at).count()
+
+        server.shutdown()
+        server.server_close()
+
+        self.stdout.write(
+            f"\n{backend}: {options['leads']} leads, provider latency {options['latency_ms']} ms, "
+            f"error rate {options['error_rate']}"
+        )
+        rows = [
+            ('saves/s (request thread)', f"{options['leads'] / save_seconds:.1f}"),
+            ('request-thread ms/lead', f"{save_seconds / options['leads'] * 1000:.2f}"),
+            ('sends/s (end to end)', f"{sent / total_seconds:.1f}"),
+            ('save -> provider p50 ms', f"{statistics.median(delays) * 1000:.1f}" if delays else 'n/a'),
+            ('save -> provider p95 ms', f"{percentile(delays, 0.95) * 1000:.1f}" if delays else 'n/a'),
+            ('peak threads', str(peak_threads[0])),
+            ('max RSS MB', f"{resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024:.1f}"),
+            ('sent / failed / unfinished', f"{sent} / {failed} / {pending}"),
+            ('provider rejections', str(provider_failures)),
+            ('failed, then sent on re-save', f"{retried_sent} of {failed}"),
+            ('re-sent after phone edit', f"{requeued} of {edited}"),
+        ]
+        for label, value in rows:
+            self.stdout.write(f"{label:<30}{value:>16}")
@@ -0,0 +1,133 @@
+import logging
+import os
+import statistics
+import tempfile
+import threading
+import time
+from decimal import Decimal
+
+from django.core.management import call_command
+from django.core.management.base import BaseCommand
+from django.db import connection, connections
+from django.db.models.signals import post_save
+
+from api import signals
+from api.management.commands.bench_sqlite_writes import CONTACT, FORM
+from api.models import Lead
+
+
+class Client(threading.Thread):
+    """
+    Increment one lead's turnover through the API until `target` PUTs succeed:
+    GET the lead, PUT the form back with turnover + 1, retry on 409/412.
+    """
+
+    def __init__(self, url, target, if_match):
+        super().__init__(daemon=True)
+        self.url = url
+        self.target = target
+        self.if_match = if_match
+        self.succeeded = 0
+        self.statuses = {}
+        self.latencies = []
+        self.locking_statements = 0
+
+    def run(self):
+        from django.test import Client as TestClient
+
+        client = TestClient()
+        try:
+            with connection.execute_wrapper(self._count_locks):
+                while self.succeeded < self.target:
+                    response = client.get(self.url)
+                    turnover = Decimal(response.json()['data']['turnover'])
+                    headers = {'HTTP_IF_MATCH': response['ETag']} if self.if_match else {}
+                    started = time.perf_counter()
+                    response = client.put(
+                        self.url, data={**FORM, 'turnover': str(turnover + 1)},
+                        content_type='application/json', **headers,
+                    )
+                    self.latencies.append(time.perf_counter() - started)
+                    self.statuses[response.status_code] = self.statuses.get(response.status_code, 0) + 1
+                    if response.status_code == 200:
+                        self.succeeded += 1
+        finally:
+            connection.close()
+
+    def _count_locks(self, execute, sql, params, many, context):
+        if 'FOR UPDATE' in sql.upper():
+            self.locking_statements += 1
+        return execute(sql, params, many, context)
+
+
+class Command(BaseCommand):
+    """
+    Show that concurrent PUTs to one session lose no updates and take no row locks.
+
+    On a scratch SQLite database, N client threads each read-modify-write the same
+    lead through GET and PUT until their share of increments succeeded, once
+    sending If-Match and once without. With If-Match every successful PUT must
+    show up in the final turnover; without it, PUTs based on an older read
+    overwrite newer ones.
+    """
+    help = 'Stress concurrent PUTs to one lead and count lost updates with and without If-Match'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--clients', type=int, default=8)
+        parser.add_argument('--updates', type=int, default=25, help='Successful PUTs per client')
+
+    def handle(self, *args, **options):
+        post_save.disconnect(signals.send_business_evaluation_email, sender=Lead)
+        # Every 409/412 is logged as a warning by django.request
+        logging.getLogger('django.request').setLevel(logging.ERROR)
+        try:
+            with tempfile.TemporaryDirectory() as scratch:
+                connections.close_all()
+                connection.settings_dict['NAME'] = os.path.join(scratch, 'bench.sqlite3')
+                call_command('migrate', verbosity=0)
+
+                self.stdout.write(f"{options['clients']} clients x {options['updates']} successful PUTs to one lead")
+                self.stdout.write(
+                    f"{'mode':<10}{'PUT 200':>9}{'409':>6}{'412':>6}{'lost':>6}"
+                    f"{'p50 ms':>9}{'p99 ms':>9}{'FOR UPDATE':>12}"
+                )
+                for label, if_match in (('If-Match', True), ('blind', False)):
+                    self._run(label, if_match, options['clients'], options['updates'])
+        finally:
+            post_save.connect(signals.send_business_evaluation_email, sender=Lead)
+
+    def _run(self, label, if_match, clients, updates):
+        from django.test import Client as TestClient
+
+        client = TestClient()
+        session_id = client.post(
+            '/api/business-evaluation/', data={**CONTACT, 'purpose': 'Business Sale'}, content_type='application/json',
+        ).json()['session_id']
+        url = f'/api/business-evaluation/{session_id}/'
+        client.put(url, data={**FORM, 'turnover': '0'}, content_type='application/json')
+
+        threads = [Client(url, updates, if_match) for _ in range(clients)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        succeeded = sum(thread.succeeded for thread in threads)
+        final = Lead.objects.select_related('financials').get(session_id=session_id).turnover
+        statuses = {}
+        for thread in threads:
+            for code, count in thread.statuses.items():
+                statuses[code] = statuses.get(code, 0) + count
+        latencies = sorted(latency for thread in threads for latency in thread.latencies)
+        lost = succeeded - int(final)
+
+        self.stdout.write(
+            f"{label:<10}{statuses.get(200, 0):>9}{statuses.get(409, 0):>6}{statuses.get(412, 0):>6}{lost:>6}"
+            f"{statistics.median(latencies) * 1000:>9.1f}{latencies[int(len(latencies) * 0.99)] * 1000:>9.1f}"
+            f"{sum(thread.locking_statements for thread in threads):>12}"
+        )
+        unexpected = set(statuses) - {200, 409, 412}
+        if unexpected:
+            self.stdout.write(self.style.ERROR(f"Unexpected responses: {sorted(unexpected)}"))
+        if if_match and lost:
+            self.stdout.write(self.style.ERROR(f"{lost} successful PUTs were lost"))
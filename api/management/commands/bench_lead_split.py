@@ -0,0 +1,142 @@
+import os
+import random
+import tempfile
+import time
+import uuid
+from decimal import Decimal
+
+from django.core.management import call_command
+from django.core.management.base import BaseCommand
+from django.db import connection, connections
+from django.db.migrations.executor import MigrationExecutor
+from django.db.models import Count
+from django.db.models.signals import post_save
+from django.test.utils import override_settings
+
+from api import signals
+from api.management.commands.bench_sqlite_writes import CONTACT, FORM
+from api.models import Lead
+
+
+WIDE_MIGRATION = ('api', '0011_backfill_progress')
+TABLES = ('leads', 'lead_financials', 'lead_valuations')
+VALUATION = {'valuation_low': Decimal('525000.00'), 'valuation_high': Decimal('750000.00'), 'sde': Decimal('150000.00')}
+
+
+class Command(BaseCommand):
+    """
+    Compare the single wide leads row with the hot leads table plus its
+    lead_financials / lead_valuations side tables.
+
+    Seeds a scratch SQLite database at the last wide migration (most leads are
+    abandoned partials, the rest complete), measures storage and the common
+    operations, then migrates forward (which copies the data into the side tables)
+    and measures the same operations again. Storage comes from the dbstat table.
+    """
+    help = 'Benchmark row size and read/write costs of the leads table before and after the hot/cold split'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=50000, help='Leads to seed')
+        parser.add_argument('--complete', type=float, default=0.3, help='Fraction of seeded leads that are complete')
+        parser.add_argument('--ops', type=int, default=2000, help='Operations to time per measurement')
+        parser.add_argument('--seed', type=int, default=1)
+
+    def handle(self, *args, **options):
+        random.seed(options['seed'])
+        post_save.disconnect(signals.send_business_evaluation_email, sender=Lead)
+        try:
+            with tempfile.TemporaryDirectory() as scratch, override_settings(ONLINE_SCHEMA_BATCH_SLEEP_MS=0):
+                connections.close_all()
+                connection.settings_dict['NAME'] = os.path.join(scratch, 'bench.sqlite3')
+                call_command('migrate', 'api', WIDE_MIGRATION[1], verbosity=0)
+                wide = MigrationExecutor(connection).loader.project_state(WIDE_MIGRATION).apps.get_model('api', 'Lead')
+                session_ids = self._seed(wide, options['rows'], options['complete'])
+
+                results = [('wide', self._measure(wide, [], session_ids, options['ops']))]
+                self.stdout.write("Migrating to the split layout...")
+                call_command('migrate', verbosity=0)
+                results.append(('split', self._measure(Lead, list(Lead.SIDE_TABLES), session_ids, options['ops'])))
+        finally:
+            post_save.connect(signals.send_business_evaluation_email, sender=Lead)
+
+        self.stdout.write(
+            f"\n{options['rows']} leads ({options['complete']:.0%} complete), {options['ops']} ops per row below"
+        )
+        metrics = list(results[0][1])
+        self.stdout.write(f"{'':<34}" + ''.join(f"{label:>12}" for label, _ in results))
+        for metric in metrics:
+            self.stdout.write(f"{metric:<34}" + ''.join(f"{result[metric]:>12}" for _, result in results))
+
+    def _seed(self, model, rows, complete):
+        self.stdout.write(f"Seeding {rows} leads...")
+        session_ids = []
+        for start in range(0, rows, 5000):
+            batch = []
+            for _ in range(start, min(start + 5000, rows)):
+                session_id = uuid.uuid4()
+                session_ids.append(session_id)
+                if random.random() < complete:
+                    batch.append(model(session_id=session_id, is_complete=True, **FORM, **VALUATION))
+                else:
+                    batch.append(model(session_id=session_id, purpose='Business Sale', **CONTACT))
+            model.objects.bulk_create(batch)
+        return session_ids
+
+    def _measure(self, model, side_tables, session_ids, ops):
+        with connection.cursor() as cursor:
+            cursor.execute('VACUUM')
+            cursor.execute(
+                f"SELECT name, SUM(pgsize), SUM(payload) FROM dbstat WHERE name IN ({', '.join(['%s'] * len(TABLES))}) "
+                f"GROUP BY name",
+                list(TABLES),
+            )
+            sizes = {name: (pages, payload) for name, pages, payload in cursor.fetchall()}
+        rows = model.objects.count()
+        leads_pages, leads_payload = sizes['leads']
+        total_pages = sum(pages for pages, _ in sizes.values())
+
+        result = {
+            'leads payload bytes/row': f"{leads_payload / rows:.0f}",
+            'leads table bytes/row': f"{leads_pages / rows:.0f}",
+            'all tables bytes/lead': f"{total_pages / rows:.0f}",
+        }
+        probes = random.sample(session_ids, ops)
+        incomplete = list(
+            model.objects.filter(is_complete=False, session_id__in=session_ids).values_list('session_id', flat=True)[:ops]
+        )
+
+        def timed(label, operation, count):
+            started = time.perf_counter()
+            operation()
+            result[label] = f"{(time.perf_counter() - started) / count * 1e6:.0f}"
+
+        def insert():
+            for _ in range(ops):
+                model.objects.create(session_id=uuid.uuid4(), purpose='Business Sale', **CONTACT)
+
+        def hot_lookup():
+            for session_id in probes:
+                model.objects.get(session_id=session_id)
+
+        def full_read():
+            for session_id in probes:
+                lead = model.objects.select_related(*side_tables).get(session_id=session_id)
+                lead.profit, lead.valuation_low
+
+        def sector_scan():
+            list(model.objects.filter(is_complete=False).values('company_sector').annotate(n=Count('id')))
+
+        def complete():
+            for session_id in incomplete:
+                lead = model.objects.select_related(*side_tables).get(session_id=session_id)
+                for name, value in {**FORM, **VALUATION}.items():
+                    setattr(lead, name, value)
+                lead.is_complete = True
+                lead.save()
+
+        timed('insert partial lead us', insert, ops)
+        timed('session lookup (leads only) us', hot_lookup, ops)
+        timed('full read (with side rows) us', full_read, ops)
+        timed('funnel scan over leads us', sector_scan, 1)
+        timed('complete a lead us', complete, len(incomplete))
+        return result
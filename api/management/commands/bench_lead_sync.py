@@ -0,0 +1,86 @@
+import os
+import tempfile
+import time
+
+from django.conf import settings
+from django.contrib.auth.models import Permission, User
+from django.core.management import call_command
+from django.core.management.base import BaseCommand
+from django.db import connection, connections
+from django.db.models import Q
+from django.test import Client
+from django.test.utils import override_settings
+
+from api.management.commands.bench_sqlite_writes import CONTACT
+from api.models import Lead
+from api.views import _decode_cursor, _encode_cursor
+
+
+class Command(BaseCommand):
+    """
+    Show that a lead sync page costs the same at any depth.
+
+    Seeds a scratch SQLite database, then times fetching one page at increasing
+    depths of the (updated_at, id) order: the whole GET /api/leads/ request with a
+    cursor (sparse fields), its keyset query alone, and the OFFSET query a
+    page-number paginator would run instead.
+    """
+    help = 'Compare keyset (cursor) and offset pagination cost of the lead sync endpoint by depth'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=200000, help='Leads to seed')
+        parser.add_argument('--limit', type=int, default=100, help='Page size')
+        parser.add_argument('--repeat', type=int, default=20, help='Fetches per depth')
+
+    def handle(self, *args, **options):
+        rows, limit, repeat = options['rows'], options['limit'], options['repeat']
+        with tempfile.TemporaryDirectory() as scratch, override_settings(LEAD_SYNC_SETTLE_SECONDS=0):
+            connections.close_all()
+            connection.settings_dict['NAME'] = os.path.join(scratch, 'bench.sqlite3')
+            call_command('migrate', verbosity=0)
+            self._seed(rows)
+
+            user = User.objects.create(username='bench-crm')
+            user.user_permissions.add(Permission.objects.get(codename='view_lead'))
+            client = Client()
+            client.force_login(user)
+
+            ordered = Lead.objects.order_by('updated_at', 'id')
+            self.stdout.write(f"{rows} leads, {limit} per page, {settings.DATABASES['default']['ENGINE'].split('.')[-1]}")
+            self.stdout.write(f"{'depth':>10}{'GET ms':>10}{'keyset ms':>12}{'offset ms':>12}")
+            for fraction in (0, 0.1, 0.5, 0.9, 0.99):
+                depth = int(rows * fraction)
+                params = {'limit': limit, 'fields': 'id,email,company_sector,is_complete,updated_at'}
+                keyset = ordered
+                if depth:
+                    params['cursor'] = _encode_cursor(ordered.only('id', 'updated_at')[depth - 1])
+                    updated_at, lead_id = _decode_cursor(params['cursor'])
+                    keyset = ordered.filter(updated_at__gte=updated_at).filter(
+                        Q(updated_at__gt=updated_at) | Q(id__gt=lead_id)
+                    )
+
+                started = time.perf_counter()
+                for _ in range(repeat):
+                    response = client.get('/api/leads/', params)
+                get_ms = (time.perf_counter() - started) / repeat * 1000
+                assert response.status_code == 200, response.content
+
+                started = time.perf_counter()
+                for _ in range(repeat):
+                    list(keyset[:limit])
+                keyset_ms = (time.perf_counter() - started) / repeat * 1000
+
+                started = time.perf_counter()
+                for _ in range(repeat):
+                    list(ordered[depth:depth + limit])
+                offset_ms = (time.perf_counter() - started) / repeat * 1000
+
+                self.stdout.write(f"{depth:>10}{get_ms:>10.2f}{keyset_ms:>12.2f}{offset_ms:>12.2f}")
+
+    def _seed(self, rows):
+        self.stdout.write(f"Seeding {rows} leads...")
+        for start in range(0, rows, 10000):
+            Lead.objects.bulk_create(
+                Lead(purpose='Business Sale', company_sector='Technology', **CONTACT)
+                for _ in range(start, min(start + 10000, rows))
+            )
@@ -0,0 +1,126 @@
+import logging
+import os
+import tempfile
+import time
+
+from django.conf import settings
+from django.core.management import call_command
+from django.core.management.base import BaseCommand
+from django.db import connection, connections
+from django.test import Client
+
+from api.management.commands.bench_sqlite_writes import CONTACT, FORM
+from api.structured_logging import JsonFormatter, NonBlockingStreamHandler, SuccessSampler
+
+
+class SlowStream:
+    """A log sink where every write takes `latency` seconds, like a full stdout pipe."""
+
+    def __init__(self, latency):
+        self.latency = latency
+
+    def write(self, text):
+        time.sleep(self.latency)
+
+    def flush(self):
+        pass
+
+
+class RecordCounter(logging.Handler):
+    def __init__(self):
+        super().__init__()
+        self.count = 0
+
+    def emit(self, record):
+        self.count += 1
+
+
+class Command(BaseCommand):
+    """
+    Measure what logging costs the request thread.
+
+    Counts the records a POST + PUT request pair emits (through the full view
+    stack, against a scratch SQLite database), then times typical log calls in
+    the calling thread for each handler setup, with every write to the sink
+    taking --sink-latency-ms. Cost per request = records per pair x cost per record.
+    """
+    help = 'Benchmark per-request logging cost of sync vs queued handlers'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--records', type=int, default=2000, help='Log calls timed per variant')
+        parser.add_argument('--sink-latency-ms', type=float, default=1.0, help='Time each write to the sink takes')
+        parser.add_argument('--sample-rate', type=float, default=0.1, help='Rate for the sampled variant')
+
+    def handle(self, *args, **options):
+        sink = SlowStream(options['sink_latency_ms'] / 1000)
+        loggers = [logging.getLogger(), logging.getLogger('api'), logging.getLogger('django')]
+        saved = [logger.handlers for logger in loggers]
+
+        def use(handler):
+            for logger in loggers:
+                logger.handlers = [handler]
+
+        try:
+            counter = RecordCounter()
+            use(counter)
+            per_pair = self._records_per_pair(counter)
+
+            sync_handler = logging.StreamHandler(sink)
+            sync_handler.setFormatter(logging.Formatter('{levelname} {asctime} {module} {message}', style='{'))
+
+            queued = NonBlockingStreamHandler(sink, maxsize=options['records'] * 2)
+            queued.setFormatter(JsonFormatter())
+
+            sampled = NonBlockingStreamHandler(sink, maxsize=options['records'] * 2)
+            sampled.setFormatter(JsonFormatter())
+            sampled.addFilter(SuccessSampler(options['sample_rate']))
+
+            variants = [
+                ('sync StreamHandler', sync_handler),
+                ('queued JSON', queued),
+                (f"queued JSON, sampled {options['sample_rate']}", sampled),
+            ]
+            results = []
+            for label, handler in variants:
+                use(handler)
+                results.append((label, self._time_calls(options['records'])))
+                if isinstance(handler, NonBlockingStreamHandler):
+                    handler.stop()
+        finally:
+            for logger, handlers in zip(loggers, saved):
+                logger.handlers = handlers
+
+        self.stdout.write(
+            f"{per_pair} records per POST+PUT pair, sink latency {options['sink_latency_ms']} ms/write"
+        )
+        self.stdout.write(f"{'variant':<32}{'us/record':>12}{'us/request pair':>18}")
+        for label, seconds in results:
+            self.stdout.write(f"{label:<32}{seconds * 1e6:>12.1f}{seconds * per_pair * 1e6:>18.1f}")
+
+    def _records_per_pair(self, counter):
+        settings.EMAIL_BACKEND = 'django.core.mail.backends.locmem.EmailBackend'
+        settings.MAIL_API_KEY = None
+        settings.WRITE_BEHIND_ENABLED = False
+
+        with tempfile.TemporaryDirectory() as scratch:
+            connections.close_all()
+            connection.settings_dict['NAME'] = os.path.join(scratch, 'bench.sqlite3')
+            call_command('migrate', verbosity=0)
+
+            client = Client()
+            counter.count = 0
+            response = client.post('/api/business-evaluation/', data=CONTACT, content_type='application/json')
+            session_id = response.json()['session_id']
+            client.put(f'/api/business-evaluation/{session_id}/', data=FORM, content_type='application/json')
+            # Let the email thread log its result
+            time.sleep(0.5)
+            connections.close_all()
+        return counter.count
+
+    def _time_calls(self, count):
+        logger = logging.getLogger('api.views')
+        session_id = '916fc5a9-ead1-489b-8cbc-a102da22f2e4'
+        started = time.perf_counter()
+        for i in range(count):
+            logger.info("Partial lead created: ID=%s, Session=%s", i, session_id)
+        return (time.perf_counter() - started) / count
@@ -0,0 +1,87 @@
+import logging
+import os
+import tempfile
+import time
+import tracemalloc
+
+from django.core.management import call_command
+from django.core.management.base import BaseCommand
+from django.db import connection, connections
+from django.db.models.signals import post_save
+from django.test import Client
+from django.test.utils import override_settings
+
+from api import memory_profiling, signals
+from api.management.commands.bench_sqlite_writes import CONTACT, FORM
+from api.models import Lead
+
+
+class Command(BaseCommand):
+    """
+    Measure what the memory instrumentation costs and what it shows.
+
+    On a scratch SQLite database (without sending emails, which bench_email_pipeline
+    covers), runs the same number of lead POST/PUT pairs through the API with MEMORY_PROFILING_ENABLED
+    off and then on, and reports request rate, RSS growth and, for the profiled
+    run, traced memory, per-view allocation and the sites that grew most.
+    """
+    help = 'Compare request rate with memory profiling off and on and show the top growth sites'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--leads', type=int, default=1000, help='POST/PUT pairs per run')
+        parser.add_argument('--frames', type=int, default=1, help='tracemalloc frames per allocation')
+        parser.add_argument('--top', type=int, default=10)
+
+    def handle(self, *args, **options):
+        post_save.disconnect(signals.send_business_evaluation_email, sender=Lead)
+        logging.getLogger('api').setLevel(logging.WARNING)
+        try:
+            self._compare(options)
+        finally:
+            post_save.connect(signals.send_business_evaluation_email, sender=Lead)
+
+    def _compare(self, options):
+        with tempfile.TemporaryDirectory() as scratch, override_settings(
+            MEMORY_PROFILING_FRAMES=options['frames'],
+            MEMORY_SNAPSHOT_EVERY=options['leads'],
+        ):
+            connections.close_all()
+            connection.settings_dict['NAME'] = os.path.join(scratch, 'bench.sqlite3')
+            call_command('migrate', verbosity=0)
+
+            self.stdout.write(f"{options['leads']} POST/PUT pairs per run")
+            self.stdout.write(f"{'profiling':<11}{'req/s':>8}{'RSS MB':>9}{'RSS +MB':>9}")
+            for enabled in (False, True):
+                with override_settings(MEMORY_PROFILING_ENABLED=enabled):
+                    self._run('on' if enabled else 'off', options['leads'])
+
+            report = memory_profiling.profiler.report(options['top'])
+            tracemalloc.stop()
+
+        self.stdout.write(
+            f"Traced {report['traced_mb']} MB (peak {report['traced_peak_mb']} MB), "
+            f"tracemalloc's own overhead {report['tracemalloc_overhead_mb']} MB, {report['threads']} threads"
+        )
+        for name, view in report['views'].items():
+            self.stdout.write(f"{name}: {view['avg_net_kb']} KB held per request, peak {view['max_peak_kb']} KB")
+        self.stdout.write("Top growth over the second half of the profiled run:")
+        for row in report.get('growth', []):
+            self.stdout.write(f"{row['size_diff_kb']:>+10.1f} KB {row['count_diff']:>+7}  {row['site']}  {row['code']}")
+
+    def _run(self, label, leads):
+        client = Client()
+        memory_profiling.profiler = memory_profiling.MemoryProfiler()
+        rss_before = memory_profiling.rss_bytes()
+        started = time.perf_counter()
+        for _ in range(leads):
+            session_id = client.post(
+                '/api/business-evaluation/', data={**CONTACT, 'purpose': 'Business Sale'},
+                content_type='application/json',
+            ).json()['session_id']
+            response = client.put(f'/api/business-evaluation/{session_id}/', data=FORM, content_type='application/json')
+            assert response.status_code == 200, response.content
+        elapsed = time.perf_counter() - started
+        rss = memory_profiling.rss_bytes()
+        self.stdout.write(
+            f"{label:<11}{2 * leads / elapsed:>8.0f}{rss / 2**20:>9.1f}{(rss - rss_before) / 2**20:>+9.1f}"
+        )
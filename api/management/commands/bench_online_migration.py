@@ -0,0 +1,128 @@
+import os
+import statistics
+import tempfile
+import threading
+import time
+
+from django.apps import apps
+from django.core.management import call_command
+from django.core.management.base import BaseCommand
+from django.db import connection, connections, transaction
+from django.db.models import F, Max
+
+from api.management.commands.bench_sqlite_writes import CONTACT
+from api.models import BackfillProgress, Lead
+from api.online_schema import BackfillRunner, RunBackfill
+
+
+# A realistic backfill: legacy leads have no progress_saved_at (added in 0008)
+BACKFILL = RunBackfill(
+    name='bench_progress_saved_at',
+    model_name='lead',
+    pending={'progress_saved_at__isnull': True},
+    values={'progress_saved_at': F('updated_at')},
+)
+
+
+class Writer(threading.Thread):
+    """POST partial leads through the real endpoint until stopped, timing each request."""
+
+    def __init__(self):
+        super().__init__(daemon=True)
+        self.stopping = threading.Event()
+        self.latencies = []
+        self.failed = 0
+
+    def run(self):
+        from django.test import Client
+
+        client = Client()
+        try:
+            while not self.stopping.is_set():
+                started = time.perf_counter()
+                try:
+                    response = client.post('/api/business-evaluation/', data=CONTACT, content_type='application/json')
+                    ok = response.status_code == 201
+                except Exception:
+                    ok = False
+                self.latencies.append(time.perf_counter() - started)
+                if not ok:
+                    self.failed += 1
+        finally:
+            connection.close()
+
+
+class Command(BaseCommand):
+    """
+    Show that POSTs keep flowing while a backfill runs over a large leads table.
+
+    Seeds a scratch SQLite database, then runs the same backfill twice while a
+    writer thread POSTs leads: once as a single UPDATE in one transaction (what a
+    plain RunPython migration does), once with api.online_schema's batched
+    runner. Reports the POST rate and latency during each, and the longest stall.
+    """
+    help = 'Compare write latency during a single-transaction vs batched backfill of the leads table'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=200000, help='Leads to seed')
+        parser.add_argument('--batch-size', type=int, default=2000)
+        parser.add_argument('--sleep-ms', type=float, default=10.0, help='Pause between batches')
+
+    def handle(self, *args, **options):
+        with tempfile.TemporaryDirectory() as scratch:
+            connections.close_all()
+            connection.settings_dict['NAME'] = os.path.join(scratch, 'bench.sqlite3')
+            call_command('migrate', verbosity=0)
+            self._seed(options['rows'])
+
+            def single_transaction():
+                with transaction.atomic():
+                    Lead.objects.filter(**BACKFILL.pending).update(**BACKFILL.values)
+
+            def batched():
+                BackfillRunner(
+                    BACKFILL, apps, 'api',
+                    batch_size=options['batch_size'],
+                    sleep_seconds=options['sleep_ms'] / 1000,
+                ).run()
+
+            self.stdout.write(f"{options['rows']} leads, writer POSTing /api/business-evaluation/ throughout\n")
+            self.stdout.write(
+                f"{'backfill':<20}{'seconds':>9}{'POSTs':>8}{'POST/s':>9}{'p50 ms':>9}{'p99 ms':>9}{'max ms':>9}{'failed':>8}"
+            )
+            for label, backfill in (('single transaction', single_transaction), ('batched', batched)):
+                Lead.objects.update(progress_saved_at=None)
+                BackfillProgress.objects.all().delete()
+                self._measure(label, backfill)
+
+    def _seed(self, rows):
+        self.stdout.write(f"Seeding {rows} leads...")
+        for start in range(0, rows, 10000):
+            Lead.objects.bulk_create(
+                Lead(purpose='Business Sale', company_sector='Technology', **CONTACT)
+                for _ in range(start, min(start + 10000, rows))
+            )
+
+    def _measure(self, label, backfill):
+        writer = Writer()
+        writer.start()
+        time.sleep(0.5)
+        seeded_max = Lead.objects.aggregate(max_id=Max('id'))['max_id']
+        started = time.perf_counter()
+        backfill()
+        seconds = time.perf_counter() - started
+        time.sleep(0.5)
+        writer.stopping.set()
+        writer.join()
+
+        missed = Lead.objects.filter(progress_saved_at__isnull=True, id__lte=seeded_max).count()
+        latencies = sorted(writer.latencies)
+        total = seconds + 1.0
+        self.stdout.write(
+            f"{label:<20}{seconds:>9.2f}{len(latencies):>8}{len(latencies) / total:>9.0f}"
+            f"{statistics.median(latencies) * 1000:>9.1f}"
+            f"{latencies[int(len(latencies) * 0.99)] * 1000:>9.1f}"
+            f"{latencies[-1] * 1000:>9.1f}{writer.failed:>8}"
+        )
+        if missed:
+            self.stdout.write(self.style.ERROR(f"{missed} rows present before the backfill were not backfilled"))
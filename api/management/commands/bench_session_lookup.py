@@ -0,0 +1,86 @@
+import random
+import time
+import uuid
+
+from django.core.management.base import BaseCommand
+from django.db import connection, models
+
+
+TEXT_TABLE = 'bench_session_text'
+UUID_TABLE = 'bench_session_uuid'
+
+
+class Command(BaseCommand):
+    """
+    Compare session_id storage as text (the old CharField) and as a UUID column.
+
+    Builds two scratch tables with N rows each, reports the size of their unique
+    index and the mean time of K point lookups, then drops them. Works on SQLite
+    (needs the dbstat table for index sizes) and PostgreSQL.
+    """
+    help = 'Benchmark index size and lookup time of text vs UUID session IDs'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=100000, help='Rows per scratch table')
+        parser.add_argument('--lookups', type=int, default=5000, help='Point lookups to time per table')
+
+    def handle(self, *args, **options):
+        rows, lookups = options['rows'], options['lookups']
+        session_ids = [uuid.uuid4() for _ in range(rows)]
+        probes = random.sample(session_ids, min(lookups, rows))
+
+        uuid_field = models.UUIDField()
+        variants = [
+            ('text', TEXT_TABLE, 'varchar(100)', lambda value: str(value)),
+            ('uuid', UUID_TABLE, connection.data_types['UUIDField'],
+             lambda value: uuid_field.get_db_prep_value(value, connection)),
+        ]
+
+        self.stdout.write(f"{connection.vendor}: {rows} rows, {len(probes)} lookups")
+        self.stdout.write(f"{'column':<8}{'type':<16}{'index bytes':>14}{'bytes/row':>12}{'lookup us':>12}")
+
+        try:
+            for label, table, column_type, prep in variants:
+                index_bytes, lookup_us = self._run(table, column_type, [prep(v) for v in session_ids], [prep(v) for v in probes])
+                per_row = f"{index_bytes / rows:.1f}" if index_bytes is not None else 'n/a'
+                size = f"{index_bytes}" if index_bytes is not None else 'n/a'
+                self.stdout.write(f"{label:<8}{column_type:<16}{size:>14}{per_row:>12}{lookup_us:>12.1f}")
+        finally:
+            with connection.cursor() as cursor:
+                for _, table, _, _ in variants:
+                    cursor.execute(f'DROP TABLE IF EXISTS {table}')
+
+    def _run(self, table, column_type, values, probes):
+        index = f'{table}_session_idx'
+        with connection.cursor() as cursor:
+            cursor.execute(f'DROP TABLE IF EXISTS {table}')
+            cursor.execute(f'CREATE TABLE {table} (id integer PRIMARY KEY, session_id {column_type} NOT NULL)')
+            cursor.executemany(
+                f'INSERT INTO {table} (id, session_id) VALUES (%s, %s)',
+                list(enumerate(values, start=1)),
+            )
+            cursor.execute(f'CREATE UNIQUE INDEX {index} ON {table} (session_id)')
+            if connection.vendor == 'postgresql':
+                cursor.execute(f'ANALYZE {table}')
+
+            index_bytes = self._index_bytes(cursor, index)
+
+            started = time.perf_counter()
+            for value in probes:
+                cursor.execute(f'SELECT id FROM {table} WHERE session_id = %s', [value])
+                cursor.fetchone()
+            elapsed = time.perf_counter() - started
+
+        return index_bytes, elapsed / len(probes) * 1e6
+
+    def _index_bytes(self, cursor, index):
+        try:
+            if connection.vendor == 'postgresql':
+                cursor.execute('SELECT pg_relation_size(%s::regclass)', [index])
+            elif connection.vendor == 'sqlite':
+                cursor.execute('SELECT SUM(pgsize) FROM dbstat WHERE name = %s', [index])
+            else:
+                return None
+            return cursor.fetchone()[0]
+        except Exception:
+            return None
@@ -0,0 +1,159 @@
+import logging
+import os
+import tempfile
+import time
+
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.core.management.base import BaseCommand
+from django.db import connection, connections
+from django.db.models.signals import post_save
+from django.test import Client, RequestFactory
+from django.test.utils import override_settings
+
+from api import signals, slow_queries
+from api.management.commands.bench_sqlite_writes import CONTACT, FORM
+from api.models import Lead
+
+
+class PlanCounter(logging.Handler):
+    """Counts slow-query log records, and those that carried a plan."""
+
+    def __init__(self):
+        super().__init__()
+        self.slow = 0
+        self.with_plan = 0
+
+    def emit(self, record):
+        self.slow += 1
+        if '\nPlan:\n' in record.getMessage():
+            self.with_plan += 1
+
+
+class Command(BaseCommand):
+    """
+    Measure what slow-query capture costs below the threshold and show what it
+    records above it.
+
+    On a scratch SQLite database: times a primary-key lookup with and without the
+    query timer installed, and lead POST/PUT pairs through the API with
+    SLOW_QUERY_ENABLED off and on. Then, with a low threshold, loads an admin lead
+    search (a full scan) several times and prints the per-fingerprint summary with
+    the captured EXPLAIN plans.
+    """
+    help = 'Measure slow-query capture overhead and show its per-statement summary and EXPLAIN plans'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=50000, help='Leads to seed')
+        parser.add_argument('--queries', type=int, default=20000, help='Lookups for the per-query overhead')
+        parser.add_argument('--leads', type=int, default=300, help='POST/PUT pairs per run')
+        parser.add_argument('--threshold-ms', type=float, default=5.0, help='Threshold for the capture run')
+
+    def handle(self, *args, **options):
+        post_save.disconnect(signals.send_business_evaluation_email, sender=Lead)
+        logging.getLogger('api.views').setLevel(logging.WARNING)
+        counter = PlanCounter()
+        logger = logging.getLogger('api.slow_queries')
+        logger.addHandler(counter)
+        logger.propagate = False
+        try:
+            with tempfile.TemporaryDirectory() as scratch:
+                connections.close_all()
+                connection.settings_dict['NAME'] = os.path.join(scratch, 'bench.sqlite3')
+                call_command('migrate', verbosity=0)
+                self._seed(options['rows'])
+
+                self._per_query(options['queries'])
+                self._requests(options['leads'], counter)
+                self._capture(options['threshold_ms'], counter)
+        finally:
+            logger.removeHandler(counter)
+            logger.propagate = True
+            post_save.connect(signals.send_business_evaluation_email, sender=Lead)
+
+    def _seed(self, rows):
+        self.stdout.write(f"Seeding {rows} leads...")
+        for start in range(0, rows, 10000):
+            Lead.objects.bulk_create(
+                Lead(purpose='Business Sale', company_sector='Technology', **CONTACT)
+                for _ in range(start, min(start + 10000, rows))
+            )
+
+    def _per_query(self, queries):
+        lead_id = Lead.objects.values_list('id', flat=True).first()
+
+        def run():
+            started = time.perf_counter()
+            for _ in range(queries):
+                Lead.objects.filter(pk=lead_id).exists()
+            return (time.perf_counter() - started) / queries * 1e6
+
+        timer = slow_queries.QueryTimer(RequestFactory().get('/'))
+        plain = timed = float('inf')
+        for _ in range(5):
+            plain = min(plain, run())
+            with connection.execute_wrapper(timer):
+                timed = min(timed, run())
+
+        # The timer alone, around a query that does nothing
+        context = {'connection': connection}
+        sql = str(Lead.objects.filter(pk=lead_id).query)
+        started = time.perf_counter()
+        for _ in range(queries):
+            timer(lambda *args: None, sql, (lead_id,), False, context)
+        own = (time.perf_counter() - started) / queries * 1e6
+        slow_queries.stats.reset()
+        self.stdout.write(
+            f"Primary-key lookup: {plain:.1f} us plain, {timed:.1f} us timed; the timer itself takes {own:.1f} us"
+        )
+
+    def _requests(self, leads, counter):
+        rates = {}
+        for enabled in (False, True, False, True):
+            with override_settings(SLOW_QUERY_ENABLED=enabled):
+                client = Client()
+                started = time.perf_counter()
+                for _ in range(leads):
+                    session_id = client.post(
+                        '/api/business-evaluation/', data={**CONTACT, 'purpose': 'Business Sale'},
+                        content_type='application/json',
+                    ).json()['session_id']
+                    response = client.put(
+                        f'/api/business-evaluation/{session_id}/', data=FORM, content_type='application/json',
+                    )
+                    assert response.status_code == 200, response.content
+                rate = 2 * leads / (time.perf_counter() - started)
+            rates[enabled] = max(rates.get(enabled, 0), rate)
+        self.stdout.write(
+            f"POST/PUT: {rates[False]:.0f} req/s off, {rates[True]:.0f} req/s on "
+            f"({(rates[True] / rates[False] - 1) * 100:+.1f}%), {counter.slow} queries over the default threshold"
+        )
+
+    def _capture(self, threshold_ms, counter):
+        slow_queries.stats.reset()
+        counter.slow = counter.with_plan = 0
+        admin = User.objects.create_superuser('bench-admin', 'admin@example.com', 'bench')
+        with override_settings(SLOW_QUERY_ENABLED=True, SLOW_QUERY_THRESHOLD_MS=threshold_ms):
+            client = Client()
+            client.force_login(admin)
+            for term in ('nobody', 'someone', 'nobody'):
+                response = client.get('/admin/api/lead/', {'q': term})
+                assert response.status_code == 200
+            client.get('/api/sector-multipliers/')
+
+        summary = slow_queries.stats.as_dict(5)
+        self.stdout.write(
+            f"\nThreshold {threshold_ms} ms: {counter.slow} slow queries logged, {counter.with_plan} with a new plan"
+        )
+        for endpoint, stats in summary['endpoints'].items():
+            self.stdout.write(
+                f"  {endpoint}: {stats['requests']} requests, {stats['avg_queries']} queries, "
+                f"{stats['avg_db_ms']} ms DB on average"
+            )
+        for statement in summary['statements']:
+            self.stdout.write(
+                f"\n{statement['count']:>4}x  total {statement['total_ms']} ms  p95 {statement['p95_ms']} ms  "
+                f"slow {statement['slow']}  {', '.join(statement['endpoints'])}\n  {statement['statement'][:160]}"
+            )
+            for plan in statement['plans']:
+                self.stdout.write('  plan: ' + plan.replace('\n', '\n        '))
@@ -0,0 +1,144 @@
+import logging
+import multiprocessing
+import os
+import statistics
+import tempfile
+import time
+
+from django.conf import settings
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, connections
+
+
+CONTACT = {
+    'name': 'Bench User',
+    'email': 'bench@example.com',
+    'phone': '+44 20 1234 5678',
+    'company_name': 'Bench Ltd',
+    'company_number': '12345678',
+}
+
+FORM = {
+    **CONTACT,
+    'shareholders_working_in_business': True,
+    'taking_salary': False,
+    'salary_adjustment': '50000.00',
+    'property_own_or_rent': 'own',
+    'property_market_rent_adjustment': '24000.00',
+    'company_sector': 'Technology',
+    'adjust_industry_multipliers': True,
+    'lower_multiplier': '3.5',
+    'upper_multiplier': '5.0',
+    'purpose': 'Business Sale',
+    'spoken_to_accountant': True,
+    'spoken_to_broker': False,
+    'turnover': '500000.00',
+    'predicted_turnover': '550000.00',
+    'profit': '150000.00',
+    'predicted_profit': '175000.00',
+    'interest_payable': '5000.00',
+    'interest_receivable': '2000.00',
+    'non_recurring_expenses': '10000.00',
+    'depreciation': '15000.00',
+    'amortisation': '8000.00',
+    'net_assets': '200000.00',
+}
+
+
+class LockErrorCounter(logging.Handler):
+    """Count logged 'database is locked' errors, including ones from on_commit work."""
+
+    def __init__(self):
+        super().__init__(logging.ERROR)
+        self.count = 0
+
+    def emit(self, record):
+        if 'database is locked' in record.getMessage():
+            self.count += 1
+
+
+def run_worker(deadline):
+    """
+    POST + PUT lead pairs through the full view stack until the deadline.
+    Returns (latencies of successful requests, logged lock errors, failed requests).
+    """
+    from django.test import Client
+
+    counter = LockErrorCounter()
+    for name in ('api', 'django'):
+        logging.getLogger(name).handlers = [counter]
+
+    client = Client()
+    latencies, failed = [], 0
+    while time.time() < deadline:
+        for method, path, data in (('post', '/api/business-evaluation/', CONTACT), ('put', None, FORM)):
+            if path is None:
+                path = f'/api/business-evaluation/{session_id}/'
+            started = time.perf_counter()
+            response = getattr(client, method)(path, data=data, content_type='application/json')
+            elapsed = time.perf_counter() - started
+            if response.status_code >= 300:
+                failed += 1
+                break
+            latencies.append(elapsed)
+            session_id = response.json().get('session_id')
+    connection.close()
+    return latencies, counter.count, failed
+
+
+class Command(BaseCommand):
+    """
+    Measure the sustained POST/PUT rate of several processes writing to one SQLite file.
+
+    Runs against a fresh scratch database (never the configured one) using the
+    current SQLite settings, so run it with SQLITE_PRODUCTION_MODE off and on to
+    compare. Each process plays a gunicorn worker: create a lead, complete it,
+    repeat.
+    """
+    help = 'Benchmark concurrent POST/PUT throughput on SQLite with the current settings'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--processes', type=int, default=4, help='Concurrent writer processes')
+        parser.add_argument('--seconds', type=float, default=10.0, help='Duration of the timed run')
+
+    def handle(self, *args, **options):
+        if connection.vendor != 'sqlite':
+            raise CommandError('This benchmark only applies to SQLite databases')
+
+        # Keep the run self-contained: no emails, no buffering, no replica
+        settings.EMAIL_BACKEND = 'django.core.mail.backends.locmem.EmailBackend'
+        settings.MAIL_API_KEY = None
+        settings.WRITE_BEHIND_ENABLED = False
+        settings.PROGRESS_SAVE_WINDOW_SECONDS = 0
+
+        with tempfile.TemporaryDirectory() as scratch:
+            connections.close_all()
+            connection.settings_dict['NAME'] = os.path.join(scratch, 'bench.sqlite3')
+            call_command('migrate', verbosity=0)
+
+            with connection.cursor() as cursor:
+                cursor.execute('PRAGMA journal_mode')
+                journal_mode = cursor.fetchone()[0]
+            connections.close_all()
+
+            self.stdout.write(
+                f"engine={connection.settings_dict['ENGINE']} journal_mode={journal_mode} "
+                f"processes={options['processes']} seconds={options['seconds']}"
+            )
+
+            deadline = time.time() + options['seconds']
+            with multiprocessing.get_context('fork').Pool(options['processes']) as pool:
+                results = pool.map(run_worker, [deadline] * options['processes'])
+
+        latencies = sorted(latency for result in results for latency in result[0])
+        locked = sum(result[1] for result in results)
+        failed = sum(result[2] for result in results)
+        if not latencies:
+            raise CommandError(f"No request succeeded ({failed} failed, {locked} lock errors)")
+
+        self.stdout.write(f"{'requests/s':<14}{len(latencies) / options['seconds']:>10.1f}")
+        self.stdout.write(f"{'p50 ms':<14}{statistics.median(latencies) * 1000:>10.1f}")
+        self.stdout.write(f"{'p99 ms':<14}{latencies[int(len(latencies) * 0.99)] * 1000:>10.1f}")
+        self.stdout.write(f"{'failed':<14}{failed:>10}")
+        self.stdout.write(f"{'lock errors':<14}{locked:>10}")
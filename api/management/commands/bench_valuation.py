@@ -0,0 +1,72 @@
+import timeit
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand
+
+from api import valuation
+from api.models import Lead
+from api.utils import calculate_valuation
+
+
+AMOUNT_FIELDS = [
+    'profit',
+    'depreciation',
+    'amortisation',
+    'non_recurring_expenses',
+    'interest_receivable',
+    'interest_payable',
+    'salary_adjustment',
+    'property_market_rent_adjustment',
+    'net_assets',
+]
+
+
+def lead_input(lead):
+    """ValuationInput from a Lead's Decimal fields, using its own multipliers."""
+    return valuation.from_values(
+        property_own_or_rent=lead.property_own_or_rent,
+        lower_multiplier=lead.lower_multiplier,
+        upper_multiplier=lead.upper_multiplier,
+        **{field: getattr(lead, field) for field in AMOUNT_FIELDS},
+    )
+
+
+class Command(BaseCommand):
+    """
+    Microbenchmark the valuation formula. The integer core is checked against the
+    Decimal reference implementation by api.tests.test_valuation.
+    """
+    help = 'Benchmark per-call valuation cost'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--calls', type=int, default=100000, help='Calls per timed variant')
+
+    def handle(self, *args, **options):
+        lead = Lead(
+            profit=Decimal('150000.00'),
+            depreciation=Decimal('15000.00'),
+            amortisation=Decimal('8000.00'),
+            non_recurring_expenses=Decimal('10000.00'),
+            interest_receivable=Decimal('2000.00'),
+            interest_payable=Decimal('5000.00'),
+            salary_adjustment=Decimal('50000.00'),
+            property_own_or_rent='own',
+            property_market_rent_adjustment=Decimal('24000.00'),
+            net_assets=Decimal('200000.00'),
+            adjust_industry_multipliers=True,
+            lower_multiplier=Decimal('3.50'),
+            upper_multiplier=Decimal('5.00'),
+        )
+        inputs = lead_input(lead)
+
+        variants = [
+            ('calculate_valuation(lead)', lambda: calculate_valuation(lead)),
+            ('decimals -> valuate()', lambda: valuation.valuate(lead_input(lead))),
+            ('valuate(ValuationInput)', lambda: valuation.valuate(inputs)),
+        ]
+
+        calls = options['calls']
+        self.stdout.write(f"{'variant':<30}{'ns/call':>12}")
+        for label, func in variants:
+            best = min(timeit.repeat(func, number=calls, repeat=5))
+            self.stdout.write(f"{label:<30}{best / calls * 1e9:>12.0f}")
@@ -0,0 +1,194 @@
+import json
+import logging
+import os
+import random
+import statistics
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from django.core.management import call_command
+from django.core.management.base import BaseCommand
+from django.db import connection, connections
+from django.db.models.signals import post_save
+from django.test import Client
+from django.test.utils import override_settings
+
+from api import signals, webhooks
+from api.management.commands.bench_sqlite_writes import CONTACT, FORM
+from api.models import Lead, WebhookEndpoint, WebhookEvent
+
+
+class Receiver:
+    """
+    What one stand-in webhook receiver saw. It verifies every signature, counts
+    event ids it already had, and fails some requests: `error_rate` of them after
+    processing the batch (as if the response was lost), and all of them until
+    `down_until` (perf_counter time).
+    """
+
+    def __init__(self, secret, error_rate=0.0, down_until=0.0, seed=0):
+        self.secret = secret
+        self.error_rate = error_rate
+        self.down_until = down_until
+        self.rng = random.Random(seed)
+        self.lock = threading.Lock()
+        self.received = []
+        self.requests = 0
+        self.failures = 0
+        self.bad_signatures = 0
+        self.duplicates = 0
+
+    def receive(self, body, signature):
+        """Handle one POST; returns the response status."""
+        with self.lock:
+            self.requests += 1
+            if not webhooks.verify_signature(self.secret, body, signature or ''):
+                self.bad_signatures += 1
+                return 401
+            if time.perf_counter() < self.down_until:
+                self.failures += 1
+                return 503
+            seen = set(self.received)
+            for event in json.loads(body)['events']:
+                if event['id'] in seen:
+                    self.duplicates += 1
+                else:
+                    self.received.append(event['id'])
+            if self.rng.random() < self.error_rate:
+                self.failures += 1
+                return 500
+        return 204
+
+
+class ReceiverHandler(BaseHTTPRequestHandler):
+    """Routes POST /<name> to that endpoint's Receiver."""
+
+    def do_POST(self):
+        body = self.rfile.read(int(self.headers['Content-Length']))
+        receiver = self.server.receivers.get(self.path.strip('/'))
+        status = receiver.receive(body, self.headers.get(webhooks.SIGNATURE_HEADER)) if receiver else 404
+        self.send_response(status)
+        self.send_header('Content-Length', '0')
+        self.end_headers()
+
+    def log_message(self, format, *args):
+        pass
+
+
+class CircuitCounter(logging.Handler):
+    """Counts circuit openings logged by api.webhooks, per endpoint name."""
+
+    def __init__(self):
+        super().__init__()
+        self.opened = {}
+
+    def emit(self, record):
+        message = record.getMessage()
+        if 'circuit opened' in message:
+            name = message.split()[2]
+            self.opened[name] = self.opened.get(name, 0) + 1
+
+
+class Command(BaseCommand):
+    """
+    Exercise webhook delivery end to end against local stub receivers.
+
+    On a scratch SQLite database, completes leads through the API (which only
+    records events) and then runs the dispatcher against three receivers: one
+    healthy, one failing a share of requests after processing them, and one down
+    for the first seconds of the run. Backoff and circuit timings are scaled
+    down so the run takes seconds. Every receiver must end up with every event,
+    in order, with no bad signatures.
+    """
+    help = 'Deliver webhook events to local healthy, flaky and down stub receivers and report'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--leads', type=int, default=500, help='Leads to complete')
+        parser.add_argument('--batch-size', type=int, default=50)
+        parser.add_argument('--concurrency', type=int, default=4)
+        parser.add_argument('--error-rate', type=float, default=0.2, help="Flaky receiver's failure rate")
+        parser.add_argument('--outage', type=float, default=2.0, help='Seconds the down receiver is down')
+        parser.add_argument('--seed', type=int, default=1)
+
+    def handle(self, *args, **options):
+        post_save.disconnect(signals.send_business_evaluation_email, sender=Lead)
+        # Two INFO lines per lead otherwise
+        logging.getLogger('api.views').setLevel(logging.WARNING)
+        counter = CircuitCounter()
+        logger = logging.getLogger('api.webhooks')
+        logger.addHandler(counter)
+        logger.propagate = False
+        try:
+            with tempfile.TemporaryDirectory() as scratch, override_settings(
+                WEBHOOKS_ENABLED=True,
+                WEBHOOK_BATCH_SIZE=options['batch_size'],
+                WEBHOOK_SETTLE_SECONDS=0,
+                WEBHOOK_BACKOFF_BASE_SECONDS=0.05,
+                WEBHOOK_BACKOFF_MAX_SECONDS=0.5,
+                WEBHOOK_CIRCUIT_COOLDOWN_SECONDS=0.5,
+                WEBHOOK_TIMEOUT_SECONDS=2,
+            ):
+                connections.close_all()
+                connection.settings_dict['NAME'] = os.path.join(scratch, 'bench.sqlite3')
+                call_command('migrate', verbosity=0)
+                self._run(options, counter)
+        finally:
+            logger.removeHandler(counter)
+            logger.propagate = True
+            post_save.connect(signals.send_business_evaluation_email, sender=Lead)
+
+    def _run(self, options, counter):
+        server = ThreadingHTTPServer(('127.0.0.1', 0), ReceiverHandler)
+        server.receivers = {}
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        for name, error_rate in (('healthy', 0.0), ('flaky', options['error_rate']), ('down', 0.0)):
+            endpoint = WebhookEndpoint.objects.create(
+                name=name, url=f'http://127.0.0.1:{server.server_address[1]}/{name}', secret=f'whsec_{name}',
+            )
+            server.receivers[name] = Receiver(endpoint.secret, error_rate, seed=options['seed'])
+
+        client = Client()
+        latencies = []
+        for _ in range(options['leads']):
+            session_id = client.post(
+                '/api/business-evaluation/', data={**CONTACT, 'purpose': 'Business Sale'},
+                content_type='application/json',
+            ).json()['session_id']
+            started = time.perf_counter()
+            response = client.put(f'/api/business-evaluation/{session_id}/', data=FORM, content_type='application/json')
+            latencies.append(time.perf_counter() - started)
+            assert response.status_code == 200, response.content
+        events = list(WebhookEvent.objects.order_by('id').values_list('id', flat=True))
+        self.stdout.write(
+            f"Completed {options['leads']} leads (PUT p50 {statistics.median(latencies) * 1000:.1f} ms), "
+            f"{len(events)} events recorded"
+        )
+
+        server.receivers['down'].down_until = time.perf_counter() + options['outage']
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=options['concurrency']) as executor:
+            while WebhookEndpoint.objects.filter(last_event_id__lt=events[-1]).exists():
+                if not webhooks.dispatch(executor, options['concurrency'])[0]:
+                    time.sleep(0.02)
+        elapsed = time.perf_counter() - started
+        server.shutdown()
+
+        self.stdout.write(f"All endpoints caught up in {elapsed:.2f}s")
+        self.stdout.write(
+            f"{'endpoint':<10}{'events':>8}{'requests':>10}{'avg batch':>11}{'failed':>8}"
+            f"{'circuit':>9}{'dupes':>7}{'bad sig':>9}{'in order':>10}"
+        )
+        for name, receiver in server.receivers.items():
+            accepted = receiver.requests - receiver.failures - receiver.bad_signatures
+            average = len(receiver.received) / accepted if accepted else 0
+            in_order = receiver.received == events
+            self.stdout.write(
+                f"{name:<10}{len(receiver.received):>8}{receiver.requests:>10}{average:>11.1f}{receiver.failures:>8}"
+                f"{counter.opened.get(name, 0):>9}{receiver.duplicates:>7}{receiver.bad_signatures:>9}"
+                f"{'yes' if in_order else 'NO':>10}"
+            )
+            if not in_order or receiver.bad_signatures:
+                self.stdout.write(self.style.ERROR(f"{name} did not receive every event exactly in order"))
@@ -0,0 +1,75 @@
+from collections import defaultdict
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Count, Max, Q, Sum
+from django.db.models.functions import Coalesce, TruncDate
+
+from api import rollups
+from api.models import Lead, LeadDailyRollup
+
+
+class Command(BaseCommand):
+    """
+    Rebuild the lead daily rollup table from the leads table.
+
+    Leads are scanned in primary-key chunks so a large table is never aggregated
+    in a single query. Totals are accumulated per rollup key in memory (one entry
+    per day/sector/user type, not per lead) and written in one transaction at the end.
+    Run during a quiet period: writes that land mid-rebuild may be overwritten.
+    """
+    help = 'Backfill the lead daily rollup table from existing leads'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--chunk-size', type=int, default=5000, help='Leads aggregated per query')
+
+    def handle(self, *args, **options):
+        chunk_size = options['chunk_size']
+        max_id = Lead.objects.aggregate(max_id=Max('id'))['max_id'] or 0
+
+        totals = defaultdict(lambda: defaultdict(Decimal))
+        zero = Decimal('0')
+        completed = Q(is_complete=True)
+
+        for start in range(0, max_id, chunk_size):
+            chunk = (
+                Lead.objects
+                .filter(id__gt=start, id__lte=start + chunk_size)
+                .annotate(day=TruncDate('submitted_at'))
+                .order_by()
+                .values('day', 'company_sector', 'user_type')
+                .annotate(
+                    leads_created=Count('id'),
+                    leads_completed=Count('id', filter=completed),
+                    valuation_low_total=Coalesce(Sum('valuation__valuation_low', filter=completed), zero),
+                    valuation_high_total=Coalesce(Sum('valuation__valuation_high', filter=completed), zero),
+                    sde_total=Coalesce(Sum('valuation__sde', filter=completed), zero),
+                )
+            )
+            for row in chunk:
+                key = (row['day'], row['company_sector'] or '', row['user_type'] or 'other')
+                for field in rollups.COUNTER_FIELDS + rollups.TOTAL_FIELDS:
+                    totals[key][field] += row[field]
+
+            self.stdout.write(f"Scanned leads {start + 1}-{min(start + chunk_size, max_id)} of {max_id}")
+
+        rows = [
+            LeadDailyRollup(
+                day=day,
+                company_sector=company_sector,
+                user_type=user_type,
+                leads_created=int(values['leads_created']),
+                leads_completed=int(values['leads_completed']),
+                valuation_low_total=values['valuation_low_total'],
+                valuation_high_total=values['valuation_high_total'],
+                sde_total=values['sde_total'],
+            )
+            for (day, company_sector, user_type), values in totals.items()
+        ]
+
+        with transaction.atomic():
+            LeadDailyRollup.objects.all().delete()
+            LeadDailyRollup.objects.bulk_create(rows, batch_size=chunk_size)
+
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt {len(rows)} rollup rows from {max_id} lead ids"))
@@ -0,0 +1,58 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Max
+
+from api.models import Lead, SectorSketchValue, SectorValuationSketch
+from api.sketches import SKETCH_METRICS, QuantileSketch, registry
+
+
+class Command(BaseCommand):
+    """
+    Rebuild the per-sector valuation sketches from completed leads.
+
+    Streams completed leads with a server-side cursor, so memory is bounded by the
+    number of sectors rather than the number of leads. Values queued before the
+    rebuild started are replaced by it; leads queued since are left to the queue.
+    """
+    help = 'Rebuild per-sector valuation percentile sketches from the leads table'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--chunk-size', type=int, default=2000, help='Rows fetched per round trip')
+
+    def handle(self, *args, **options):
+        sketches = {}
+        queued_before = SectorSketchValue.objects.aggregate(max_id=Max('id'))['max_id'] or 0
+        leads = (
+            Lead.objects
+            .filter(is_complete=True)
+            .exclude(sketch_values__id__gt=queued_before)
+            .exclude(company_sector__isnull=True)
+            .exclude(company_sector='')
+            .order_by()
+            .values_list('company_sector', *(f'valuation__{metric}' for metric in SKETCH_METRICS))
+        )
+
+        total = 0
+        for company_sector, *values in leads.iterator(chunk_size=options['chunk_size']):
+            for metric, value in zip(SKETCH_METRICS, values):
+                if value is not None:
+                    sketches.setdefault((company_sector, metric), QuantileSketch()).add(value)
+            total += 1
+
+        rows = [
+            SectorValuationSketch(
+                company_sector=company_sector,
+                metric=metric,
+                count=sketch.count,
+                data=sketch.to_bytes(),
+            )
+            for (company_sector, metric), sketch in sketches.items()
+        ]
+
+        with transaction.atomic():
+            SectorValuationSketch.objects.all().delete()
+            SectorValuationSketch.objects.bulk_create(rows)
+            SectorSketchValue.objects.filter(id__lte=queued_before).delete()
+
+        registry.load()
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt {len(rows)} sketches from {total} completed leads"))
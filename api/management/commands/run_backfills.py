@@ -0,0 +1,86 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.db.migrations.loader import MigrationLoader
+from django.db.models import Max
+
+from api.online_schema import BackfillRunner, RunBackfill
+
+
+class Command(BaseCommand):
+    """
+    Show or run the RunBackfill operations declared in migrations.
+
+    Without a name, lists every backfill with its migration and checkpoint. With a
+    name, runs that backfill against the schema its migration expects, so a long
+    backfill can be done ahead of `migrate` (e.g. off-peak, or with a gentler
+    throttle); the migration then only catches up rows written since. Safe to
+    interrupt and re-run: progress is checkpointed per batch.
+    """
+    help = 'List or run the batched data backfills declared in migrations'
+
+    def add_arguments(self, parser):
+        parser.add_argument('name', nargs='?', help='Backfill to run (omit to list them)')
+        parser.add_argument('--database', default=DEFAULT_DB_ALIAS)
+        parser.add_argument('--batch-size', type=int, help='Rows per batch (default ONLINE_SCHEMA_BATCH_SIZE)')
+        parser.add_argument('--sleep-ms', type=float, help='Pause between batches (default ONLINE_SCHEMA_BATCH_SLEEP_MS)')
+        parser.add_argument('--max-seconds', type=float, help='Stop (resumably) after this long')
+
+    def handle(self, *args, **options):
+        connection = connections[options['database']]
+        loader = MigrationLoader(connection)
+        backfills = {}
+        for key, migration in sorted(loader.disk_migrations.items()):
+            for operation in migration.operations:
+                if isinstance(operation, RunBackfill):
+                    backfills[operation.name] = (key, operation)
+
+        if not options['name']:
+            self._list(loader, backfills, options['database'])
+            return
+
+        if options['name'] not in backfills:
+            raise CommandError(f"No backfill named {options['name']!r}")
+        key, operation = backfills[options['name']]
+        unapplied = [parent for parent in loader.graph.node_map[key].parents if parent.key not in loader.applied_migrations]
+        if unapplied:
+            raise CommandError(
+                f"{key[0]}.{key[1]} depends on unapplied migrations: "
+                f"{', '.join(f'{parent.key[0]}.{parent.key[1]}' for parent in unapplied)}"
+            )
+
+        # The schema as it is just before the backfill's migration
+        apps = loader.project_state(key, at_end=False).apps
+        runner = BackfillRunner(
+            operation, apps, key[0],
+            using=options['database'],
+            batch_size=options['batch_size'],
+            sleep_seconds=None if options['sleep_ms'] is None else options['sleep_ms'] / 1000,
+            max_seconds=options['max_seconds'],
+        )
+        updated = runner.run()
+        progress = runner.progress_model.objects.using(options['database']).get(name=operation.name)
+        state = 'finished' if progress.finished_at else f'paused at pk {progress.last_pk}'
+        self.stdout.write(self.style.SUCCESS(f"{operation.name}: {updated} rows updated this run, {state}"))
+
+    def _list(self, loader, backfills, using):
+        if not backfills:
+            self.stdout.write("No backfills declared in migrations")
+            return
+
+        progress = {}
+        if 'api' in loader.migrated_apps and ('api', '0011_backfill_progress') in loader.applied_migrations:
+            progress_model = loader.project_state().apps.get_model('api', 'BackfillProgress')
+            progress = {row.name: row for row in progress_model.objects.using(using)}
+
+        for name, (key, operation) in backfills.items():
+            applied = 'applied' if key in loader.applied_migrations else 'not applied'
+            row = progress.get(name)
+            if row is None:
+                state = 'not started'
+            elif row.finished_at:
+                state = f"finished {row.finished_at:%Y-%m-%d %H:%M}, {row.rows_updated} rows"
+            else:
+                model = loader.project_state(key, at_end=False).apps.get_model(key[0], operation.model_name)
+                max_pk = model._base_manager.using(using).aggregate(max_pk=Max('pk'))['max_pk'] or 0
+                state = f"at pk {row.last_pk} of {max_pk}, {row.rows_updated} rows"
+            self.stdout.write(f"{name:<30} {key[0]}.{key[1]} ({applied}): {state}")
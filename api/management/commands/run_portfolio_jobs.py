@@ -0,0 +1,56 @@
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import connection, connections
+
+from api import portfolio
+
+
+class Command(BaseCommand):
+    """
+    Portfolio valuation worker. Run it as its own process (not inside gunicorn):
+    it claims queued PortfolioJobs one at a time and values their rows on a pool
+    of low-priority worker processes.
+    """
+    help = 'Process queued portfolio valuation jobs on a process pool'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=getattr(settings, 'PORTFOLIO_WORKERS', 2))
+        parser.add_argument('--chunk-size', type=int, default=getattr(settings, 'PORTFOLIO_CHUNK_SIZE', 500))
+        parser.add_argument('--poll-interval', type=float, default=2.0, help='Seconds between queue checks when idle')
+        parser.add_argument('--once', action='store_true', help='Exit when the queue is empty')
+
+    def handle(self, *args, **options):
+        executor = ProcessPoolExecutor(
+            max_workers=options['workers'],
+            mp_context=multiprocessing.get_context('fork'),
+            initializer=portfolio.init_worker,
+        )
+
+        with executor:
+            # The first submit forks every worker; make sure none inherits an open DB connection
+            connections.close_all()
+            executor.submit(os.getpid).result()
+            self.stdout.write(f"Portfolio worker started with {options['workers']} processes")
+
+            while True:
+                portfolio.requeue_stale()
+                job = portfolio.claim_next()
+                if job is None:
+                    if options['once']:
+                        break
+                    connection.close()
+                    time.sleep(options['poll_interval'])
+                    continue
+
+                started = time.perf_counter()
+                portfolio.run_job(job, executor, options['chunk_size'])
+                job.refresh_from_db(fields=['status', 'processed_rows', 'failed_rows'])
+                self.stdout.write(
+                    f"Job {job.job_id}: {job.status}, {job.processed_rows} rows "
+                    f"({job.failed_rows} invalid) in {time.perf_counter() - started:.1f}s"
+                )
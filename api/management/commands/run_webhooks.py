@@ -0,0 +1,45 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import connection
+
+from api import webhooks
+
+
+class Command(BaseCommand):
+    """
+    Webhook dispatcher. Run it as its own process (not inside gunicorn): it
+    delivers recorded lead events to the active WebhookEndpoints in signed
+    batches, on a bounded pool of threads. Several dispatchers can run at once;
+    each endpoint is leased to one of them at a time.
+    """
+    help = 'Deliver recorded lead events to the configured webhook endpoints'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--concurrency', type=int, default=getattr(settings, 'WEBHOOK_CONCURRENCY', 4))
+        parser.add_argument('--poll-interval', type=float, default=1.0, help='Seconds between rounds when idle')
+        parser.add_argument('--once', action='store_true', help='Exit when no endpoint is due')
+
+    def handle(self, *args, **options):
+        concurrency = options['concurrency']
+        self.stdout.write(f"Webhook dispatcher started with {concurrency} threads")
+        last_prune = 0.0
+
+        with ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix='webhook') as executor:
+            while True:
+                if time.monotonic() - last_prune > 3600:
+                    deleted = webhooks.prune_events()
+                    if deleted:
+                        self.stdout.write(f"Pruned {deleted} delivered webhook events")
+                    last_prune = time.monotonic()
+
+                endpoints, events, requests = webhooks.dispatch(executor, concurrency)
+                if events:
+                    self.stdout.write(f"Delivered {events} events to {endpoints} endpoints in {requests} requests")
+                if not endpoints:
+                    if options['once']:
+                        break
+                    connection.close()
+                    time.sleep(options['poll_interval'])
@@ -0,0 +1,227 @@
+"""
+Opt-in memory instrumentation for long-running web workers.
+
+With MEMORY_PROFILING_ENABLED, MemoryProfilingMiddleware starts tracemalloc in each
+worker (keeping MEMORY_PROFILING_FRAMES frames per allocation) and:
+
+- every MEMORY_SNAPSHOT_EVERY requests takes a snapshot and logs the allocation
+  sites that grew most since the previous one, with traced memory and RSS;
+- for the views in MEMORY_PROFILED_VIEWS, records each request's net allocation
+  (memory still held when the response is returned) and peak.
+
+GET /api/metrics/memory/ (staff only) reports this worker's top allocation sites
+and growth since the last periodic snapshot, along with things suspected of
+holding memory: live threads and the DEBUG query log.
+
+Tracing slows allocation-heavy code and adds memory per traced block, so leave it
+off unless investigating. Deltas are process-wide: with a threaded worker class,
+or background threads such as the email senders, they include other threads'
+allocations.
+
+Worker recycling (memory_limit_exceeded) works without tracing: gunicorn's
+post_request hook retires a worker once its RSS passes MEMORY_RECYCLE_RSS_MB.
+"""
+import gc
+import linecache
+import logging
+import resource
+import sys
+import threading
+import tracemalloc
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+
+logger = logging.getLogger(__name__)
+
+_IGNORED = (
+    tracemalloc.Filter(False, tracemalloc.__file__),
+    tracemalloc.Filter(False, linecache.__file__),
+    tracemalloc.Filter(False, '<frozen importlib._bootstrap>'),
+    tracemalloc.Filter(False, '<frozen importlib._bootstrap_external>'),
+    tracemalloc.Filter(False, '<unknown>'),
+)
+
+
+def enabled():
+    return getattr(settings, 'MEMORY_PROFILING_ENABLED', False)
+
+
+def rss_bytes():
+    """Resident set size of this process (peak RSS where current isn't available)."""
+    try:
+        with open('/proc/self/statm') as statm:
+            return int(statm.read().split()[1]) * resource.getpagesize()
+    except (OSError, IndexError, ValueError):
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak if sys.platform == 'darwin' else peak * 1024
+
+
+def memory_limit_exceeded():
+    """This process's RSS if it is over MEMORY_RECYCLE_RSS_MB, else None."""
+    limit_mb = getattr(settings, 'MEMORY_RECYCLE_RSS_MB', 0)
+    if not limit_mb:
+        return None
+    rss = rss_bytes()
+    return rss if rss > limit_mb * 1024 * 1024 else None
+
+
+def snapshot():
+    # Collect first so garbage waiting for the cycle collector doesn't show as growth
+    gc.collect()
+    return tracemalloc.take_snapshot().filter_traces(_IGNORED)
+
+
+def growth(current, previous, key_type='lineno'):
+    """Sites that hold more memory in `current` than in `previous`, largest growth first."""
+    return [stat for stat in current.compare_to(previous, key_type) if stat.size_diff > 0]
+
+
+def format_stats(stats, limit):
+    """Top entries of Snapshot.statistics() or compare_to() as JSON-friendly dicts."""
+    rows = []
+    for stat in stats[:limit]:
+        frame = stat.traceback[-1]
+        row = {
+            'site': str(frame),
+            'code': linecache.getline(frame.filename, frame.lineno).strip(),
+            'size_kb': round(stat.size / 1024, 1),
+            'count': stat.count,
+        }
+        if hasattr(stat, 'size_diff'):
+            row['size_diff_kb'] = round(stat.size_diff / 1024, 1)
+            row['count_diff'] = stat.count_diff
+        if len(stat.traceback) > 1:
+            row['traceback'] = [str(frame) for frame in stat.traceback]
+        rows.append(row)
+    return rows
+
+
+class MemoryProfiler:
+    """
+    Per-process request counter, the last periodic snapshot and per-view
+    allocation totals.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.requests = 0
+        self.baseline = None
+        self.baseline_requests = 0
+        self.views = {}
+
+    def start(self):
+        if not tracemalloc.is_tracing():
+            tracemalloc.start(getattr(settings, 'MEMORY_PROFILING_FRAMES', 1))
+
+    def record_view(self, name, net_bytes, peak_bytes):
+        with self._lock:
+            view = self.views.setdefault(name, {'requests': 0, 'net_bytes': 0, 'max_peak_bytes': 0})
+            view['requests'] += 1
+            view['net_bytes'] += net_bytes
+            view['max_peak_bytes'] = max(view['max_peak_bytes'], peak_bytes)
+
+    def request_finished(self):
+        """Count a request; every MEMORY_SNAPSHOT_EVERY, log growth since the last snapshot."""
+        every = getattr(settings, 'MEMORY_SNAPSHOT_EVERY', 1000)
+        with self._lock:
+            self.requests += 1
+            if not every or self.requests % every:
+                return
+            previous, previous_requests = self.baseline, self.baseline_requests
+            current, requests = snapshot(), self.requests
+            self.baseline, self.baseline_requests = current, requests
+
+        traced, _ = tracemalloc.get_traced_memory()
+        if previous is None:
+            logger.info(
+                "Memory baseline after %s requests: traced %.1f MB, rss %.1f MB",
+                requests, traced / 2**20, rss_bytes() / 2**20,
+            )
+            return
+        stats = current.compare_to(previous, 'lineno')
+        grown = [stat for stat in stats if stat.size_diff > 0][:getattr(settings, 'MEMORY_TOP_N', 20)]
+        logger.info(
+            "Memory after %s requests: traced %.1f MB (%+.1f MB over %s requests), rss %.1f MB; top growth:\n%s",
+            requests, traced / 2**20, sum(stat.size_diff for stat in stats) / 2**20,
+            requests - previous_requests, rss_bytes() / 2**20,
+            '\n'.join(str(stat) for stat in grown),
+        )
+
+    def report(self, limit, group_by='lineno'):
+        """This worker's memory state, for the metrics endpoint."""
+        with self._lock:
+            requests, baseline, baseline_requests = self.requests, self.baseline, self.baseline_requests
+            views = {
+                name: {
+                    'requests': view['requests'],
+                    'avg_net_kb': round(view['net_bytes'] / view['requests'] / 1024, 2),
+                    'max_peak_kb': round(view['max_peak_bytes'] / 1024, 1),
+                }
+                for name, view in self.views.items()
+            }
+
+        report = {
+            'tracing': tracemalloc.is_tracing(),
+            'rss_mb': round(rss_bytes() / 2**20, 1),
+            'recycle_rss_mb': getattr(settings, 'MEMORY_RECYCLE_RSS_MB', 0) or None,
+            'threads': threading.active_count(),
+            'debug': settings.DEBUG,
+            # Only filled when DEBUG is on: up to 9000 queries per connection
+            'debug_queries_logged': sum(len(connection.queries_log) for connection in connections.all()),
+            'requests': requests,
+            'views': views,
+        }
+        if not report['tracing']:
+            return report
+
+        traced, peak = tracemalloc.get_traced_memory()
+        current = snapshot()
+        report.update({
+            'traced_mb': round(traced / 2**20, 2),
+            'traced_peak_mb': round(peak / 2**20, 2),
+            'tracemalloc_overhead_mb': round(tracemalloc.get_tracemalloc_memory() / 2**20, 2),
+            'top': format_stats(current.statistics(group_by), limit),
+        })
+        if baseline is not None:
+            report['growth_since_request'] = baseline_requests
+            report['growth'] = format_stats(growth(current, baseline, group_by), limit)
+        return report
+
+
+profiler = MemoryProfiler()
+
+
+class MemoryProfilingMiddleware:
+    """
+    Starts tracemalloc and measures each request. Removed from the stack when
+    MEMORY_PROFILING_ENABLED is off.
+    """
+
+    def __init__(self, get_response):
+        if not enabled():
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.profiled_views = set(getattr(settings, 'MEMORY_PROFILED_VIEWS', []))
+        profiler.start()
+
+    def __call__(self, request):
+        before, _ = tracemalloc.get_traced_memory()
+        tracemalloc.reset_peak()
+        response = self.get_response(request)
+
+        name = self._view_name(request)
+        if name in self.profiled_views:
+            after, peak = tracemalloc.get_traced_memory()
+            profiler.record_view(f'{name} {request.method}', after - before, peak - before)
+        profiler.request_finished()
+        return response
+
+    @staticmethod
+    def _view_name(request):
+        match = getattr(request, 'resolver_match', None)
+        if match is None:
+            return None
+        view_class = getattr(match.func, 'view_class', None)
+        return view_class.__name__ if view_class else match.func.__name__
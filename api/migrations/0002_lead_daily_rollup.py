@@ -0,0 +1,36 @@
+# Generated by Django 4.2.25 on 2026-10-19 13:22
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='LeadDailyRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField()),
+                ('company_sector', models.CharField(blank=True, default='', max_length=100)),
+                ('user_type', models.CharField(max_length=20)),
+                ('leads_created', models.PositiveIntegerField(default=0)),
+                ('leads_completed', models.PositiveIntegerField(default=0)),
+                ('valuation_low_total', models.DecimalField(decimal_places=2, default=0, max_digits=20)),
+                ('valuation_high_total', models.DecimalField(decimal_places=2, default=0, max_digits=20)),
+                ('sde_total', models.DecimalField(decimal_places=2, default=0, max_digits=20)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'db_table': 'lead_daily_rollups',
+                'ordering': ['-day', 'company_sector', 'user_type'],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='leaddailyrollup',
+            constraint=models.UniqueConstraint(fields=('day', 'company_sector', 'user_type'), name='unique_lead_rollup_key'),
+        ),
+    ]
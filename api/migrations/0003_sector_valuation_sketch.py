@@ -0,0 +1,31 @@
+# Generated by Django 4.2.25 on 2026-10-19 13:23
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0002_lead_daily_rollup'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SectorValuationSketch',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('company_sector', models.CharField(max_length=100)),
+                ('metric', models.CharField(choices=[('valuation_low', 'Valuation Low'), ('valuation_high', 'Valuation High'), ('sde', 'SDE')], max_length=20)),
+                ('count', models.PositiveIntegerField(default=0)),
+                ('data', models.BinaryField()),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'db_table': 'sector_valuation_sketches',
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='sectorvaluationsketch',
+            constraint=models.UniqueConstraint(fields=('company_sector', 'metric'), name='unique_sector_sketch_metric'),
+        ),
+    ]
@@ -0,0 +1,27 @@
+# Generated by Django 4.2.25 on 2026-10-19 13:24
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0003_sector_valuation_sketch'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SectorMultiplier',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('company_sector', models.CharField(max_length=100, unique=True)),
+                ('lower_multiplier', models.DecimalField(decimal_places=2, max_digits=10)),
+                ('upper_multiplier', models.DecimalField(decimal_places=2, max_digits=10)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'db_table': 'sector_multipliers',
+                'ordering': ['company_sector'],
+            },
+        ),
+    ]
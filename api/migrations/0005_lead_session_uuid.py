@@ -0,0 +1,19 @@
+# Session ID to native UUID, step 1 of 3 (expand).
+# Adds a nullable column so the table is not rewritten.
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0004_sector_multiplier'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='lead',
+            name='session_uuid',
+            field=models.UUIDField(blank=True, null=True),
+        ),
+    ]
@@ -0,0 +1,19 @@
+# Session ID to native UUID, step 2 of 3 (backfill).
+# Non-atomic so each batch commits on its own; see _session_uuid.
+
+from django.db import migrations
+
+from api.migrations import _session_uuid
+
+
+class Migration(migrations.Migration):
+
+    atomic = False
+
+    dependencies = [
+        ('api', '0005_lead_session_uuid'),
+    ]
+
+    operations = [
+        migrations.RunPython(_session_uuid.backfill_session_uuid, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,53 @@
+# Session ID to native UUID, step 3 of 3 (contract).
+# Catches up rows written by old workers since the backfill, builds the unique
+# index (CONCURRENTLY on PostgreSQL, so writes keep flowing), then swaps the
+# UUID column in under the session_id name.
+
+from django.db import migrations, models
+
+from api.migrations import _session_uuid
+
+
+def create_unique_index(apps, schema_editor):
+    concurrently = 'CONCURRENTLY ' if schema_editor.connection.vendor == 'postgresql' else ''
+    schema_editor.execute(
+        f'CREATE UNIQUE INDEX {concurrently}IF NOT EXISTS leads_session_uuid_uniq ON leads (session_uuid)'
+    )
+
+
+def drop_unique_index(apps, schema_editor):
+    schema_editor.execute('DROP INDEX IF EXISTS leads_session_uuid_uniq')
+
+
+class Migration(migrations.Migration):
+
+    atomic = False
+
+    dependencies = [
+        ('api', '0006_backfill_session_uuid'),
+    ]
+
+    operations = [
+        migrations.RunPython(_session_uuid.backfill_session_uuid, migrations.RunPython.noop),
+        migrations.SeparateDatabaseAndState(
+            database_operations=[
+                migrations.RunPython(create_unique_index, drop_unique_index),
+            ],
+            state_operations=[
+                migrations.AlterField(
+                    model_name='lead',
+                    name='session_uuid',
+                    field=models.UUIDField(blank=True, null=True, unique=True),
+                ),
+            ],
+        ),
+        migrations.RemoveField(
+            model_name='lead',
+            name='session_id',
+        ),
+        migrations.RenameField(
+            model_name='lead',
+            old_name='session_uuid',
+            new_name='session_id',
+        ),
+    ]
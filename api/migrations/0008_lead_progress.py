@@ -0,0 +1,23 @@
+# Generated by Django 4.2.25 on 2026-10-19 13:32
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0007_session_id_uuid_contract'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='lead',
+            name='last_step',
+            field=models.CharField(blank=True, max_length=50, null=True),
+        ),
+        migrations.AddField(
+            model_name='lead',
+            name='progress_saved_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+    ]
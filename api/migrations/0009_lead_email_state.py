@@ -0,0 +1,29 @@
+# Generated by Django 4.2.25 on 2026-10-19 13:39
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0008_lead_progress'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='LeadEmailState',
+            fields=[
+                ('lead', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='email_state', serialize=False, to='api.lead')),
+                ('content_hash', models.CharField(max_length=64)),
+                ('queued_at', models.DateTimeField()),
+                ('sent_at', models.DateTimeField(blank=True, null=True)),
+                ('failed_at', models.DateTimeField(blank=True, null=True)),
+                ('error', models.TextField(blank=True, default='')),
+                ('provider_message_id', models.CharField(blank=True, default='', max_length=100)),
+            ],
+            options={
+                'db_table': 'lead_email_states',
+            },
+        ),
+    ]
@@ -0,0 +1,67 @@
+# Generated by Django 4.2.25 on 2026-10-19 13:45
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+import uuid
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('api', '0009_lead_email_state'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PortfolioJob',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('job_id', models.UUIDField(default=uuid.uuid4, editable=False, unique=True)),
+                ('filename', models.CharField(blank=True, default='', max_length=255)),
+                ('input_csv', models.BinaryField()),
+                ('status', models.CharField(choices=[('queued', 'Queued'), ('running', 'Running'), ('succeeded', 'Succeeded'), ('failed', 'Failed')], default='queued', max_length=20)),
+                ('total_rows', models.PositiveIntegerField(default=0)),
+                ('processed_rows', models.PositiveIntegerField(default=0)),
+                ('failed_rows', models.PositiveIntegerField(default=0)),
+                ('error', models.TextField(blank=True, default='')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('started_at', models.DateTimeField(blank=True, null=True)),
+                ('finished_at', models.DateTimeField(blank=True, null=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('created_by', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='portfolio_jobs', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'db_table': 'portfolio_jobs',
+                'ordering': ['-created_at'],
+            },
+        ),
+        migrations.CreateModel(
+            name='PortfolioJobResult',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('row_number', models.PositiveIntegerField()),
+                ('reference', models.CharField(blank=True, default='', max_length=255)),
+                ('valuation_low', models.DecimalField(blank=True, decimal_places=2, max_digits=15, null=True)),
+                ('valuation_high', models.DecimalField(blank=True, decimal_places=2, max_digits=15, null=True)),
+                ('sde', models.DecimalField(blank=True, decimal_places=2, max_digits=15, null=True)),
+                ('lower_multiplier', models.DecimalField(blank=True, decimal_places=2, max_digits=10, null=True)),
+                ('upper_multiplier', models.DecimalField(blank=True, decimal_places=2, max_digits=10, null=True)),
+                ('error', models.TextField(blank=True, default='')),
+                ('job', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='results', to='api.portfoliojob')),
+            ],
+            options={
+                'db_table': 'portfolio_job_results',
+                'ordering': ['job', 'row_number'],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='portfoliojobresult',
+            constraint=models.UniqueConstraint(fields=('job', 'row_number'), name='unique_portfolio_job_row'),
+        ),
+        migrations.AddIndex(
+            model_name='portfoliojob',
+            index=models.Index(fields=['status', 'created_at'], name='portfolio_job_queue_idx'),
+        ),
+    ]
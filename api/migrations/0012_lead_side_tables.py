@@ -0,0 +1,57 @@
+# Lead vertical split, step 1 of 3 (expand).
+# Creates the 1:1 side tables for the financial inputs and valuation results.
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0011_backfill_progress'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='LeadFinancials',
+            fields=[
+                ('lead', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='financials', serialize=False, to='api.lead')),
+                ('shareholders_working_in_business', models.BooleanField(blank=True, default=False, null=True)),
+                ('taking_salary', models.BooleanField(blank=True, default=False, null=True)),
+                ('salary_adjustment', models.DecimalField(blank=True, decimal_places=2, max_digits=15, null=True)),
+                ('property_own_or_rent', models.CharField(blank=True, choices=[('own', 'own'), ('rent', 'rent')], max_length=10, null=True)),
+                ('property_market_rent_adjustment', models.DecimalField(blank=True, decimal_places=2, max_digits=15, null=True)),
+                ('adjust_industry_multipliers', models.BooleanField(blank=True, default=False, null=True)),
+                ('lower_multiplier', models.DecimalField(blank=True, decimal_places=2, max_digits=10, null=True)),
+                ('upper_multiplier', models.DecimalField(blank=True, decimal_places=2, max_digits=10, null=True)),
+                ('spoken_to_accountant', models.BooleanField(blank=True, default=False, null=True)),
+                ('spoken_to_broker', models.BooleanField(blank=True, default=False, null=True)),
+                ('turnover', models.DecimalField(blank=True, decimal_places=2, max_digits=15, null=True)),
+                ('predicted_turnover', models.DecimalField(blank=True, decimal_places=2, max_digits=15, null=True)),
+                ('profit', models.DecimalField(blank=True, decimal_places=2, max_digits=15, null=True)),
+                ('predicted_profit', models.DecimalField(blank=True, decimal_places=2, max_digits=15, null=True)),
+                ('non_recurring_expenses', models.DecimalField(blank=True, decimal_places=2, max_digits=15, null=True)),
+                ('interest_payable', models.DecimalField(blank=True, decimal_places=2, max_digits=15, null=True)),
+                ('interest_receivable', models.DecimalField(blank=True, decimal_places=2, max_digits=15, null=True)),
+                ('depreciation', models.DecimalField(blank=True, decimal_places=2, max_digits=15, null=True)),
+                ('amortisation', models.DecimalField(blank=True, decimal_places=2, max_digits=15, null=True)),
+                ('net_assets', models.DecimalField(blank=True, decimal_places=2, max_digits=15, null=True)),
+            ],
+            options={
+                'verbose_name_plural': 'lead financials',
+                'db_table': 'lead_financials',
+            },
+        ),
+        migrations.CreateModel(
+            name='LeadValuation',
+            fields=[
+                ('lead', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='valuation', serialize=False, to='api.lead')),
+                ('valuation_low', models.DecimalField(blank=True, decimal_places=2, max_digits=15, null=True)),
+                ('valuation_high', models.DecimalField(blank=True, decimal_places=2, max_digits=15, null=True)),
+                ('sde', models.DecimalField(blank=True, decimal_places=2, max_digits=15, null=True)),
+            ],
+            options={
+                'db_table': 'lead_valuations',
+            },
+        ),
+    ]
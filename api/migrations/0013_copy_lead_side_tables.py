@@ -0,0 +1,26 @@
+# Lead vertical split, step 2 of 3 (copy).
+# Batched, resumable copy of the financial and valuation columns into the side
+# tables; see _lead_split and api.online_schema.RunBackfill.
+
+from django.db import migrations
+
+from api.migrations import _lead_split
+from api.online_schema import RunBackfill
+
+
+class Migration(migrations.Migration):
+
+    atomic = False
+
+    dependencies = [
+        ('api', '0012_lead_side_tables'),
+    ]
+
+    operations = [
+        RunBackfill(
+            _lead_split.COPY_NAME,
+            'lead',
+            batch=_lead_split.copy_to_side_tables,
+            reverse=_lead_split.copy_back_to_leads,
+        ),
+    ]
@@ -0,0 +1,117 @@
+# Lead vertical split, step 3 of 3 (contract).
+# Re-copies leads written by old workers since the copy started, then drops the
+# moved columns from leads.
+
+from django.db import migrations
+
+from api.migrations import _lead_split
+from api.online_schema import RunBackfill
+
+
+class Migration(migrations.Migration):
+
+    atomic = False
+
+    dependencies = [
+        ('api', '0013_copy_lead_side_tables'),
+    ]
+
+    operations = [
+        RunBackfill(
+            f'{_lead_split.COPY_NAME}_catchup',
+            'lead',
+            batch=_lead_split.catch_up_side_tables,
+        ),
+        migrations.RemoveField(
+            model_name='lead',
+            name='adjust_industry_multipliers',
+        ),
+        migrations.RemoveField(
+            model_name='lead',
+            name='amortisation',
+        ),
+        migrations.RemoveField(
+            model_name='lead',
+            name='depreciation',
+        ),
+        migrations.RemoveField(
+            model_name='lead',
+            name='interest_payable',
+        ),
+        migrations.RemoveField(
+            model_name='lead',
+            name='interest_receivable',
+        ),
+        migrations.RemoveField(
+            model_name='lead',
+            name='lower_multiplier',
+        ),
+        migrations.RemoveField(
+            model_name='lead',
+            name='net_assets',
+        ),
+        migrations.RemoveField(
+            model_name='lead',
+            name='non_recurring_expenses',
+        ),
+        migrations.RemoveField(
+            model_name='lead',
+            name='predicted_profit',
+        ),
+        migrations.RemoveField(
+            model_name='lead',
+            name='predicted_turnover',
+        ),
+        migrations.RemoveField(
+            model_name='lead',
+            name='profit',
+        ),
+        migrations.RemoveField(
+            model_name='lead',
+            name='property_market_rent_adjustment',
+        ),
+        migrations.RemoveField(
+            model_name='lead',
+            name='property_own_or_rent',
+        ),
+        migrations.RemoveField(
+            model_name='lead',
+            name='salary_adjustment',
+        ),
+        migrations.RemoveField(
+            model_name='lead',
+            name='sde',
+        ),
+        migrations.RemoveField(
+            model_name='lead',
+            name='shareholders_working_in_business',
+        ),
+        migrations.RemoveField(
+            model_name='lead',
+            name='spoken_to_accountant',
+        ),
+        migrations.RemoveField(
+            model_name='lead',
+            name='spoken_to_broker',
+        ),
+        migrations.RemoveField(
+            model_name='lead',
+            name='taking_salary',
+        ),
+        migrations.RemoveField(
+            model_name='lead',
+            name='turnover',
+        ),
+        migrations.RemoveField(
+            model_name='lead',
+            name='upper_multiplier',
+        ),
+        migrations.RemoveField(
+            model_name='lead',
+            name='valuation_high',
+        ),
+        migrations.RemoveField(
+            model_name='lead',
+            name='valuation_low',
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 4.2.25 on 2026-10-19 14:15
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0014_lead_side_tables_contract'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='lead',
+            name='version',
+            field=models.PositiveIntegerField(default=1),
+        ),
+    ]
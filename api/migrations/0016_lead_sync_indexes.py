@@ -0,0 +1,25 @@
+# Generated by Django 4.2.25 on 2026-10-19 14:18
+
+from django.db import migrations, models
+
+from api.online_schema import AddIndexConcurrently
+
+
+class Migration(migrations.Migration):
+
+    atomic = False
+
+    dependencies = [
+        ('api', '0015_lead_version'),
+    ]
+
+    operations = [
+        AddIndexConcurrently(
+            model_name='lead',
+            index=models.Index(fields=['updated_at', 'id'], name='lead_sync_idx'),
+        ),
+        AddIndexConcurrently(
+            model_name='lead',
+            index=models.Index(fields=['company_sector', 'updated_at', 'id'], name='lead_sector_sync_idx'),
+        ),
+    ]
@@ -0,0 +1,55 @@
+import hashlib
+import itertools
+
+from django.db import migrations
+
+from api.emails import hash_content
+from api.online_schema import RunBackfill
+
+
+def _legacy_amounts(value):
+    """How an amount may have been hashed before amounts were normalized."""
+    if value is None:
+        return {'None'}
+    return {str(value), format(value.normalize(), 'f')}
+
+
+def rehash_states(states):
+    """
+    RunBackfill batch: rewrite content hashes taken from unnormalized amounts, so the
+    next save of an already emailed lead doesn't see changed content and resend.
+    Only hashes of the lead's current content are rewritten; any other hash still
+    differs afterwards, as it did before.
+    """
+    rows = states.values(
+        'lead_id', 'content_hash', 'lead__email', 'lead__name', 'lead__company_sector',
+        'lead__valuation__valuation_low', 'lead__valuation__valuation_high',
+    )
+    model = states.model
+    changed = []
+    for row in rows:
+        email, name, sector = row['lead__email'], row['lead__name'], row['lead__company_sector']
+        low, high = row['lead__valuation__valuation_low'], row['lead__valuation__valuation_high']
+        legacy = {
+            hashlib.sha256(
+                '\x1f'.join(str(part) for part in (email, name, sector, old_low, old_high)).encode()
+            ).hexdigest()
+            for old_low, old_high in itertools.product(_legacy_amounts(low), _legacy_amounts(high))
+        }
+        if row['content_hash'] in legacy:
+            changed.append(model(lead_id=row['lead_id'], content_hash=hash_content(email, name, sector, low, high)))
+    model.objects.using(states.db).bulk_update(changed, ['content_hash'])
+    return len(changed)
+
+
+class Migration(migrations.Migration):
+
+    atomic = False
+
+    dependencies = [
+        ('api', '0017_webhooks'),
+    ]
+
+    operations = [
+        RunBackfill('lead_email_state_hashes', 'leademailstate', batch=rehash_states),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 4.2.25 on 2026-10-19 14:50
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0018_rehash_lead_email_states'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SectorSketchValue',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('company_sector', models.CharField(max_length=100)),
+                ('valuation_low', models.DecimalField(blank=True, decimal_places=2, max_digits=15, null=True)),
+                ('valuation_high', models.DecimalField(blank=True, decimal_places=2, max_digits=15, null=True)),
+                ('sde', models.DecimalField(blank=True, decimal_places=2, max_digits=15, null=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('lead', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='sketch_values', to='api.lead')),
+            ],
+            options={
+                'db_table': 'sector_sketch_values',
+            },
+        ),
+    ]
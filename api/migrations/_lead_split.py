@@ -0,0 +1,90 @@
+"""
+Shared data steps for moving Lead's financial inputs and valuation results into
+the lead_financials / lead_valuations side tables (0012-0014).
+
+Not a migration itself: the loader skips modules starting with an underscore.
+"""
+from django.db import transaction
+
+
+COPY_NAME = 'lead_side_tables'
+BATCH_SIZE = 1000
+
+FINANCIAL_FIELDS = (
+    'shareholders_working_in_business',
+    'taking_salary',
+    'salary_adjustment',
+    'property_own_or_rent',
+    'property_market_rent_adjustment',
+    'adjust_industry_multipliers',
+    'lower_multiplier',
+    'upper_multiplier',
+    'spoken_to_accountant',
+    'spoken_to_broker',
+    'turnover',
+    'predicted_turnover',
+    'profit',
+    'predicted_profit',
+    'non_recurring_expenses',
+    'interest_payable',
+    'interest_receivable',
+    'depreciation',
+    'amortisation',
+    'net_assets',
+)
+VALUATION_FIELDS = ('valuation_low', 'valuation_high', 'sde')
+SIDE_TABLES = (('LeadFinancials', FINANCIAL_FIELDS), ('LeadValuation', VALUATION_FIELDS))
+
+
+def copy_to_side_tables(leads):
+    """
+    RunBackfill batch: upsert the side rows of a batch of leads from their columns.
+
+    Leads whose values are all still the defaults (partial leads) get no row; a
+    missing row reads back as the same defaults.
+    """
+    apps = leads.model._meta.apps
+    rows = list(leads.values('id', *FINANCIAL_FIELDS, *VALUATION_FIELDS))
+    written = 0
+    for model_name, fields in SIDE_TABLES:
+        model = apps.get_model('api', model_name)
+        defaults = {name: model._meta.get_field(name).get_default() for name in fields}
+        side_rows = [
+            model(lead_id=row['id'], **{name: row[name] for name in fields})
+            for row in rows
+            if any(row[name] != defaults[name] for name in fields)
+        ]
+        model.objects.using(leads.db).bulk_create(
+            side_rows, update_conflicts=True, unique_fields=['lead'], update_fields=list(fields),
+        )
+        written += len(side_rows)
+    return written
+
+
+def catch_up_side_tables(leads):
+    """
+    RunBackfill batch for the contract step: re-copy leads written (by workers still
+    on the old code) since the copy started.
+    """
+    progress = leads.model._meta.apps.get_model('api', 'BackfillProgress')
+    started_at = progress.objects.using(leads.db).filter(name=COPY_NAME).values_list('started_at', flat=True).first()
+    if started_at is not None:
+        leads = leads.filter(updated_at__gte=started_at)
+    return copy_to_side_tables(leads)
+
+
+def copy_back_to_leads(apps, schema_editor):
+    """Reverse of the copy: write side-table values back into the leads columns."""
+    Lead = apps.get_model('api', 'Lead')
+    using = schema_editor.connection.alias
+    for model_name, fields in SIDE_TABLES:
+        rows = apps.get_model('api', model_name).objects.using(using).order_by('lead_id')
+        last_id = 0
+        while True:
+            batch = list(rows.filter(lead_id__gt=last_id).values('lead_id', *fields)[:BATCH_SIZE])
+            if not batch:
+                break
+            leads = [Lead(id=row['lead_id'], **{name: row[name] for name in fields}) for row in batch]
+            with transaction.atomic(using=using):
+                Lead.objects.using(using).bulk_update(leads, fields)
+            last_id = batch[-1]['lead_id']
@@ -0,0 +1,48 @@
+"""
+Shared batched backfill for the session_id -> UUID migrations (0006, 0007).
+
+Not a migration itself: the loader skips modules starting with an underscore.
+"""
+import uuid
+
+from django.db import transaction
+
+
+BATCH_SIZE = 1000
+
+
+def parse_session_id(value):
+    """Parse a legacy text session ID; non-UUID values get a stable derived UUID."""
+    try:
+        return uuid.UUID(value)
+    except ValueError:
+        return uuid.uuid5(uuid.NAMESPACE_URL, f'lead-session:{value}')
+
+
+def backfill_session_uuid(apps, schema_editor):
+    """
+    Copy session_id into session_uuid in primary-key batches.
+
+    Each batch commits on its own (the calling migrations are non-atomic), so locks
+    are held only briefly on a live table and an interrupted run resumes where it
+    left off.
+    """
+    Lead = apps.get_model('api', 'Lead')
+    using = schema_editor.connection.alias
+    pending = (
+        Lead.objects.using(using)
+        .filter(session_uuid__isnull=True, session_id__isnull=False)
+        .exclude(session_id='')
+        .order_by('id')
+    )
+
+    last_id = 0
+    while True:
+        batch = list(pending.filter(id__gt=last_id).only('id', 'session_id')[:BATCH_SIZE])
+        if not batch:
+            break
+        for lead in batch:
+            lead.session_uuid = parse_session_id(lead.session_id)
+        with transaction.atomic(using=using):
+            Lead.objects.using(using).bulk_update(batch, ['session_uuid'])
+        last_id = batch[-1].id
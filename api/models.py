@@ -1,10 +1,39 @@
-from django.db import models
+import uuid
+
+from django.conf import settings
+from django.core.exceptions import ObjectDoesNotExist
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import models, router, transaction
+
+
+class StaleLeadError(Exception):
+    """
+    Raised when a lead save finds the row changed (or deleted) since it was read.
+    """
 
 
 class Lead(models.Model):
     """
     Lead model to store business valuation form submissions.
+
+    The leads table holds only what every request touches: contact and purpose,
+    session and status. The financial inputs and the valuation results live in 1:1
+    side tables (LeadFinancials, LeadValuation) that are loaded on first access, so
+    creating a partial lead, looking up a session or listing leads never reads or
+    writes them. Their fields are still plain attributes of Lead (lead.profit,
+    lead.valuation_low, Lead(turnover=...)); save() writes the side rows whose
+    values were set. Query them through the relation, e.g. valuation__sde.
+
+    Every write bumps version. save() of an existing lead is a compare-and-swap on
+    it (UPDATE ... WHERE version = <version read>) and raises StaleLeadError when
+    another request wrote the lead first, so concurrent PUTs can't silently
+    overwrite each other and no row locks are taken. Queryset updates of leads
+    must bump it themselves: .update(..., version=F('version') + 1).
     """
+    SIDE_TABLES = ('financials', 'valuation')
+    # Side-table field name -> SIDE_TABLES accessor, filled in below the side models
+    SIDE_FIELDS = {}
+
     # Contact and Purpose Information (now first step)
     user_type = models.CharField(
         max_length=20,
@@ -31,6 +60,153 @@ class Lead(models.Model):
     
     # Sector Information (for sellers) / Business Information (for buyers)
     company_sector = models.CharField(max_length=100, null=True, blank=True)
+    
+    # Contact Information
+    name = models.CharField(max_length=200, null=True, blank=True)
+    email = models.EmailField(null=True, blank=True)
+    phone = models.CharField(max_length=20, null=True, blank=True)
+    company_name = models.CharField(max_length=200, null=True, blank=True)
+    company_number = models.CharField(max_length=50, null=True, blank=True)
+    
+    # Session tracking
+    session_id = models.UUIDField(unique=True, null=True, blank=True)
+    is_complete = models.BooleanField(default=False)
+    version = models.PositiveIntegerField(default=1)
+    
+    # Form progress (autosaved before completion, see api.progress)
+    last_step = models.CharField(max_length=50, null=True, blank=True)
+    progress_saved_at = models.DateTimeField(null=True, blank=True)
+    
+    # Metadata
+    submitted_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        ordering = ['-submitted_at']
+        db_table = 'leads'
+        indexes = [
+            # Keyset pagination of the lead sync endpoint (see LeadSyncView)
+            models.Index(fields=['updated_at', 'id'], name='lead_sync_idx'),
+            models.Index(fields=['company_sector', 'updated_at', 'id'], name='lead_sector_sync_idx'),
+        ]
+    
+    def __str__(self):
+        return f"{self.name} - {self.email} ({self.submitted_at.strftime('%Y-%m-%d')})"
+
+    @classmethod
+    def side_model(cls, accessor):
+        return cls._meta.get_field(accessor).related_model
+
+    @classmethod
+    def split_fields(cls, values):
+        """
+        Split field values into (leads columns, {side table accessor: values}).
+        """
+        columns, sides = {}, {}
+        for name, value in values.items():
+            accessor = cls.SIDE_FIELDS.get(name)
+            if accessor is None:
+                columns[name] = value
+            else:
+                sides.setdefault(accessor, {})[name] = value
+        return columns, sides
+
+    def side(self, accessor):
+        """
+        The lead's row in a side table, loaded on first access. A lead without one
+        gets a blank unsaved row, inserted by save() once one of its values is set.
+        """
+        try:
+            return getattr(self, accessor)
+        except ObjectDoesNotExist:
+            row = self.side_model(accessor)()
+            setattr(self, accessor, row)
+            return row
+
+    def pending_side_rows(self):
+        """
+        Side rows with values set since they were loaded, bound to this lead.
+        For bulk inserts, which bypass save().
+        """
+        rows = []
+        for accessor in self.__dict__.pop('_dirty_sides', ()):
+            row = self.side(accessor)
+            row.lead = self
+            rows.append(row)
+        return rows
+
+    def save(self, *args, **kwargs):
+        adding = self._state.adding
+        dirty = self.__dict__.setdefault('_dirty_sides', set())
+        update_fields = kwargs.get('update_fields')
+        side_update_fields = {}
+        if update_fields is not None:
+            columns, sides = self.split_fields(dict.fromkeys(update_fields))
+            if sides:
+                # Side rows are part of the lead: changing one still bumps updated_at
+                kwargs['update_fields'] = [*columns, 'updated_at']
+                side_update_fields = {accessor: list(names) for accessor, names in sides.items()}
+                dirty &= set(side_update_fields)
+        expected_version = None if adding else self.version
+        if expected_version is not None:
+            # Checked by _do_update
+            self._expected_version = expected_version
+            self.version += 1
+            if kwargs.get('update_fields') is not None:
+                kwargs['update_fields'] = [*kwargs['update_fields'], 'version']
+
+        try:
+            self._save_with_side_rows(dirty, side_update_fields, *args, **kwargs)
+        except Exception:
+            if expected_version is not None:
+                self.version = expected_version
+            raise
+        finally:
+            self.__dict__.pop('_expected_version', None)
+
+        if adding:
+            for accessor in self.SIDE_TABLES:
+                if not self._meta.get_field(accessor).is_cached(self):
+                    # A new lead has no side rows; remember that rather than query for them later
+                    setattr(self, accessor, self.side_model(accessor)())
+
+    def _save_with_side_rows(self, dirty, side_update_fields, *args, **kwargs):
+        if not dirty:
+            super().save(*args, **kwargs)
+        else:
+            # The lead and its side rows are written together or not at all
+            using = kwargs.get('using') or router.db_for_write(self.__class__, instance=self)
+            with transaction.atomic(using=using):
+                super().save(*args, **kwargs)
+                for accessor in self.SIDE_TABLES:
+                    if accessor not in dirty:
+                        continue
+                    row = self.side(accessor)
+                    row.lead = self
+                    if row._state.adding:
+                        row.save(using=self._state.db, force_insert=True)
+                    else:
+                        row.save(using=self._state.db, update_fields=side_update_fields.get(accessor))
+            dirty.clear()
+
+    def _do_update(self, base_qs, using, pk_val, values, update_fields, forced_update):
+        expected_version = self.__dict__.pop('_expected_version', None)
+        if expected_version is None:
+            return super()._do_update(base_qs, using, pk_val, values, update_fields, forced_update)
+
+        guarded_qs = base_qs.filter(version=expected_version)
+        if not super()._do_update(guarded_qs, using, pk_val, values, update_fields, forced_update):
+            raise StaleLeadError(f"Lead {pk_val} changed since version {expected_version} was read")
+        return True
+
+
+class LeadFinancials(models.Model):
+    """
+    Financial and business inputs of a lead (side table, see Lead).
+    """
+    lead = models.OneToOneField(Lead, on_delete=models.CASCADE, primary_key=True, related_name='financials')
+
+    # Sector Information (for sellers) / Business Information (for buyers)
     shareholders_working_in_business = models.BooleanField(default=False, null=True, blank=True)
     taking_salary = models.BooleanField(default=False, null=True, blank=True)
     salary_adjustment = models.DecimalField(max_digits=15, decimal_places=2, null=True, blank=True)
@@ -58,31 +234,306 @@ class Lead(models.Model):
     depreciation = models.DecimalField(max_digits=15, decimal_places=2, null=True, blank=True)
     amortisation = models.DecimalField(max_digits=15, decimal_places=2, null=True, blank=True)
     net_assets = models.DecimalField(max_digits=15, decimal_places=2, null=True, blank=True)
-    
-    # Contact Information
-    name = models.CharField(max_length=200, null=True, blank=True)
-    email = models.EmailField(null=True, blank=True)
-    phone = models.CharField(max_length=20, null=True, blank=True)
-    company_name = models.CharField(max_length=200, null=True, blank=True)
-    company_number = models.CharField(max_length=50, null=True, blank=True)
-    
-    # Valuation Information (calculated and stored)
+
+    class Meta:
+        db_table = 'lead_financials'
+        verbose_name_plural = 'lead financials'
+
+    def __str__(self):
+        return f"Financials of lead {self.lead_id}"
+
+
+class LeadValuation(models.Model):
+    """
+    Calculated valuation of a completed lead (side table, see Lead).
+    """
+    lead = models.OneToOneField(Lead, on_delete=models.CASCADE, primary_key=True, related_name='valuation')
     valuation_low = models.DecimalField(max_digits=15, decimal_places=2, null=True, blank=True)
     valuation_high = models.DecimalField(max_digits=15, decimal_places=2, null=True, blank=True)
     sde = models.DecimalField(max_digits=15, decimal_places=2, null=True, blank=True)
-    
-    # Session tracking
-    session_id = models.CharField(max_length=100, unique=True, null=True, blank=True, db_index=True)
-    is_complete = models.BooleanField(default=False)
-    
-    # Metadata
-    submitted_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        db_table = 'lead_valuations'
+
+    def __str__(self):
+        return f"Valuation of lead {self.lead_id}: {self.valuation_low} - {self.valuation_high}"
+
+
+def _side_field(accessor, name):
+    def getter(lead):
+        return getattr(lead.side(accessor), name)
+
+    def setter(lead, value):
+        setattr(lead.side(accessor), name, value)
+        lead.__dict__.setdefault('_dirty_sides', set()).add(accessor)
+
+    return property(getter, setter)
+
+
+for _accessor, _model in (('financials', LeadFinancials), ('valuation', LeadValuation)):
+    for _field in _model._meta.concrete_fields:
+        if not _field.primary_key:
+            Lead.SIDE_FIELDS[_field.name] = _accessor
+            setattr(Lead, _field.name, _side_field(_accessor, _field.name))
+
+
+class LeadEmailState(models.Model):
+    """
+    Delivery state of a lead's valuation email. content_hash identifies what was
+    (or is being) sent, so saves that don't change the email send nothing.
+    See api.emails.
+    """
+    lead = models.OneToOneField(Lead, on_delete=models.CASCADE, primary_key=True, related_name='email_state')
+    content_hash = models.CharField(max_length=64)
+    queued_at = models.DateTimeField()
+    sent_at = models.DateTimeField(null=True, blank=True)
+    failed_at = models.DateTimeField(null=True, blank=True)
+    error = models.TextField(blank=True, default='')
+    provider_message_id = models.CharField(max_length=100, blank=True, default='')
+
+    class Meta:
+        db_table = 'lead_email_states'
+
+    def __str__(self):
+        if self.sent_at:
+            return f"Sent {self.sent_at:%Y-%m-%d %H:%M}"
+        if self.failed_at:
+            return f"Failed {self.failed_at:%Y-%m-%d %H:%M}"
+        return f"Queued {self.queued_at:%Y-%m-%d %H:%M}"
+
+
+class LeadDailyRollup(models.Model):
+    """
+    Pre-aggregated lead counts and valuation totals per day, sector and user type.
+    Maintained incrementally by api.rollups in the same transaction as the lead write.
+    """
+    day = models.DateField()
+    company_sector = models.CharField(max_length=100, blank=True, default='')
+    user_type = models.CharField(max_length=20)
+
+    leads_created = models.PositiveIntegerField(default=0)
+    leads_completed = models.PositiveIntegerField(default=0)
+    valuation_low_total = models.DecimalField(max_digits=20, decimal_places=2, default=0)
+    valuation_high_total = models.DecimalField(max_digits=20, decimal_places=2, default=0)
+    sde_total = models.DecimalField(max_digits=20, decimal_places=2, default=0)
+
     updated_at = models.DateTimeField(auto_now=True)
-    
+
     class Meta:
-        ordering = ['-submitted_at']
-        db_table = 'leads'
-    
+        db_table = 'lead_daily_rollups'
+        ordering = ['-day', 'company_sector', 'user_type']
+        constraints = [
+            models.UniqueConstraint(
+                fields=['day', 'company_sector', 'user_type'],
+                name='unique_lead_rollup_key',
+            ),
+        ]
+
     def __str__(self):
-        return f"{self.name} - {self.email} ({self.submitted_at.strftime('%Y-%m-%d')})"
+        return f"{self.day} {self.company_sector or '-'} / {self.user_type}: {self.leads_completed}/{self.leads_created}"
+
+
+class SectorValuationSketch(models.Model):
+    """
+    Serialized quantile sketch of one valuation metric for one sector.
+    See api.sketches for the encoding.
+    """
+    company_sector = models.CharField(max_length=100)
+    metric = models.CharField(
+        max_length=20,
+        choices=[
+            ('valuation_low', 'Valuation Low'),
+            ('valuation_high', 'Valuation High'),
+            ('sde', 'SDE'),
+        ]
+    )
+    count = models.PositiveIntegerField(default=0)
+    data = models.BinaryField()
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        db_table = 'sector_valuation_sketches'
+        constraints = [
+            models.UniqueConstraint(
+                fields=['company_sector', 'metric'],
+                name='unique_sector_sketch_metric',
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.company_sector} {self.metric} ({self.count} values)"
+
+
+class SectorSketchValue(models.Model):
+    """
+    The sketch values of one newly completed lead, waiting to be merged into its
+    sector's SectorValuationSketch rows. Insert-only: completions never touch the
+    shared sketch rows, and merged values are deleted (see api.sketches).
+    """
+    lead = models.ForeignKey(Lead, on_delete=models.CASCADE, related_name='sketch_values')
+    company_sector = models.CharField(max_length=100)
+    valuation_low = models.DecimalField(max_digits=15, decimal_places=2, null=True, blank=True)
+    valuation_high = models.DecimalField(max_digits=15, decimal_places=2, null=True, blank=True)
+    sde = models.DecimalField(max_digits=15, decimal_places=2, null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        db_table = 'sector_sketch_values'
+
+    def __str__(self):
+        return f"{self.company_sector} values of lead {self.lead_id}"
+
+
+class SectorMultiplier(models.Model):
+    """
+    Default valuation multipliers for a sector, applied server-side when the user
+    has not adjusted the industry multipliers. See api.multipliers.
+    """
+    company_sector = models.CharField(max_length=100, unique=True)
+    lower_multiplier = models.DecimalField(max_digits=10, decimal_places=2)
+    upper_multiplier = models.DecimalField(max_digits=10, decimal_places=2)
+    updated_at = models.DateTimeField(auto_now=True)
 
+    class Meta:
+        db_table = 'sector_multipliers'
+        ordering = ['company_sector']
+
+    def __str__(self):
+        return f"{self.company_sector}: {self.lower_multiplier}x - {self.upper_multiplier}x"
+
+
+class PortfolioJob(models.Model):
+    """
+    A batch valuation of an uploaded portfolio CSV, processed outside the web
+    workers by the run_portfolio_jobs command. See api.portfolio.
+    """
+    STATUS_CHOICES = [
+        ('queued', 'Queued'),
+        ('running', 'Running'),
+        ('succeeded', 'Succeeded'),
+        ('failed', 'Failed'),
+    ]
+
+    job_id = models.UUIDField(unique=True, default=uuid.uuid4, editable=False)
+    created_by = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='portfolio_jobs')
+    filename = models.CharField(max_length=255, blank=True, default='')
+    input_csv = models.BinaryField()
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='queued')
+    total_rows = models.PositiveIntegerField(default=0)
+    processed_rows = models.PositiveIntegerField(default=0)
+    failed_rows = models.PositiveIntegerField(default=0)
+    error = models.TextField(blank=True, default='')
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        db_table = 'portfolio_jobs'
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['status', 'created_at'], name='portfolio_job_queue_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.job_id} ({self.status}, {self.processed_rows}/{self.total_rows})"
+
+
+class PortfolioJobResult(models.Model):
+    """
+    Valuation (or validation error) of one row of a portfolio job.
+    """
+    job = models.ForeignKey(PortfolioJob, on_delete=models.CASCADE, related_name='results')
+    row_number = models.PositiveIntegerField()
+    reference = models.CharField(max_length=255, blank=True, default='')
+    valuation_low = models.DecimalField(max_digits=15, decimal_places=2, null=True, blank=True)
+    valuation_high = models.DecimalField(max_digits=15, decimal_places=2, null=True, blank=True)
+    sde = models.DecimalField(max_digits=15, decimal_places=2, null=True, blank=True)
+    lower_multiplier = models.DecimalField(max_digits=10, decimal_places=2, null=True, blank=True)
+    upper_multiplier = models.DecimalField(max_digits=10, decimal_places=2, null=True, blank=True)
+    error = models.TextField(blank=True, default='')
+
+    class Meta:
+        db_table = 'portfolio_job_results'
+        ordering = ['job', 'row_number']
+        constraints = [
+            models.UniqueConstraint(fields=['job', 'row_number'], name='unique_portfolio_job_row'),
+        ]
+
+    def __str__(self):
+        return f"{self.job_id} row {self.row_number}"
+
+
+class BackfillProgress(models.Model):
+    """
+    Checkpoint of a batched data backfill (api.online_schema.RunBackfill), written
+    in the same transaction as each batch so an interrupted run resumes after the
+    last committed primary key.
+    """
+    name = models.CharField(max_length=100, primary_key=True)
+    last_pk = models.BigIntegerField(default=0)
+    rows_updated = models.BigIntegerField(default=0)
+    batches = models.PositiveIntegerField(default=0)
+    started_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        db_table = 'backfill_progress'
+        verbose_name_plural = 'backfill progress'
+
+    def __str__(self):
+        state = f"finished {self.finished_at:%Y-%m-%d %H:%M}" if self.finished_at else f"at pk {self.last_pk}"
+        return f"{self.name}: {self.rows_updated} rows, {state}"
+
+
+class WebhookEndpoint(models.Model):
+    """
+    A downstream system (CRM, analytics) that receives lead events. See api.webhooks.
+
+    Each endpoint reads the WebhookEvent log in id order from last_event_id, in
+    signed batches. The delivery state below is the per-endpoint backoff and
+    circuit breaker; it is only written by the run_webhooks dispatcher.
+    """
+    name = models.CharField(max_length=100, unique=True)
+    url = models.URLField(max_length=500)
+    secret = models.CharField(max_length=200, help_text='HMAC-SHA256 signing key shared with the receiver')
+    is_active = models.BooleanField(default=True)
+
+    # Delivery state
+    last_event_id = models.BigIntegerField(
+        default=0, help_text='Last event delivered. Lower it to replay events that are still stored.'
+    )
+    consecutive_failures = models.PositiveIntegerField(default=0)
+    next_attempt_at = models.DateTimeField(null=True, blank=True)
+    leased_until = models.DateTimeField(null=True, blank=True)
+    last_delivered_at = models.DateTimeField(null=True, blank=True)
+    last_error = models.TextField(blank=True, default='')
+
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        db_table = 'webhook_endpoints'
+        ordering = ['name']
+
+    def __str__(self):
+        return self.name
+
+
+class WebhookEvent(models.Model):
+    """
+    A lead event, recorded in the same transaction as the lead change that caused
+    it and delivered to every active WebhookEndpoint afterwards.
+    """
+    event_type = models.CharField(max_length=50)
+    lead = models.ForeignKey(Lead, on_delete=models.SET_NULL, null=True, blank=True, related_name='webhook_events')
+    payload = models.JSONField(encoder=DjangoJSONEncoder)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        db_table = 'webhook_events'
+        ordering = ['id']
+
+    def __str__(self):
+        return f"{self.id} {self.event_type} (lead {self.lead_id})"
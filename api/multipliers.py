@@ -0,0 +1,113 @@
+"""
+Sector multiplier table.
+
+Defaults come from SECTOR_MULTIPLIERS in api.valuation_config (if defined) and are
+overridden by rows in the SectorMultiplier table. Each worker holds the merged table
+as an immutable snapshot; lookups never hit the database. At most once every
+SECTOR_MULTIPLIER_RELOAD_SECONDS a worker runs one cheap aggregate query to see
+whether the table changed and, if so, swaps in a new snapshot with a new version.
+"""
+import hashlib
+import json
+import threading
+import time
+from decimal import Decimal
+from types import MappingProxyType
+
+from django.conf import settings
+from django.db.models import Count, Max
+
+from api import valuation_config
+from api.models import SectorMultiplier
+
+
+def clamp_multipliers(low, high):
+    """Clamp a (low, high) pair to the configured multiplier bounds."""
+    low = min(max(low, valuation_config.MIN_MULTIPLIER), valuation_config.MAX_MULTIPLIER_LOW)
+    high = min(max(high, valuation_config.MIN_MULTIPLIER), valuation_config.MAX_MULTIPLIER_HIGH)
+    return low, max(low, high)
+
+
+class MultiplierSnapshot:
+    """
+    Immutable view of the sector multiplier table at one version.
+    """
+    __slots__ = ('sectors', 'version', 'body', '_fingerprint')
+
+    def __init__(self, sectors, fingerprint):
+        self.sectors = MappingProxyType(dict(sectors))
+        self._fingerprint = fingerprint
+
+        payload = {
+            'sectors': {
+                sector: {'lower_multiplier': str(low), 'upper_multiplier': str(high)}
+                for sector, (low, high) in sorted(self.sectors.items())
+            },
+            'bounds': {
+                'min_multiplier': str(valuation_config.MIN_MULTIPLIER),
+                'max_multiplier_low': str(valuation_config.MAX_MULTIPLIER_LOW),
+                'max_multiplier_high': str(valuation_config.MAX_MULTIPLIER_HIGH),
+            },
+        }
+        canonical = json.dumps(payload, sort_keys=True, separators=(',', ':'))
+        self.version = hashlib.sha256(canonical.encode()).hexdigest()[:16]
+        payload['version'] = self.version
+        # Pre-rendered once per version so the lookup endpoint never re-serializes
+        self.body = json.dumps(payload, separators=(',', ':')).encode()
+
+    def get(self, sector):
+        return self.sectors.get(sector)
+
+
+class MultiplierTable:
+    """
+    Per-process holder of the current MultiplierSnapshot with versioned hot reload.
+    """
+
+    def __init__(self):
+        self._snapshot = None
+        self._checked_at = None
+        self._lock = threading.Lock()
+
+    @property
+    def reload_seconds(self):
+        return getattr(settings, 'SECTOR_MULTIPLIER_RELOAD_SECONDS', 60)
+
+    def _fingerprint(self):
+        state = SectorMultiplier.objects.aggregate(count=Count('id'), updated=Max('updated_at'))
+        return (state['count'], state['updated'])
+
+    def _load(self, fingerprint):
+        sectors = {}
+        for sector, bounds in getattr(valuation_config, 'SECTOR_MULTIPLIERS', {}).items():
+            sectors[sector] = clamp_multipliers(Decimal(bounds['low']), Decimal(bounds['high']))
+        for row in SectorMultiplier.objects.all():
+            sectors[row.company_sector] = clamp_multipliers(row.lower_multiplier, row.upper_multiplier)
+        return MultiplierSnapshot(sectors, fingerprint)
+
+    def snapshot(self):
+        """Return the current snapshot, reloading it if the table has changed."""
+        now = time.monotonic()
+        if self._snapshot is not None and now - self._checked_at < self.reload_seconds:
+            return self._snapshot
+
+        with self._lock:
+            if self._snapshot is None or time.monotonic() - self._checked_at >= self.reload_seconds:
+                fingerprint = self._fingerprint()
+                if self._snapshot is None or fingerprint != self._snapshot._fingerprint:
+                    self._snapshot = self._load(fingerprint)
+                self._checked_at = time.monotonic()
+        return self._snapshot
+
+    def invalidate(self):
+        """Force the next lookup in this process to re-check the table."""
+        self._checked_at = float('-inf')
+
+    def lookup(self, sector):
+        """Return the (low, high) multipliers for a sector, or None."""
+        if not sector:
+            return None
+        return self.snapshot().get(sector)
+
+
+table = MultiplierTable()
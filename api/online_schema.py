@@ -0,0 +1,292 @@
+"""
+Migration operations for changing large tables (mainly `leads`) without stalling writes.
+
+A plain Django migration runs in one transaction, so an index build or a table-wide
+UPDATE holds its locks until the whole migration commits, and POST/PUT requests
+queue behind it. The operations here keep each lock short:
+
+- AddIndexConcurrently / RemoveIndexConcurrently use CREATE/DROP INDEX CONCURRENTLY
+  on PostgreSQL. Other backends (SQLite) fall back to the plain operation.
+- RunBackfill updates rows in primary-key ranges, one short transaction per batch.
+  Progress is checkpointed in BackfillProgress in the same transaction, so an
+  interrupted run resumes where it stopped. It is throttled: a pause between
+  batches, the batch halved when it runs slow, and on PostgreSQL a lock_timeout
+  so a batch backs off instead of queueing other writers behind it.
+
+Migrations using them must set `atomic = False`; they refuse to run in a transaction.
+
+Expand/contract: change a column over three deploys so old and new code overlap safely.
+
+1. Expand: add the new column as nullable and build its indexes with
+   AddIndexConcurrently. Deploy code that writes both the old and the new column.
+2. Backfill: a RunBackfill migration, or run it ahead of `migrate`, off-peak, with
+   `manage.py run_backfills <name>`.
+3. Contract: once no running code reads the old column, repeat the same RunBackfill
+   (a cheap catch-up from its checkpoint) and then drop or rename columns.
+
+0005-0007 (session_id to UUID) follow this shape by hand.
+"""
+import logging
+import time
+
+from django.conf import settings
+from django.db import NotSupportedError, OperationalError, migrations, transaction
+from django.db.migrations.operations.base import Operation
+from django.db.models import F, Max, Q
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+MAX_RETRIES = 5
+
+
+def _ensure_not_in_transaction(schema_editor, operation):
+    if schema_editor.connection.in_atomic_block:
+        raise NotSupportedError(
+            f"{operation.__class__.__name__} cannot run inside a transaction; "
+            f"set atomic = False on the migration."
+        )
+
+
+def _index_state(schema_editor, name):
+    """Return None if the index doesn't exist, else whether it is valid (PostgreSQL)."""
+    with schema_editor.connection.cursor() as cursor:
+        cursor.execute(
+            'SELECT i.indisvalid FROM pg_index i JOIN pg_class c ON c.oid = i.indexrelid WHERE c.relname = %s',
+            [name],
+        )
+        row = cursor.fetchone()
+    return None if row is None else row[0]
+
+
+class AddIndexConcurrently(migrations.AddIndex):
+    """
+    AddIndex that builds the index with CREATE INDEX CONCURRENTLY on PostgreSQL.
+    """
+
+    def describe(self):
+        return f"Concurrently {super().describe()[0].lower()}{super().describe()[1:]}"
+
+    def database_forwards(self, app_label, schema_editor, from_state, to_state):
+        if schema_editor.connection.vendor != 'postgresql':
+            return super().database_forwards(app_label, schema_editor, from_state, to_state)
+
+        _ensure_not_in_transaction(schema_editor, self)
+        model = to_state.apps.get_model(app_label, self.model_name)
+        if not self.allow_migrate_model(schema_editor.connection.alias, model):
+            return
+
+        valid = _index_state(schema_editor, self.index.name)
+        if valid:
+            # Built by an earlier run that died before the migration was recorded
+            return
+        if valid is False:
+            # A failed concurrent build leaves an INVALID index behind; start over
+            schema_editor.execute(f'DROP INDEX CONCURRENTLY IF EXISTS {schema_editor.quote_name(self.index.name)}')
+        schema_editor.add_index(model, self.index, concurrently=True)
+
+    def database_backwards(self, app_label, schema_editor, from_state, to_state):
+        if schema_editor.connection.vendor != 'postgresql':
+            return super().database_backwards(app_label, schema_editor, from_state, to_state)
+
+        _ensure_not_in_transaction(schema_editor, self)
+        model = from_state.apps.get_model(app_label, self.model_name)
+        if self.allow_migrate_model(schema_editor.connection.alias, model):
+            schema_editor.remove_index(model, self.index, concurrently=True)
+
+
+class RemoveIndexConcurrently(migrations.RemoveIndex):
+    """
+    RemoveIndex that drops the index with DROP INDEX CONCURRENTLY on PostgreSQL.
+    """
+
+    def describe(self):
+        return f"Concurrently {super().describe()[0].lower()}{super().describe()[1:]}"
+
+    def database_forwards(self, app_label, schema_editor, from_state, to_state):
+        if schema_editor.connection.vendor != 'postgresql':
+            return super().database_forwards(app_label, schema_editor, from_state, to_state)
+
+        _ensure_not_in_transaction(schema_editor, self)
+        model = from_state.apps.get_model(app_label, self.model_name)
+        if self.allow_migrate_model(schema_editor.connection.alias, model):
+            index = from_state.models[app_label, self.model_name_lower].get_index_by_name(self.name)
+            schema_editor.remove_index(model, index, concurrently=True)
+
+    def database_backwards(self, app_label, schema_editor, from_state, to_state):
+        if schema_editor.connection.vendor != 'postgresql':
+            return super().database_backwards(app_label, schema_editor, from_state, to_state)
+
+        _ensure_not_in_transaction(schema_editor, self)
+        model = to_state.apps.get_model(app_label, self.model_name)
+        if self.allow_migrate_model(schema_editor.connection.alias, model):
+            index = to_state.models[app_label, self.model_name_lower].get_index_by_name(self.name)
+            schema_editor.add_index(model, index, concurrently=True)
+
+
+class RunBackfill(Operation):
+    """
+    Batched, resumable, throttled data backfill of one model (integer primary key).
+
+    name identifies the checkpoint in BackfillProgress and the run_backfills command.
+    pending (a Q or dict of lookups) selects rows that still need the backfill, so
+    re-runs and catch-ups don't rewrite finished rows. Give one of:
+    values, a dict of field -> expression applied with one UPDATE per batch
+    (e.g. {'new': F('old')}); transform, a function setting the new values on each
+    row in Python, together with the fields it sets; or batch, a function given the
+    queryset of one batch's pending rows that does the work itself (e.g. copies them
+    into another table) and returns the number of rows written. Backfills don't
+    touch auto_now fields such as updated_at. reverse, if given, is called as
+    reverse(apps, schema_editor) on unapply.
+
+    The migration must depend on api 0011_backfill_progress and set atomic = False.
+    """
+    reduces_to_sql = False
+    reversible = True
+
+    def __init__(self, name, model_name, pending=None, values=None, transform=None, fields=None, batch=None,
+                 reverse=None):
+        if sum(option is not None for option in (values, transform, batch)) != 1:
+            raise ValueError("RunBackfill needs exactly one of values, transform or batch")
+        if transform is not None and not fields:
+            raise ValueError("RunBackfill with a transform needs the fields it sets")
+        self.name = name
+        self.model_name = model_name
+        self.pending = pending
+        self.values = values
+        self.transform = transform
+        self.fields = fields
+        self.batch = batch
+        self.reverse = reverse
+
+    def state_forwards(self, app_label, state):
+        pass
+
+    def database_forwards(self, app_label, schema_editor, from_state, to_state):
+        _ensure_not_in_transaction(schema_editor, self)
+        model = from_state.apps.get_model(app_label, self.model_name)
+        if self.allow_migrate_model(schema_editor.connection.alias, model):
+            BackfillRunner(self, from_state.apps, app_label, using=schema_editor.connection.alias).run()
+
+    def database_backwards(self, app_label, schema_editor, from_state, to_state):
+        model = to_state.apps.get_model(app_label, self.model_name)
+        if not self.allow_migrate_model(schema_editor.connection.alias, model):
+            return
+        if self.reverse is not None:
+            self.reverse(to_state.apps, schema_editor)
+        # Re-applying should backfill from the start again
+        progress = to_state.apps.get_model('api', 'BackfillProgress')
+        progress.objects.using(schema_editor.connection.alias).filter(name=self.name).delete()
+
+    def describe(self):
+        return f"Backfill {self.name} on {self.model_name} in batches"
+
+    @property
+    def migration_name_fragment(self):
+        return f'backfill_{self.name}'
+
+
+class BackfillRunner:
+    """
+    Runs a RunBackfill from its checkpoint to the current end of the table.
+    """
+
+    def __init__(self, operation, apps, app_label, using='default', batch_size=None,
+                 sleep_seconds=None, max_seconds=None):
+        self.operation = operation
+        self.model = apps.get_model(app_label, operation.model_name)
+        self.progress_model = apps.get_model('api', 'BackfillProgress')
+        self.using = using
+        self.batch_size = batch_size or getattr(settings, 'ONLINE_SCHEMA_BATCH_SIZE', 1000)
+        if sleep_seconds is None:
+            sleep_seconds = getattr(settings, 'ONLINE_SCHEMA_BATCH_SLEEP_MS', 50) / 1000
+        self.sleep_seconds = sleep_seconds
+        self.max_batch_seconds = getattr(settings, 'ONLINE_SCHEMA_MAX_BATCH_MS', 250) / 1000
+        self.lock_timeout_ms = getattr(settings, 'ONLINE_SCHEMA_LOCK_TIMEOUT_MS', 2000)
+        self.max_seconds = max_seconds
+
+    def run(self):
+        """
+        Backfill batch by batch up to the table's current last row. Returns the
+        number of rows updated by this run; stops early (resumable) after max_seconds.
+        """
+        name = self.operation.name
+        progress = self.progress_model.objects.using(self.using)
+        last_pk = progress.get_or_create(name=name)[0].last_pk
+        size = self.batch_size
+        min_size = max(1, self.batch_size // 16)
+        retries = 0
+        updated = 0
+        started = time.monotonic()
+
+        # Rows inserted after this point are left to the next run (the contract
+        # step's catch-up); chasing them could keep a busy table's run going forever
+        max_pk = self.model._base_manager.using(self.using).aggregate(max_pk=Max('pk'))['max_pk'] or 0
+        while True:
+            if last_pk >= max_pk:
+                progress.filter(name=name).update(finished_at=timezone.now(), updated_at=timezone.now())
+                logger.info("Backfill %s finished at pk %s (%s rows this run)", name, last_pk, updated)
+                return updated
+            if self.max_seconds is not None and time.monotonic() - started > self.max_seconds:
+                logger.info("Backfill %s paused at pk %s (%s rows this run)", name, last_pk, updated)
+                return updated
+
+            upper = min(last_pk + size, max_pk)
+            batch_started = time.monotonic()
+            try:
+                with transaction.atomic(using=self.using):
+                    self._set_lock_timeout()
+                    rows = self._apply(last_pk, upper)
+                    progress.filter(name=name).update(
+                        last_pk=upper,
+                        rows_updated=F('rows_updated') + rows,
+                        batches=F('batches') + 1,
+                        finished_at=None,
+                        updated_at=timezone.now(),
+                    )
+            except OperationalError as e:
+                # Lock timeout (or SQLite busy): give way to the application's writes
+                retries += 1
+                if retries > MAX_RETRIES:
+                    raise
+                size = max(min_size, size // 2)
+                logger.warning(f"Backfill {name} batch after pk {last_pk} failed, retrying with {size} rows: {str(e)}")
+                time.sleep(max(self.sleep_seconds, 0.1) * 2 ** retries)
+                continue
+
+            retries = 0
+            last_pk = upper
+            updated += rows
+            elapsed = time.monotonic() - batch_started
+            if elapsed > self.max_batch_seconds:
+                size = max(min_size, size // 2)
+            elif elapsed < self.max_batch_seconds / 4:
+                size = min(self.batch_size, size * 2)
+            if self.sleep_seconds:
+                time.sleep(self.sleep_seconds)
+
+    def _apply(self, lower, upper):
+        operation = self.operation
+        rows = self.model._base_manager.using(self.using).filter(pk__gt=lower, pk__lte=upper)
+        if operation.pending is not None:
+            pending = operation.pending
+            rows = rows.filter(pending if isinstance(pending, Q) else Q(**pending))
+
+        if operation.values is not None:
+            return rows.update(**operation.values)
+        if operation.batch is not None:
+            return operation.batch(rows)
+
+        batch = list(rows.select_for_update())
+        for row in batch:
+            operation.transform(row)
+        self.model._base_manager.using(self.using).bulk_update(batch, operation.fields)
+        return len(batch)
+
+    def _set_lock_timeout(self):
+        from django.db import connections
+
+        connection = connections[self.using]
+        if connection.vendor == 'postgresql' and self.lock_timeout_ms:
+            with connection.cursor() as cursor:
+                cursor.execute(f"SET LOCAL lock_timeout = '{int(self.lock_timeout_ms)}ms'")
@@ -0,0 +1,207 @@
+"""
+Batch valuation of uploaded portfolios.
+
+The web tier only checks and stores the uploaded CSV as a queued PortfolioJob. The
+run_portfolio_jobs command, running as its own process, claims queued jobs and values
+their rows in chunks on a process pool. Rows go through the same parsing and
+valuation as the quick-estimate endpoint (api.estimates and api.valuation, which
+match calculate_valuation). No Lead rows are written, so no emails are sent and the
+lead rollups are untouched. Results are stored per row and streamed back as CSV.
+"""
+import csv
+import io
+import logging
+import os
+from datetime import timedelta
+from itertools import islice
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+
+from api import estimates
+from api.models import PortfolioJob, PortfolioJobResult
+
+logger = logging.getLogger(__name__)
+
+
+REFERENCE_COLUMNS = ('reference', 'company_name', 'company_number')
+RESULT_COLUMNS = [
+    'row',
+    'reference',
+    'valuation_low',
+    'valuation_high',
+    'sde',
+    'lower_multiplier',
+    'upper_multiplier',
+    'error',
+]
+TRUE_VALUES = {'1', 'true', 'yes', 'y'}
+
+
+class PortfolioFileError(ValueError):
+    """The uploaded file can't be processed as a portfolio."""
+
+
+def check_upload(data):
+    """
+    Validate an uploaded portfolio CSV and return its number of rows.
+
+    Raises PortfolioFileError with a user-facing message.
+    """
+    max_rows = getattr(settings, 'PORTFOLIO_MAX_ROWS', 50000)
+    try:
+        reader = csv.DictReader(io.StringIO(data.decode('utf-8-sig')))
+        columns = [column.strip().lower() for column in reader.fieldnames or []]
+        if 'profit' not in columns:
+            raise PortfolioFileError('The header row must include a profit column.')
+        total = 0
+        for _ in reader:
+            total += 1
+            if total > max_rows:
+                raise PortfolioFileError(f'A portfolio can have at most {max_rows} rows.')
+    except (UnicodeDecodeError, csv.Error) as e:
+        raise PortfolioFileError(f'Not a valid UTF-8 CSV file: {e}')
+    if not total:
+        raise PortfolioFileError('The file has no data rows.')
+    return total
+
+
+def iter_rows(data):
+    """Yield (row_number, row) with normalized column names, starting at 1."""
+    reader = csv.DictReader(io.StringIO(data.decode('utf-8-sig')))
+    for row_number, row in enumerate(reader, start=1):
+        yield row_number, {
+            (key or '').strip().lower(): (value or '').strip()
+            for key, value in row.items()
+            if isinstance(value, str)
+        }
+
+
+def init_worker():
+    """Pool initializer: lower priority so valuation never competes with the web workers."""
+    os.nice(getattr(settings, 'PORTFOLIO_WORKER_NICE', 10))
+
+
+def value_rows(chunk):
+    """
+    Value a chunk of (row_number, row) pairs. Runs in a pool worker.
+
+    Returns (row_number, reference, estimate or None, error) tuples.
+    """
+    results = []
+    for row_number, row in chunk:
+        reference = next((row[column] for column in REFERENCE_COLUMNS if row.get(column)), '')
+        data = dict(row)
+        data['adjust_industry_multipliers'] = row.get('adjust_industry_multipliers', '').lower() in TRUE_VALUES
+        data['property_own_or_rent'] = row.get('property_own_or_rent', '').lower()
+        inputs, errors = estimates.parse_request(data)
+        if errors:
+            error = '; '.join(f'{field}: {message}' for field, message in errors.items())
+            results.append((row_number, reference, None, error))
+        else:
+            results.append((row_number, reference, estimates.estimate(inputs), ''))
+    return results
+
+
+def claim_next():
+    """Atomically move the oldest queued job to running. Returns it, or None."""
+    for pk in PortfolioJob.objects.filter(status='queued').order_by('created_at').values_list('pk', flat=True)[:10]:
+        claimed = PortfolioJob.objects.filter(pk=pk, status='queued').update(
+            status='running',
+            started_at=timezone.now(),
+            updated_at=timezone.now(),
+        )
+        if claimed:
+            return PortfolioJob.objects.get(pk=pk)
+    return None
+
+
+def requeue_stale():
+    """
+    Requeue running jobs with no progress for PORTFOLIO_JOB_STALE_SECONDS,
+    i.e. whose runner died, discarding their partial results.
+    """
+    cutoff = timezone.now() - timedelta(seconds=getattr(settings, 'PORTFOLIO_JOB_STALE_SECONDS', 300))
+    for job in PortfolioJob.objects.filter(status='running', updated_at__lt=cutoff).only('pk', 'job_id'):
+        with transaction.atomic():
+            requeued = PortfolioJob.objects.filter(pk=job.pk, status='running', updated_at__lt=cutoff).update(
+                status='queued',
+                processed_rows=0,
+                failed_rows=0,
+                started_at=None,
+                updated_at=timezone.now(),
+            )
+            if requeued:
+                PortfolioJobResult.objects.filter(job_id=job.pk).delete()
+                logger.warning(f"Requeued stalled portfolio job {job.job_id}")
+
+
+def run_job(job, executor, chunk_size):
+    """Value every row of a claimed job on the executor, recording progress per chunk."""
+    rows = iter_rows(bytes(job.input_csv))
+    chunks = iter(lambda: list(islice(rows, chunk_size)), [])
+
+    try:
+        for results in executor.map(value_rows, chunks):
+            failed = sum(1 for result in results if result[3])
+            with transaction.atomic():
+                PortfolioJobResult.objects.bulk_create([
+                    _result_row(job, row_number, reference, estimate, error)
+                    for row_number, reference, estimate, error in results
+                ])
+                PortfolioJob.objects.filter(pk=job.pk).update(
+                    processed_rows=F('processed_rows') + len(results),
+                    failed_rows=F('failed_rows') + failed,
+                    updated_at=timezone.now(),
+                )
+    except Exception as e:
+        logger.error(f"Portfolio job {job.job_id} failed: {str(e)}", exc_info=True)
+        PortfolioJob.objects.filter(pk=job.pk).update(
+            status='failed',
+            error=str(e),
+            finished_at=timezone.now(),
+            updated_at=timezone.now(),
+        )
+        return
+
+    PortfolioJob.objects.filter(pk=job.pk).update(
+        status='succeeded',
+        finished_at=timezone.now(),
+        updated_at=timezone.now(),
+    )
+    logger.info("Portfolio job %s finished: %s rows", job.job_id, job.total_rows)
+
+
+def _result_row(job, row_number, reference, estimate, error):
+    if estimate is None:
+        return PortfolioJobResult(job=job, row_number=row_number, reference=reference[:255], error=error)
+    return PortfolioJobResult(
+        job=job,
+        row_number=row_number,
+        reference=reference[:255],
+        valuation_low=estimate['valuation_low'],
+        valuation_high=estimate['valuation_high'],
+        sde=estimate['sde'],
+        lower_multiplier=estimate['lower_multiplier'],
+        upper_multiplier=estimate['upper_multiplier'],
+    )
+
+
+class _Echo:
+    """File-like object that returns what is written, for streaming csv.writer output."""
+
+    def write(self, value):
+        return value
+
+
+def stream_results(job):
+    """Yield the job's results as CSV lines, reading them from the database in batches."""
+    writer = csv.writer(_Echo())
+    yield writer.writerow(RESULT_COLUMNS)
+    rows = PortfolioJobResult.objects.filter(job=job).order_by('row_number').values_list(
+        'row_number', *RESULT_COLUMNS[1:]
+    )
+    for row in rows.iterator(chunk_size=2000):
+        yield writer.writerow(['' if value is None else value for value in row])
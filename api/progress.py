@@ -0,0 +1,136 @@
+"""
+Debounced autosave of multi-step form progress.
+
+PATCH requests carry field-level deltas for a session. Deltas are merged per session
+in a per-process buffer and written out at most once per PROGRESS_SAVE_WINDOW_SECONDS
+as a single UPDATE of only the changed columns (plus an upsert of the lead's
+financials row when financial fields changed). No valuation is calculated and no
+email is sent; that only happens on the completing PUT.
+
+Progress is best-effort: the completing PUT carries the full form, so a buffered
+delta lost to a worker crash costs nothing but abandonment data. Flushes only touch
+leads that are not yet complete, so a late flush can never overwrite a completion,
+and they bump version (and updated_at) like any other write, so a PUT based on the
+lead as it was before the flush fails its version check instead of overwriting it.
+A flush that changes company_sector or user_type moves the lead's created count to
+its new daily rollup row in the same transaction; that UPDATE is conditional on the
+version read just before it, and is retried if another write got there first.
+"""
+import copy
+import logging
+import threading
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from api import rollups
+from api.models import Lead
+
+logger = logging.getLogger(__name__)
+
+# Fields of the rollup row key (see rollups.rollup_key) a PATCH can change
+ROLLUP_KEY_FIELDS = frozenset({'company_sector', 'user_type'})
+# Tries at a version-checked progress write that moves the lead to another rollup row
+MAX_WRITE_ATTEMPTS = 3
+
+
+class ProgressBuffer:
+    """
+    Per-process map of session_id -> merged pending field values.
+    """
+
+    def __init__(self):
+        self._pending = {}
+        self._lock = threading.Lock()
+        self._timer = None
+
+    @property
+    def window_seconds(self):
+        return getattr(settings, 'PROGRESS_SAVE_WINDOW_SECONDS', 2.0)
+
+    def add(self, session_id, delta):
+        """Merge a delta into the pending save for a session."""
+        if self.window_seconds <= 0:
+            self._write(session_id, delta)
+            return
+
+        with self._lock:
+            self._pending.setdefault(session_id, {}).update(delta)
+            if self._timer is None:
+                self._timer = threading.Timer(self.window_seconds, self._flush_from_timer)
+                self._timer.daemon = True
+                self._timer.start()
+
+    def discard(self, session_id):
+        """Drop pending progress for a session, e.g. because it is being completed."""
+        with self._lock:
+            self._pending.pop(session_id, None)
+
+    def flush_session(self, session_id):
+        """Write out pending progress for one session now, e.g. before it is read back."""
+        with self._lock:
+            delta = self._pending.pop(session_id, None)
+        if delta:
+            self._write(session_id, delta)
+    
+    def flush(self):
+        """Write out all pending progress now."""
+        with self._lock:
+            pending, self._pending = self._pending, {}
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+
+        for session_id, delta in pending.items():
+            self._write(session_id, delta)
+        return len(pending)
+
+    def _flush_from_timer(self):
+        try:
+            self.flush()
+        finally:
+            # Timer threads get their own DB connection; don't leak it
+            connection.close()
+
+    def _write(self, session_id, delta):
+        now = timezone.now()
+        columns, side_values = Lead.split_fields(delta)
+        leads = Lead.objects.filter(session_id=session_id, is_complete=False)
+        moves_rollup = ROLLUP_KEY_FIELDS.intersection(columns)
+        try:
+            for _ in range(MAX_WRITE_ATTEMPTS):
+                before = None
+                target = leads
+                if moves_rollup:
+                    # The lead moves to another rollup row, so its current key is needed.
+                    # Read it before the transaction and update only that version: no
+                    # row lock, and on SQLite no read lock to upgrade mid-transaction
+                    before = leads.only('id', 'is_complete', 'submitted_at', 'version', *ROLLUP_KEY_FIELDS).first()
+                    if before is None:
+                        updated = 0
+                        break
+                    target = leads.filter(version=before.version)
+                with transaction.atomic():
+                    # Updating the lead first locks it against a concurrent completion
+                    updated = target.update(**columns, progress_saved_at=now, updated_at=now, version=F('version') + 1)
+                    if updated and before is not None:
+                        after = copy.copy(before)
+                        for field in moves_rollup:
+                            setattr(after, field, columns[field])
+                        rollups.record_lead_change(rollups.snapshot(before), rollups.snapshot(after))
+                    if updated and side_values:
+                        lead_id = leads.values_list('id', flat=True).get()
+                        for accessor, values in side_values.items():
+                            Lead.side_model(accessor).objects.update_or_create(lead_id=lead_id, defaults=values)
+                if updated or before is None:
+                    break
+                # Written by another request since we read it; read it again
+            if not updated:
+                logger.info("Progress for session %s dropped: no incomplete lead", session_id)
+        except Exception as e:
+            logger.error(f"Failed to save progress for session {session_id}: {str(e)}", exc_info=True)
+
+
+buffer = ProgressBuffer()
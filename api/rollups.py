@@ -0,0 +1,124 @@
+"""
+Incremental maintenance of the LeadDailyRollup table.
+
+Each lead contributes to exactly one rollup row, keyed by the day it was submitted,
+its sector and its user type. Writers take a snapshot of the lead's contribution
+before and after a change and apply the difference, so the rollup never needs to
+rescan the leads table. Callers are expected to run inside the same transaction as
+the lead write (the views wrap saves in transaction.atomic()).
+"""
+from decimal import Decimal
+
+from django.db import IntegrityError, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from api.models import LeadDailyRollup
+
+
+COUNTER_FIELDS = ('leads_created', 'leads_completed')
+TOTAL_FIELDS = ('valuation_low_total', 'valuation_high_total', 'sde_total')
+
+
+def rollup_key(lead):
+    """Return the rollup row key a lead belongs to."""
+    return (
+        timezone.localtime(lead.submitted_at).date(),
+        lead.company_sector or '',
+        lead.user_type or 'other',
+    )
+
+
+def snapshot(lead):
+    """
+    Capture the contribution of a lead to the rollup table.
+
+    Returns None for leads that have not been saved yet.
+    """
+    if lead is None or lead.pk is None or lead.submitted_at is None:
+        return None
+
+    values = {
+        'leads_created': 1,
+        'leads_completed': 0,
+        'valuation_low_total': Decimal('0'),
+        'valuation_high_total': Decimal('0'),
+        'sde_total': Decimal('0'),
+    }
+    if lead.is_complete:
+        values['leads_completed'] = 1
+        values['valuation_low_total'] = lead.valuation_low or Decimal('0')
+        values['valuation_high_total'] = lead.valuation_high or Decimal('0')
+        values['sde_total'] = lead.sde or Decimal('0')
+
+    return rollup_key(lead), values
+
+
+def record_lead_change(before, after):
+    """
+    Apply the difference between two lead snapshots to the rollup table.
+    """
+    deltas = {}
+    if before is not None:
+        key, values = before
+        delta = deltas.setdefault(key, {})
+        for field, value in values.items():
+            delta[field] = delta.get(field, 0) - value
+    if after is not None:
+        key, values = after
+        delta = deltas.setdefault(key, {})
+        for field, value in values.items():
+            delta[field] = delta.get(field, 0) + value
+
+    for key, delta in deltas.items():
+        _apply_delta(key, delta)
+
+
+def record_created_batch(leads):
+    """
+    Count a batch of newly inserted partial leads, one update per rollup row.
+    Used by bulk inserts, which bypass LeadSerializer.create.
+    """
+    counts = {}
+    for lead in leads:
+        key = rollup_key(lead)
+        counts[key] = counts.get(key, 0) + 1
+    for key, created in counts.items():
+        _apply_delta(key, {'leads_created': created})
+
+
+def _apply_delta(key, delta):
+    """Add a delta to one rollup row, creating the row if needed."""
+    delta = {field: value for field, value in delta.items() if value}
+    if not delta:
+        return
+
+    day, company_sector, user_type = key
+    lookup = {'day': day, 'company_sector': company_sector, 'user_type': user_type}
+    updates = {field: F(field) + value for field, value in delta.items()}
+    updates['updated_at'] = timezone.now()
+
+    if LeadDailyRollup.objects.filter(**lookup).update(**updates):
+        return
+
+    try:
+        with transaction.atomic():
+            LeadDailyRollup.objects.create(**lookup, **delta)
+    except IntegrityError:
+        # Another writer created the row first; fall back to the update
+        LeadDailyRollup.objects.filter(**lookup).update(**updates)
+
+
+def summarize(rows):
+    """
+    Combine rollup rows into totals with a completion rate.
+    """
+    totals = {field: 0 for field in COUNTER_FIELDS}
+    totals.update({field: Decimal('0') for field in TOTAL_FIELDS})
+    for row in rows:
+        for field in COUNTER_FIELDS + TOTAL_FIELDS:
+            totals[field] += row[field]
+
+    created = totals['leads_created']
+    totals['completion_rate'] = round(totals['leads_completed'] / created, 4) if created else None
+    return totals
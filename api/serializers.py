@@ -2,6 +2,8 @@ from rest_framework import serializers
 from decimal import Decimal
 import uuid
 
+from api import rollups, sketches, webhooks
+from api.multipliers import table as sector_multipliers
 from api.utils import calculate_valuation
 from .models import Lead
 
@@ -121,7 +123,11 @@ class LeadSerializer(serializers.ModelSerializer):
                     })
             
             # Validate business/sector fields
-            required_business_fields = ['company_sector', 'property_own_or_rent', 'lower_multiplier', 'upper_multiplier']
+            # Multipliers are only required when the sector table can't supply them
+            required_business_fields = ['company_sector', 'property_own_or_rent']
+            if (combined_data.get('adjust_industry_multipliers')
+                    or sector_multipliers.lookup(combined_data.get('company_sector')) is None):
+                required_business_fields += ['lower_multiplier', 'upper_multiplier']
             for field in required_business_fields:
                 if not combined_data.get(field):
                     raise serializers.ValidationError({
@@ -243,21 +249,36 @@ class LeadSerializer(serializers.ModelSerializer):
             raise serializers.ValidationError("Upper multiplier must be a non-zero positive number.")
         return value
     
+    def build_property_field(self, field_name, model_class):
+        """Side-table fields (see Lead) get the same field a leads column would."""
+        accessor = Lead.SIDE_FIELDS.get(field_name)
+        if accessor is None:
+            return super().build_property_field(field_name, model_class)
+        return self.build_standard_field(field_name, Lead.side_model(accessor)._meta.get_field(field_name))
+    
+    def partial_lead_fields(self, validated_data):
+        """
+        Column values for a new partial lead: the validated data plus a
+        generated unique session ID.
+        """
+        return {**validated_data, 'session_id': uuid.uuid4(), 'is_complete': False}
+    
     def create(self, validated_data):
         """
         Create a new partial lead (contact info only).
         Generates session_id automatically.
         """
-        # Generate unique session ID
-        validated_data['session_id'] = str(uuid.uuid4())
-        validated_data['is_complete'] = False
-        lead = Lead.objects.create(**validated_data)
+        lead = Lead.objects.create(**self.partial_lead_fields(validated_data))
+        rollups.record_lead_change(None, rollups.snapshot(lead))
         return lead
     
     def update(self, instance, validated_data):
         """
         Update existing lead with complete data and calculate valuation.
         """
+        rollup_before = rollups.snapshot(instance)
+        was_complete = instance.is_complete
+
         # Update all fields
         for key, value in validated_data.items():
             setattr(instance, key, value)
@@ -270,7 +291,49 @@ class LeadSerializer(serializers.ModelSerializer):
         instance.valuation_low = valuation_data['low']
         instance.valuation_high = valuation_data['high']
         instance.sde = valuation_data['sde']
+        # Store the multipliers actually applied (sector defaults may replace the submitted ones)
+        instance.lower_multiplier = valuation_data['lower_multiplier']
+        instance.upper_multiplier = valuation_data['upper_multiplier']
         
         # Save once with all data
         instance.save()
+        rollups.record_lead_change(rollup_before, rollups.snapshot(instance))
+        # Delivered later by run_webhooks; recorded here so it commits with the lead
+        webhooks.record_lead_event(instance, 'lead.updated' if was_complete else 'lead.completed')
+        if not was_complete:
+            sketches.record_completion(instance)
         return instance
+
+
+class LeadProgressSerializer(LeadSerializer):
+    """
+    Serializer for autosaved form progress:
+    - Field-level validation only; completeness is checked on the final PUT
+    - session_id cannot be changed
+    """
+    
+    class Meta(LeadSerializer.Meta):
+        fields = [field for field in LeadSerializer.Meta.fields if field != 'session_id'] + ['last_step']
+    
+    def validate(self, data):
+        return data
+
+
+class LeadSyncSerializer(LeadSerializer):
+    """
+    Read-only serializer for the CRM lead sync endpoint:
+    - Adds id, progress and metadata fields
+    - fields=[...] keeps only those fields (sparse fieldsets)
+    """
+    
+    class Meta(LeadSerializer.Meta):
+        fields = ['id'] + LeadSerializer.Meta.fields + [
+            'last_step', 'progress_saved_at', 'submitted_at', 'updated_at', 'version',
+        ]
+        read_only_fields = fields
+    
+    def __init__(self, *args, fields=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        if fields is not None:
+            for name in set(self.fields) - set(fields):
+                self.fields.pop(name)
@@ -0,0 +1,177 @@
+"""
+Session -> lead state cache for the PUT path.
+
+A lead's column values, and those of its side-table rows (or their absence), are
+cached under its session_id when the partial lead is created (POST), so the
+completing PUT can skip the Lead.objects.get() lookup. The entry is dropped once
+the lead is completed.
+
+Stale entries can never cause lost updates: a lead built from the cache carries the
+version it was cached with, and Lead.save() only updates the row if it still has
+that version (see Lead._do_update). If the row changed in the meantime,
+StaleLeadError is raised and the view retries once against a fresh database read.
+
+The backend is the 'lead_sessions' entry in CACHES: local-memory LRU with TTL by
+default, or any shared Django cache backend (file-based, memcached, redis).
+"""
+import logging
+import threading
+import time
+
+from django.core.cache import caches
+from django.db import DEFAULT_DB_ALIAS
+
+from api import db_routers
+from api.models import Lead
+
+logger = logging.getLogger(__name__)
+
+
+CACHE_ALIAS = 'lead_sessions'
+_FIELD_NAMES = [field.attname for field in Lead._meta.concrete_fields]
+_SIDE_FIELD_NAMES = {
+    accessor: [field.attname for field in Lead.side_model(accessor)._meta.concrete_fields]
+    for accessor in Lead.SIDE_TABLES
+}
+
+
+class SessionCacheStats:
+    """
+    Per-process hit/miss counters and an estimate of the database time saved.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.stale = 0
+        self.db_lookups = 0
+        self.db_lookup_seconds = 0.0
+
+    def record_hit(self):
+        with self._lock:
+            self.hits += 1
+
+    def record_miss(self):
+        with self._lock:
+            self.misses += 1
+
+    def record_stale(self):
+        with self._lock:
+            self.stale += 1
+
+    def record_db_lookup(self, seconds):
+        with self._lock:
+            self.db_lookups += 1
+            self.db_lookup_seconds += seconds
+
+    def as_dict(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            avg_lookup = self.db_lookup_seconds / self.db_lookups if self.db_lookups else 0.0
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'stale': self.stale,
+                'hit_rate': round(self.hits / lookups, 4) if lookups else None,
+                'avg_db_lookup_ms': round(avg_lookup * 1000, 3),
+                # Stale hits still needed a DB read, so they don't count as savings
+                'estimated_db_ms_saved': round((self.hits - self.stale) * avg_lookup * 1000, 3),
+            }
+
+
+stats = SessionCacheStats()
+
+
+def _cache():
+    return caches[CACHE_ALIAS]
+
+
+def _key(session_id):
+    return f'lead-session:{session_id}'
+
+
+def _side_values(lead, accessor):
+    """Column values of a side row, or None if the lead has none."""
+    row = lead.side(accessor)
+    if row._state.adding:
+        return None
+    return tuple(getattr(row, name) for name in _SIDE_FIELD_NAMES[accessor])
+
+
+def remember(lead):
+    """Cache a lead's current column values under its session_id."""
+    if not lead.session_id:
+        return
+    try:
+        _cache().set(_key(lead.session_id), (
+            tuple(getattr(lead, name) for name in _FIELD_NAMES),
+            tuple(_side_values(lead, accessor) for accessor in Lead.SIDE_TABLES),
+        ))
+    except Exception as e:
+        logger.warning(f"Failed to cache lead session {lead.session_id}: {str(e)}")
+
+
+def forget(session_id):
+    """Drop a cached session entry."""
+    try:
+        _cache().delete(_key(session_id))
+    except Exception as e:
+        logger.warning(f"Failed to evict lead session {session_id}: {str(e)}")
+
+
+def get_lead(session_id):
+    """
+    Return the lead for a session, from the cache if possible.
+
+    Leads built from the cache are guarded against stale writes by Lead.save().
+
+    Raises:
+        Lead.DoesNotExist: No lead with this session_id
+    """
+    try:
+        values = _cache().get(_key(session_id))
+    except Exception as e:
+        logger.warning(f"Session cache lookup failed for {session_id}: {str(e)}")
+        values = None
+
+    if values is not None and len(values) == 2 and len(values[0]) == len(_FIELD_NAMES):
+        stats.record_hit()
+        columns, side_values = values
+        lead = Lead.from_db(DEFAULT_DB_ALIAS, _FIELD_NAMES, columns)
+        for accessor, row_values in zip(Lead.SIDE_TABLES, side_values):
+            model = Lead.side_model(accessor)
+            if row_values is None:
+                row = model()
+            else:
+                row = model.from_db(DEFAULT_DB_ALIAS, _SIDE_FIELD_NAMES[accessor], row_values)
+            setattr(lead, accessor, row)
+        return lead
+
+    stats.record_miss()
+    return load_lead(session_id)
+
+
+def exists(session_id):
+    """Whether a session has a lead: a cache entry, else an EXISTS query on the primary."""
+    try:
+        if _cache().get(_key(session_id)) is not None:
+            return True
+    except Exception as e:
+        logger.warning(f"Session cache lookup failed for {session_id}: {str(e)}")
+    return Lead.objects.using(db_routers.PRIMARY).filter(session_id=session_id).exists()
+
+
+def load_lead(session_id):
+    """Read a lead from the database, timing the lookup for the saved-time estimate."""
+    started = time.perf_counter()
+    try:
+        # Always the primary, even inside replica_reads(): the POST that created
+        # the lead may have committed moments ago
+        return (
+            Lead.objects.using(db_routers.PRIMARY)
+            .select_related(*Lead.SIDE_TABLES)
+            .get(session_id=session_id)
+        )
+    finally:
+        stats.record_db_lookup(time.perf_counter() - started)
@@ -0,0 +1,106 @@
+"""
+Monte Carlo valuation bands from the predicted figures.
+
+The fixed low/high range uses the actual profit and the two multipliers. Here profit
+is drawn from a triangular distribution between the actual and predicted profit
+(peaking at the actual figure) and the multiplier uniformly between the lower and
+upper multiplier; the other SDE components and net assets are kept as entered.
+Percentiles of the simulated valuations are returned as bands, rounded to £1000
+like the fixed range. Turnover doesn't enter the valuation formula, so
+predicted_turnover is not used.
+
+Draws are vectorized with NumPy under a fixed seed, so identical inputs always give
+identical bands, and results are memoized per process on the integer inputs.
+NumPy is an optional dependency: without it no bands are produced.
+"""
+import importlib.util
+import logging
+from decimal import Decimal
+from functools import lru_cache
+from typing import NamedTuple, Optional
+
+from django.conf import settings
+
+from api import valuation
+
+logger = logging.getLogger(__name__)
+
+
+PERCENTILES = (10, 25, 50, 75, 90)
+
+
+class SimulationInput(NamedTuple):
+    """Everything a simulation depends on; also its cache key."""
+    inputs: valuation.ValuationInput
+    predicted_profit: Optional[int]  # pence
+    draws: int
+    seed: int
+
+
+def available():
+    return importlib.util.find_spec('numpy') is not None
+
+
+def bands_for_lead(lead):
+    """
+    Valuation percentile bands for a valued lead, or None if NumPy is not installed.
+    """
+    if not available():
+        logger.warning("Valuation bands requested but NumPy is not installed")
+        return None
+
+    inputs = valuation.from_values(
+        profit=lead.profit,
+        depreciation=lead.depreciation,
+        amortisation=lead.amortisation,
+        non_recurring_expenses=lead.non_recurring_expenses,
+        interest_receivable=lead.interest_receivable,
+        interest_payable=lead.interest_payable,
+        salary_adjustment=lead.salary_adjustment,
+        property_own_or_rent=lead.property_own_or_rent,
+        property_market_rent_adjustment=lead.property_market_rent_adjustment,
+        net_assets=lead.net_assets,
+        lower_multiplier=lead.lower_multiplier,
+        upper_multiplier=lead.upper_multiplier,
+    )
+    return simulate(SimulationInput(
+        inputs=inputs,
+        predicted_profit=valuation.to_hundredths(lead.predicted_profit) if lead.predicted_profit is not None else None,
+        draws=getattr(settings, 'VALUATION_SIMULATION_DRAWS', 20000),
+        seed=getattr(settings, 'VALUATION_SIMULATION_SEED', 0),
+    ))
+
+
+@lru_cache(maxsize=getattr(settings, 'VALUATION_SIMULATION_CACHE_SIZE', 1024))
+def simulate(params):
+    """Run the simulation for a SimulationInput. Returns {'p10': '...', ..., 'draws', 'seed'}."""
+    import numpy as np
+
+    inputs = params.inputs
+    rng = np.random.default_rng(params.seed)
+
+    actual = inputs.profit / 100
+    predicted = params.predicted_profit / 100 if params.predicted_profit is not None else actual
+    low_profit, high_profit = sorted((actual, predicted))
+    if low_profit < high_profit:
+        profit = rng.triangular(low_profit, actual, high_profit, params.draws)
+    else:
+        profit = np.full(params.draws, actual)
+
+    low_multiplier, high_multiplier = sorted((inputs.lower_multiplier / 100, inputs.upper_multiplier / 100))
+    if low_multiplier < high_multiplier:
+        multiplier = rng.uniform(low_multiplier, high_multiplier, params.draws)
+    else:
+        multiplier = np.full(params.draws, low_multiplier)
+
+    other_sde = (valuation.valuate(inputs).sde - inputs.profit) / 100
+    values = (other_sde + profit) * multiplier + inputs.net_assets / 100
+
+    increment = valuation.ROUNDING_INCREMENT_POUNDS
+    bands = {
+        f'p{percentile}': str(Decimal(int(round(value / increment)) * increment))
+        for percentile, value in zip(PERCENTILES, np.percentile(values, PERCENTILES))
+    }
+    bands['draws'] = params.draws
+    bands['seed'] = params.seed
+    return bands
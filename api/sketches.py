@@ -0,0 +1,272 @@
+"""
+Per-sector valuation percentiles backed by mergeable quantile sketches.
+
+Each (sector, metric) pair keeps a log-bucketed sketch (the DDSketch scheme): a value
+v > 0 falls into bucket ceil(log_gamma(v)), so any reported quantile is within the
+configured relative accuracy of the true value. Sketches merge by adding bucket
+counts, which makes them cheap to update one lead at a time and to rebuild in chunks.
+
+Completing a lead only inserts its values as a SectorSketchValue row, in the same
+transaction, so concurrent completions in one sector never wait on a shared row.
+Queued values are merged into the SectorValuationSketch rows when a worker reloads.
+
+Lookups read precomputed p10/p50/p90 summaries held in memory, so they never touch
+the leads table. Summaries are loaded at worker start (see gunicorn.conf.py) and
+reloaded every VALUATION_SKETCH_RELOAD_SECONDS. A reload merges the queue, then
+reads the sketch table plus any values still queued.
+"""
+import logging
+import math
+import struct
+import threading
+import time
+
+from django.conf import settings
+from django.db import transaction
+
+from api.models import SectorSketchValue, SectorValuationSketch
+
+logger = logging.getLogger(__name__)
+
+
+SKETCH_METRICS = ('valuation_low', 'valuation_high', 'sde')
+PERCENTILES = (10, 50, 90)
+DEFAULT_RELATIVE_ACCURACY = 0.01
+MERGE_BATCH_SIZE = 5000
+
+_HEADER = struct.Struct('<dIII')  # relative accuracy, zero count, positive buckets, negative buckets
+
+
+class QuantileSketch:
+    """
+    Mergeable quantile sketch with bounded relative error.
+    """
+    __slots__ = ('relative_accuracy', '_log_gamma', 'positive', 'negative', 'zero_count', 'count')
+
+    def __init__(self, relative_accuracy=DEFAULT_RELATIVE_ACCURACY):
+        self.relative_accuracy = relative_accuracy
+        self._log_gamma = math.log((1 + relative_accuracy) / (1 - relative_accuracy))
+        self.positive = {}
+        self.negative = {}
+        self.zero_count = 0
+        self.count = 0
+
+    def add(self, value):
+        """Add a single value to the sketch."""
+        value = float(value)
+        if value > 0:
+            index = math.ceil(math.log(value) / self._log_gamma)
+            self.positive[index] = self.positive.get(index, 0) + 1
+        elif value < 0:
+            index = math.ceil(math.log(-value) / self._log_gamma)
+            self.negative[index] = self.negative.get(index, 0) + 1
+        else:
+            self.zero_count += 1
+        self.count += 1
+
+    def merge(self, other):
+        """Add the contents of another sketch with the same accuracy."""
+        if other.relative_accuracy != self.relative_accuracy:
+            raise ValueError('Cannot merge sketches with different relative accuracy')
+        for index, count in other.positive.items():
+            self.positive[index] = self.positive.get(index, 0) + count
+        for index, count in other.negative.items():
+            self.negative[index] = self.negative.get(index, 0) + count
+        self.zero_count += other.zero_count
+        self.count += other.count
+
+    def _bucket_value(self, index):
+        gamma = math.exp(self._log_gamma)
+        return 2 * gamma ** index / (gamma + 1)
+
+    def quantile(self, q):
+        """
+        Return the approximate q-quantile (0 <= q <= 1), or None for an empty sketch.
+        """
+        if not self.count:
+            return None
+
+        rank = q * (self.count - 1)
+        seen = 0
+        # Most negative values first: larger bucket index means larger magnitude
+        for index in sorted(self.negative, reverse=True):
+            seen += self.negative[index]
+            if seen > rank:
+                return -self._bucket_value(index)
+        seen += self.zero_count
+        if seen > rank:
+            return 0.0
+        for index in sorted(self.positive):
+            seen += self.positive[index]
+            if seen > rank:
+                return self._bucket_value(index)
+        return self._bucket_value(max(self.positive)) if self.positive else 0.0
+
+    def to_bytes(self):
+        """Serialize as a fixed header followed by (index, count) pairs."""
+        parts = [_HEADER.pack(self.relative_accuracy, self.zero_count, len(self.positive), len(self.negative))]
+        for buckets in (self.positive, self.negative):
+            indexes = sorted(buckets)
+            parts.append(struct.pack(f'<{len(indexes)}i', *indexes))
+            parts.append(struct.pack(f'<{len(indexes)}I', *(buckets[i] for i in indexes)))
+        return b''.join(parts)
+
+    @classmethod
+    def from_bytes(cls, data):
+        """Deserialize a sketch produced by to_bytes()."""
+        data = bytes(data)
+        relative_accuracy, zero_count, n_positive, n_negative = _HEADER.unpack_from(data)
+        sketch = cls(relative_accuracy)
+        offset = _HEADER.size
+        for buckets, n in ((sketch.positive, n_positive), (sketch.negative, n_negative)):
+            indexes = struct.unpack_from(f'<{n}i', data, offset)
+            offset += 4 * n
+            counts = struct.unpack_from(f'<{n}I', data, offset)
+            offset += 4 * n
+            buckets.update(zip(indexes, counts))
+        sketch.zero_count = zero_count
+        sketch.count = zero_count + sum(sketch.positive.values()) + sum(sketch.negative.values())
+        return sketch
+
+
+def summarize(sketch):
+    """Return {'p10': ..., 'p50': ..., 'p90': ...} rounded to whole pounds."""
+    summary = {}
+    for percentile in PERCENTILES:
+        value = sketch.quantile(percentile / 100)
+        summary[f'p{percentile}'] = round(value) if value is not None else None
+    return summary
+
+
+def _entry(metrics):
+    """Summary of one sector's {metric: sketch}, as served by percentiles()."""
+    entry = {'count': 0}
+    for metric, sketch in metrics.items():
+        entry[metric] = summarize(sketch)
+        entry['count'] = max(entry['count'], sketch.count)
+    return entry
+
+
+class SketchRegistry:
+    """
+    Per-process map of sector -> precomputed percentile summary, and the sketches
+    they were computed from.
+    """
+
+    def __init__(self):
+        self._sketches = {}
+        self._summaries = {}
+        self._loaded_at = None
+        self._lock = threading.Lock()
+
+    @property
+    def reload_seconds(self):
+        return getattr(settings, 'VALUATION_SKETCH_RELOAD_SECONDS', 300)
+
+    def load(self):
+        """Merge queued values, then rebuild all summaries from the sketch table and the queue."""
+        try:
+            merge_pending()
+        except Exception as e:
+            # Another worker may be merging (or, on SQLite, writing); the queue is read below
+            logger.warning(f"Could not merge queued valuation sketch values: {str(e)}")
+
+        sketches = {}
+        for row in SectorValuationSketch.objects.all():
+            sketches.setdefault(row.company_sector, {})[row.metric] = QuantileSketch.from_bytes(row.data)
+        for value in SectorSketchValue.objects.order_by('id').iterator():
+            _add_values(sketches, value.company_sector, value)
+
+        with self._lock:
+            self._sketches = sketches
+            self._summaries = {sector: _entry(metrics) for sector, metrics in sketches.items()}
+            self._loaded_at = time.monotonic()
+        logger.info(f"Loaded valuation sketches for {len(sketches)} sectors")
+
+    def percentiles(self, sector):
+        """Return the summary for a sector, or None if no completed leads are known."""
+        if self._loaded_at is None or time.monotonic() - self._loaded_at > self.reload_seconds:
+            self.load()
+        return self._summaries.get(sector)
+
+    def add(self, sector, values):
+        """Count a completion this worker just committed without waiting for the next reload."""
+        with self._lock:
+            _add_values(self._sketches, sector, values)
+            summaries = dict(self._summaries)
+            summaries[sector] = _entry(self._sketches[sector])
+            self._summaries = summaries
+
+
+registry = SketchRegistry()
+
+
+def _add_values(sketches, sector, values):
+    """Add one lead's metric values (an object or a dict) to a {sector: {metric: sketch}} map."""
+    for metric in SKETCH_METRICS:
+        value = values[metric] if isinstance(values, dict) else getattr(values, metric)
+        if value is not None:
+            sketches.setdefault(sector, {}).setdefault(metric, QuantileSketch()).add(value)
+
+
+def record_completion(lead):
+    """
+    Queue a newly completed lead's values for its sector's sketches.
+
+    Call inside the transaction that completes the lead, like the rollups: the
+    values are inserted with the lead, so a lead is counted if and only if its
+    completion commits. Nothing is locked; merge_pending() folds the queue into
+    the sketch rows later. Sketches only grow, so this must be called once per lead,
+    when it first becomes complete; edits to an already-completed lead are picked up
+    by rebuild_valuation_sketches.
+    """
+    if not lead.company_sector:
+        return
+
+    values = {metric: getattr(lead, metric) for metric in SKETCH_METRICS}
+    if all(value is None for value in values.values()):
+        return
+    SectorSketchValue.objects.create(lead_id=lead.pk, company_sector=lead.company_sector, **values)
+
+    # This worker's summaries only change once the completion has committed
+    transaction.on_commit(lambda: registry.add(lead.company_sector, values))
+
+
+def merge_pending():
+    """
+    Fold queued SectorSketchValue rows into the SectorValuationSketch rows and
+    delete them. Returns the number of values merged.
+
+    Runs on reload, once per worker every VALUATION_SKETCH_RELOAD_SECONDS, so the
+    sketch rows are locked that often rather than on every completion. Workers
+    merging at the same time take disjoint rows of the queue (SKIP LOCKED on
+    PostgreSQL).
+    """
+    merged = 0
+    while True:
+        with transaction.atomic():
+            queued = list(
+                SectorSketchValue.objects.select_for_update(skip_locked=True).order_by('id')[:MERGE_BATCH_SIZE]
+            )
+            if not queued:
+                return merged
+
+            added = {}
+            for value in queued:
+                _add_values(added, value.company_sector, value)
+            for sector, metrics in added.items():
+                for metric, sketch in metrics.items():
+                    row, _ = SectorValuationSketch.objects.select_for_update().get_or_create(
+                        company_sector=sector,
+                        metric=metric,
+                        defaults={'data': QuantileSketch().to_bytes()},
+                    )
+                    stored = QuantileSketch.from_bytes(row.data)
+                    stored.merge(sketch)
+                    row.data = stored.to_bytes()
+                    row.count = stored.count
+                    row.save(update_fields=['data', 'count', 'updated_at'])
+            SectorSketchValue.objects.filter(id__in=[value.id for value in queued]).delete()
+        merged += len(queued)
+        if len(queued) < MERGE_BATCH_SIZE:
+            return merged
@@ -0,0 +1,287 @@
+"""
+Per-request SQL timing, slow-query logging and EXPLAIN capture.
+
+With SLOW_QUERY_ENABLED, SlowQueryMiddleware installs a connection.execute_wrapper
+on every database alias for the duration of each request. Every query is timed and
+added to this worker's summary under its fingerprint: the SQL with literals
+replaced by ? and IN/VALUES lists collapsed, so one statement shape is one entry
+whatever its parameters. Each entry keeps count, total and max time, a quantile
+sketch for p95, and the endpoints (method and URL route) that ran it.
+
+Queries slower than SLOW_QUERY_THRESHOLD_MS are logged with their endpoint. The
+first time a fingerprint is slow (and again after SLOW_QUERY_EXPLAIN_INTERVAL_SECONDS)
+its plan is captured on the same connection, with the same parameters, using the
+backend's EXPLAIN (EXPLAIN QUERY PLAN on SQLite; plain EXPLAIN, which doesn't run
+the statement, on PostgreSQL). Plans are kept per fingerprint without duplicates
+and only a plan not seen before is logged.
+
+A fast query costs two clock reads, a cached fingerprint lookup and a counter
+update; all other work happens only above the threshold. GET /api/metrics/queries/
+(staff only) shows the summary.
+"""
+import hashlib
+import logging
+import re
+import threading
+import time
+from contextlib import ExitStack
+from functools import lru_cache
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections, transaction
+
+from api.sketches import QuantileSketch
+
+logger = logging.getLogger(__name__)
+
+OVERFLOW = '(other statements)'
+MAX_PLANS = 5
+MAX_ENDPOINTS = 10
+EXPLAINABLE = ('SELECT', 'WITH', 'UPDATE', 'DELETE')
+
+_STRING = re.compile(r"'(?:[^']|'')*'")
+_NUMBER = re.compile(r'(?<![\w"])-?\d+(?:\.\d+)?\b')
+_PLACEHOLDERS = re.compile(r'\(\s*(?:%s|\?)(?:\s*,\s*(?:%s|\?))*\s*\)')
+_VALUES_ROWS = re.compile(r'(\(\.\.\.\))(?:\s*,\s*\(\.\.\.\))+')
+_WHITESPACE = re.compile(r'\s+')
+
+_local = threading.local()
+
+
+def enabled():
+    return getattr(settings, 'SLOW_QUERY_ENABLED', False)
+
+
+@lru_cache(maxsize=2048)
+def fingerprint(sql):
+    """Statement shape: literals as ?, placeholder lists as (...), one line."""
+    sql = _STRING.sub('?', sql)
+    sql = _NUMBER.sub('?', sql)
+    sql = _PLACEHOLDERS.sub('(...)', sql)
+    sql = _VALUES_ROWS.sub(r'\1', sql)
+    return _WHITESPACE.sub(' ', sql).strip()
+
+
+class StatementStats:
+    __slots__ = ('count', 'total', 'max', 'slow', 'sketch', 'endpoints', 'plans', 'explained_at')
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.slow = 0
+        self.sketch = QuantileSketch(relative_accuracy=0.02)
+        self.endpoints = {}
+        self.plans = []
+        self.explained_at = None
+
+
+class QueryStats:
+    """
+    Per-process summary by statement fingerprint and by endpoint. At most
+    SLOW_QUERY_MAX_FINGERPRINTS statements are tracked; later ones are pooled
+    under OVERFLOW.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.statements = {}
+        self.endpoints = {}
+
+    def record(self, statement, endpoint, seconds, slow):
+        with self._lock:
+            stats = self.statements.get(statement)
+            if stats is None:
+                if len(self.statements) >= getattr(settings, 'SLOW_QUERY_MAX_FINGERPRINTS', 500):
+                    statement = OVERFLOW
+                stats = self.statements.setdefault(statement, StatementStats())
+            stats.count += 1
+            stats.total += seconds
+            stats.max = max(stats.max, seconds)
+            stats.sketch.add(seconds)
+            if endpoint in stats.endpoints or len(stats.endpoints) < MAX_ENDPOINTS:
+                stats.endpoints[endpoint] = stats.endpoints.get(endpoint, 0) + 1
+            if slow:
+                stats.slow += 1
+
+    def record_request(self, endpoint, queries, seconds):
+        with self._lock:
+            stats = self.endpoints.setdefault(endpoint, {'requests': 0, 'queries': 0, 'total': 0.0, 'max': 0.0})
+            stats['requests'] += 1
+            stats['queries'] += queries
+            stats['total'] += seconds
+            stats['max'] = max(stats['max'], seconds)
+
+    def explain_due(self, statement):
+        """Claim the next EXPLAIN of a statement; False if one was taken recently."""
+        interval = getattr(settings, 'SLOW_QUERY_EXPLAIN_INTERVAL_SECONDS', 3600)
+        now = time.monotonic()
+        with self._lock:
+            stats = self.statements.get(statement)
+            if stats is None or (stats.explained_at is not None and now - stats.explained_at < interval):
+                return False
+            stats.explained_at = now
+            return True
+
+    def add_plan(self, statement, plan):
+        """Keep a plan for a statement; returns False if it was already known."""
+        with self._lock:
+            stats = self.statements.get(statement)
+            if stats is None or plan in stats.plans:
+                return False
+            if len(stats.plans) >= MAX_PLANS:
+                stats.plans.pop(0)
+            stats.plans.append(plan)
+            return True
+
+    def as_dict(self, limit, order_by='total'):
+        with self._lock:
+            statements = sorted(
+                self.statements.items(), key=lambda item: getattr(item[1], order_by), reverse=True,
+            )[:limit]
+            return {
+                'threshold_ms': getattr(settings, 'SLOW_QUERY_THRESHOLD_MS', 100),
+                'statements': [
+                    {
+                        'id': hashlib.sha1(statement.encode()).hexdigest()[:12],
+                        'statement': statement,
+                        'count': stats.count,
+                        'slow': stats.slow,
+                        'total_ms': round(stats.total * 1000, 2),
+                        'avg_ms': round(stats.total / stats.count * 1000, 3),
+                        'p95_ms': round(stats.sketch.quantile(0.95) * 1000, 3),
+                        'max_ms': round(stats.max * 1000, 3),
+                        'endpoints': dict(sorted(stats.endpoints.items(), key=lambda item: -item[1])),
+                        'plans': list(stats.plans),
+                    }
+                    for statement, stats in statements
+                ],
+                'endpoints': {
+                    endpoint: {
+                        'requests': stats['requests'],
+                        'avg_queries': round(stats['queries'] / stats['requests'], 2),
+                        'avg_db_ms': round(stats['total'] / stats['requests'] * 1000, 3),
+                        'max_db_ms': round(stats['max'] * 1000, 3),
+                    }
+                    for endpoint, stats in sorted(self.endpoints.items(), key=lambda item: -item[1]['total'])
+                },
+            }
+
+    def reset(self):
+        with self._lock:
+            self.statements.clear()
+            self.endpoints.clear()
+
+
+stats = QueryStats()
+
+
+def explain(connection, sql, params):
+    """The backend's plan for a statement as text, or None if it can't be explained."""
+    if not sql.lstrip()[:6].upper().startswith(EXPLAINABLE):
+        return None
+    prefix = connection.ops.explain_query_prefix()
+    try:
+        # A savepoint, so a failed EXPLAIN can't abort the request's transaction (PostgreSQL)
+        with transaction.atomic(using=connection.alias), connection.cursor() as cursor:
+            cursor.execute(f'{prefix} {sql}', params)
+            rows = cursor.fetchall()
+    except Exception as e:
+        logger.debug("Could not EXPLAIN query: %s", e)
+        return None
+
+    if connection.vendor == 'sqlite':
+        # (id, parent, notused, detail) rows; indent children under their parent
+        depth = {0: -1}
+        lines = []
+        for node, parent, _, detail in rows:
+            depth[node] = depth.get(parent, -1) + 1
+            lines.append('  ' * depth[node] + detail)
+        return '\n'.join(lines)
+    return '\n'.join(' '.join(str(column) for column in row) for row in rows)
+
+
+class QueryTimer:
+    """execute_wrapper for one request: times each query and records it."""
+
+    def __init__(self, request):
+        self.request = request
+        self.threshold = getattr(settings, 'SLOW_QUERY_THRESHOLD_MS', 100) / 1000
+        self.queries = 0
+        self.seconds = 0.0
+        self._endpoint = None
+
+    @property
+    def endpoint(self):
+        if self._endpoint is None:
+            match = getattr(self.request, 'resolver_match', None)
+            if match is None:
+                # Middleware queries before URL resolution; not cached
+                return f'{self.request.method} (unresolved)'
+            self._endpoint = f'{self.request.method} /{match.route}'
+        return self._endpoint
+
+    def __call__(self, execute, sql, params, many, context):
+        if getattr(_local, 'explaining', False):
+            return execute(sql, params, many, context)
+
+        started = time.perf_counter()
+        succeeded = False
+        try:
+            result = execute(sql, params, many, context)
+            succeeded = True
+            return result
+        finally:
+            elapsed = time.perf_counter() - started
+            self.queries += 1
+            self.seconds += elapsed
+            statement = fingerprint(sql)
+            slow = elapsed >= self.threshold
+            stats.record(statement, self.endpoint, elapsed, slow)
+            if slow:
+                self._slow(context['connection'], statement, sql, params, many, elapsed, succeeded)
+
+    def _slow(self, connection, statement, sql, params, many, elapsed, succeeded):
+        plan = None
+        if (
+            succeeded
+            and not many
+            and getattr(settings, 'SLOW_QUERY_EXPLAIN', True)
+            and not connection.needs_rollback
+            and stats.explain_due(statement)
+        ):
+            _local.explaining = True
+            try:
+                plan = explain(connection, sql, params)
+            finally:
+                _local.explaining = False
+            if plan is not None and not stats.add_plan(statement, plan):
+                plan = None
+
+        message = f"Slow query {elapsed * 1000:.1f} ms on {self.endpoint}: {sql[:2000]}"
+        if plan is not None:
+            message += f"\nPlan:\n{plan}"
+        logger.warning(message)
+
+
+class SlowQueryMiddleware:
+    """
+    Times the queries of each request on all database aliases. Removed from the
+    stack when SLOW_QUERY_ENABLED is off.
+    """
+
+    def __init__(self, get_response):
+        if not enabled():
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request):
+        timer = QueryTimer(request)
+        with ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(timer))
+            response = self.get_response(request)
+        if timer.queries:
+            stats.record_request(timer.endpoint, timer.queries, timer.seconds)
+        return response
@@ -0,0 +1,134 @@
+"""
+Non-blocking, structured logging for request paths.
+
+NonBlockingStreamHandler is a QueueHandler: the request thread only runs the
+handler's filters (e.g. SuccessSampler) and puts the record on a queue. A
+QueueListener thread does the rest: message formatting, PII redaction, JSON
+encoding and the actual write. Log calls should pass arguments lazily
+(logger.info("... %s", value)) so nothing is formatted in the request thread
+when a record is sampled out.
+
+Referenced from LOGGING in settings.py and from logconfig_dict in gunicorn.conf.py.
+"""
+import atexit
+import json
+import logging
+import os
+import queue
+import random
+import re
+from logging.handlers import QueueHandler, QueueListener
+
+
+EMAIL_RE = re.compile(r'\b([A-Za-z0-9._%+-])[A-Za-z0-9._%+-]*@([A-Za-z0-9.-]+\.[A-Za-z]{2,})\b')
+# International (+44 ...) or national (0...) numbers; no hyphens, so UUIDs never match
+PHONE_RE = re.compile(r'(?<![\w-])(?:\+\d{1,3}|0)[\d ()]{8,}\d(?![\w-])')
+
+# LogRecord attributes that are not "extra" context
+_RECORD_ATTRS = set(vars(logging.LogRecord('', 0, '', 0, '', None, None))) | {'message', 'asctime'}
+
+
+def redact(text):
+    """Mask email addresses (keeping the first letter and domain) and phone numbers."""
+    text = EMAIL_RE.sub(r'\1***@\2', text)
+    return PHONE_RE.sub('[phone]', text)
+
+
+class RedactPIIFilter(logging.Filter):
+    """
+    Resolve the message and mask PII in it. Runs in the listener thread.
+    """
+
+    def filter(self, record):
+        record.msg = redact(record.getMessage())
+        record.args = None
+        return True
+
+
+class SuccessSampler(logging.Filter):
+    """
+    Keep a fraction `rate` of routine records; always keep warnings and errors,
+    and access log lines for 4xx/5xx responses.
+    """
+
+    def __init__(self, rate=1.0):
+        super().__init__()
+        self.rate = float(rate)
+
+    def filter(self, record):
+        if self.rate >= 1 or record.levelno >= logging.WARNING:
+            return True
+        if isinstance(record.args, dict) and str(record.args.get('s', '')).startswith(('4', '5')):
+            # gunicorn.access record; 's' is the response status
+            return True
+        return random.random() < self.rate
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line, including any `extra` fields."""
+
+    def format(self, record):
+        entry = {
+            'time': self.formatTime(record, '%Y-%m-%dT%H:%M:%S'),
+            'level': record.levelname,
+            'logger': record.name,
+            'message': record.getMessage(),
+        }
+        for key, value in vars(record).items():
+            if key not in _RECORD_ATTRS:
+                entry[key] = value
+        if record.exc_info:
+            entry['exception'] = redact(self.formatException(record.exc_info))
+        return json.dumps(entry, default=str)
+
+
+class NonBlockingStreamHandler(QueueHandler):
+    """
+    Hand records to a background thread that formats and writes them to `stream`
+    (stderr by default).
+
+    The queue is bounded: when it is full, records below WARNING are dropped
+    rather than blocking the request; warnings and errors wait for space.
+    """
+
+    def __init__(self, stream=None, maxsize=10000, redact_pii=True):
+        super().__init__(queue.Queue(maxsize))
+        self.target = logging.StreamHandler(stream)
+        if redact_pii:
+            self.target.addFilter(RedactPIIFilter())
+        self.dropped = 0
+        self.listener = None
+        self._pid = None
+        atexit.register(self.stop)
+
+    def setFormatter(self, fmt):
+        # Formatting happens in the listener thread
+        self.target.setFormatter(fmt)
+
+    def prepare(self, record):
+        # Unlike QueueHandler.prepare, don't format here; the record never leaves the process
+        return record
+
+    def enqueue(self, record):
+        if self._pid != os.getpid():
+            self._start()
+        if record.levelno >= logging.WARNING:
+            self.queue.put(record)
+            return
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+    def stop(self):
+        """Drain the queue and stop the listener thread."""
+        if self.listener is not None and self._pid == os.getpid():
+            self.listener.stop()
+            self.listener = None
+
+    def _start(self):
+        # Threads don't survive fork (e.g. gunicorn master -> worker): start one per process
+        self.queue = queue.Queue(self.queue.maxsize)
+        self.listener = QueueListener(self.queue, self.target)
+        self.listener.start()
+        self._pid = os.getpid()
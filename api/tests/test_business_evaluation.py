@@ -0,0 +1,79 @@
+from unittest import mock
+
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+
+from api.management.commands.bench_sqlite_writes import CONTACT, FORM
+from api.models import Lead, LeadDailyRollup
+
+
+class BusinessEvaluationPutTests(TestCase):
+
+    def _create_lead(self):
+        response = self.client.post(
+            '/api/business-evaluation/', data={**CONTACT, 'purpose': 'Business Sale'},
+            content_type='application/json',
+        )
+        self.assertEqual(response.status_code, 201, response.content)
+        return response.json()['session_id']
+
+    def _put(self, session_id, data):
+        return self.client.put(f'/api/business-evaluation/{session_id}/', data=data, content_type='application/json')
+
+    def test_put_without_financials(self):
+        # No financial fields: validation is skipped and there are no multipliers to clamp
+        session_id = self._create_lead()
+        response = self._put(session_id, {'company_sector': 'Retail'})
+        self.assertEqual(response.status_code, 200, response.content)
+        lead = Lead.objects.get(session_id=session_id)
+        self.assertIsNone(lead.lower_multiplier)
+        self.assertIsNone(lead.upper_multiplier)
+
+    def test_client_multipliers_are_clamped(self):
+        session_id = self._create_lead()
+        response = self._put(session_id, {**FORM, 'lower_multiplier': '10', 'upper_multiplier': '20'})
+        self.assertEqual(response.status_code, 200, response.content)
+        lead = Lead.objects.get(session_id=session_id)
+        self.assertEqual((lead.lower_multiplier, lead.upper_multiplier), (6, 7))
+
+    def test_failed_bands_still_return_the_saved_valuation(self):
+        session_id = self._create_lead()
+        with mock.patch('api.simulation.bands_for_lead', side_effect=MemoryError):
+            response = self.client.put(
+                f'/api/business-evaluation/{session_id}/?bands=1', data=FORM, content_type='application/json',
+            )
+        self.assertEqual(response.status_code, 200, response.content)
+        self.assertIsNone(response.json()['valuation_bands'])
+        lead = Lead.objects.get(session_id=session_id)
+        self.assertEqual(response.json()['valuation']['valuation_low'], str(lead.valuation_low))
+
+
+@override_settings(PROGRESS_SAVE_WINDOW_SECONDS=0)
+class BusinessEvaluationPatchTests(TestCase):
+
+    def setUp(self):
+        response = self.client.post(
+            '/api/business-evaluation/', data={**CONTACT, 'purpose': 'Business Sale', 'company_sector': 'Retail'},
+            content_type='application/json',
+        )
+        self.session_id = response.json()['session_id']
+        self.url = f'/api/business-evaluation/{self.session_id}/'
+
+    def _rollups(self):
+        return dict(LeadDailyRollup.objects.filter(leads_created__gt=0).values_list('company_sector', 'leads_created'))
+
+    def test_sector_change_moves_created_count(self):
+        self.assertEqual(self._rollups(), {'Retail': 1})
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.patch(self.url, data={'company_sector': 'Technology'}, content_type='application/json')
+        self.assertEqual(response.status_code, 202, response.content)
+        self.assertEqual(self._rollups(), {'Technology': 1})
+        self.assertEqual(Lead.objects.get(session_id=self.session_id).company_sector, 'Technology')
+        # One read of the lead's rollup key, with nothing deferred that the snapshot reloads
+        lead_reads = [query for query in queries if query['sql'].startswith('SELECT') and 'FROM "leads"' in query['sql']]
+        self.assertEqual(len(lead_reads), 1, lead_reads)
+
+    def test_patch_without_session_id(self):
+        response = self.client.patch('/api/business-evaluation/', data={'company_sector': 'Technology'}, content_type='application/json')
+        self.assertEqual(response.status_code, 405, response.content)
@@ -0,0 +1,154 @@
+import threading
+from decimal import Decimal
+from unittest import mock
+
+from django.db import connection
+from django.db.models import F
+from django.test import Client, TransactionTestCase, override_settings
+
+from api import session_cache
+from api.management.commands.bench_sqlite_writes import CONTACT, FORM
+from api.models import Lead
+
+
+class Incrementer(threading.Thread):
+    """
+    Read-modify-write one lead's turnover through GET and PUT until `target` PUTs
+    succeed, sending If-Match and retrying on 409/412.
+    """
+
+    def __init__(self, url, target):
+        super().__init__(daemon=True)
+        self.url = url
+        self.target = target
+        self.succeeded = 0
+        self.responses = []
+        self.error = None
+
+    def run(self):
+        client = Client()
+        try:
+            while self.succeeded < self.target:
+                response = client.get(self.url)
+                turnover = Decimal(response.json()['data']['turnover'] or 0)
+                response = client.put(
+                    self.url, data={**FORM, 'turnover': str(turnover + 1)},
+                    content_type='application/json', HTTP_IF_MATCH=response['ETag'],
+                )
+                self.responses.append(response)
+                if response.status_code == 200:
+                    self.succeeded += 1
+        except Exception as e:
+            self.error = e
+        finally:
+            connection.close()
+
+
+class Autosaver(threading.Thread):
+    """PATCH progress for a session until stopped."""
+
+    def __init__(self, url, stop):
+        super().__init__(daemon=True)
+        self.url = url
+        self.stop = stop
+        self.statuses = []
+
+    def run(self):
+        client = Client()
+        try:
+            step = 0
+            while not self.stop.is_set():
+                step += 1
+                response = client.patch(self.url, data={'last_step': step % 5}, content_type='application/json')
+                self.statuses.append(response.status_code)
+        finally:
+            connection.close()
+
+
+@override_settings(PROGRESS_SAVE_WINDOW_SECONDS=0)
+class LeadConcurrencyTests(TransactionTestCase):
+    """
+    Lead.save() is a compare-and-swap on version (Lead._do_update); a PUT that
+    loses a race gets 409 or 412 and must never overwrite the winner's write.
+    """
+
+    def setUp(self):
+        self.client = Client()
+        response = self.client.post(
+            '/api/business-evaluation/', data={**CONTACT, 'purpose': 'Business Sale'},
+            content_type='application/json',
+        )
+        self.session_id = response.json()['session_id']
+        self.url = f'/api/business-evaluation/{self.session_id}/'
+
+    def _put(self, data, **headers):
+        return self.client.put(self.url, data=data, content_type='application/json', **headers)
+
+    def _turnover(self):
+        return Lead.objects.select_related('financials').get(session_id=self.session_id).turnover
+
+    def assertConflictResponse(self, response, code):
+        """409 and 412 carry the lead's current fields and ETag so the client can retry."""
+        self.assertEqual(response.status_code, code, response.content)
+        version = Lead.objects.filter(session_id=self.session_id).values_list('version', flat=True).get()
+        self.assertEqual(response['ETag'], f'"v{version}"')
+        self.assertEqual(Decimal(response.json()['data']['turnover']), self._turnover())
+
+    def test_concurrent_puts_and_patches_lose_no_updates(self):
+        stop = threading.Event()
+        autosaver = Autosaver(self.url, stop)
+        incrementers = [Incrementer(self.url, 5) for _ in range(4)]
+        autosaver.start()
+        for thread in incrementers:
+            thread.start()
+        for thread in incrementers:
+            thread.join(60)
+        stop.set()
+        autosaver.join(60)
+
+        for thread in incrementers:
+            self.assertIsNone(thread.error)
+            for response in thread.responses:
+                self.assertIn(response.status_code, (200, 409, 412), response.content)
+                if response.status_code != 200:
+                    self.assertIn('data', response.json())
+        self.assertTrue(autosaver.statuses)
+        self.assertEqual(set(autosaver.statuses), {202})
+        # Every successful increment is in the final value: none overwrote another
+        self.assertEqual(self._turnover(), sum(thread.succeeded for thread in incrementers))
+
+    def test_stale_if_match_gets_412(self):
+        etag = self._put({**FORM, 'turnover': '1'})['ETag']
+        self.assertEqual(self._put({**FORM, 'turnover': '2'}, HTTP_IF_MATCH=etag).status_code, 200)
+
+        response = self._put({**FORM, 'turnover': '3'}, HTTP_IF_MATCH=etag)
+        self.assertConflictResponse(response, 412)
+        self.assertEqual(self._turnover(), 2)
+
+    def test_write_between_read_and_save_gets_409(self):
+        self._put({**FORM, 'turnover': '1'})
+        leads = Lead.objects.filter(session_id=self.session_id)
+        load_lead = session_cache.load_lead
+        reads = []
+
+        def load_then_write(session_id):
+            # Another request writes the lead right after each of this PUT's two reads
+            # (the lookup and the retry after StaleLeadError); the 409 body reads it once more
+            lead = load_lead(session_id)
+            if len(reads) < 2:
+                leads.update(version=F('version') + 1)
+            reads.append(lead)
+            return lead
+
+        with mock.patch.object(session_cache, 'load_lead', load_then_write):
+            response = self._put({**FORM, 'turnover': '2'})
+        self.assertEqual(len(reads), 3)
+        self.assertConflictResponse(response, 409)
+        self.assertEqual(self._turnover(), 1)
+
+    def test_stale_cached_lead_is_retried(self):
+        # A write the session cache hasn't seen: the PUT must re-read and succeed
+        Lead.objects.filter(session_id=self.session_id).update(version=F('version') + 1)
+        response = self._put({**FORM, 'turnover': '7'})
+        self.assertEqual(response.status_code, 200, response.content)
+        self.assertEqual(self._turnover(), 7)
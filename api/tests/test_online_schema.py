@@ -0,0 +1,84 @@
+import threading
+
+from django.apps import apps
+from django.db import connection
+from django.db.models import F
+from django.test import Client, TransactionTestCase, override_settings
+
+from api.management.commands.bench_sqlite_writes import CONTACT
+from api.models import BackfillProgress, Lead
+from api.online_schema import BackfillRunner, RunBackfill
+
+
+BACKFILL = RunBackfill(
+    name='test_progress_saved_at',
+    model_name='lead',
+    pending={'progress_saved_at__isnull': True},
+    values={'progress_saved_at': F('updated_at')},
+)
+
+
+class Writer(threading.Thread):
+    """POST a lead and PATCH its progress, over and over, until stopped."""
+
+    def __init__(self):
+        super().__init__(daemon=True)
+        self.stopping = threading.Event()
+        self.statuses = []
+        self.error = None
+
+    def run(self):
+        client = Client()
+        try:
+            while not self.stopping.is_set():
+                response = client.post(
+                    '/api/business-evaluation/', data={**CONTACT, 'purpose': 'Business Sale'},
+                    content_type='application/json',
+                )
+                self.statuses.append(response.status_code)
+                if response.status_code != 201:
+                    continue
+                response = client.patch(
+                    f"/api/business-evaluation/{response.json()['session_id']}/",
+                    data={'company_sector': 'Retail', 'last_step': 2}, content_type='application/json',
+                )
+                self.statuses.append(response.status_code)
+        except Exception as e:
+            self.error = e
+        finally:
+            connection.close()
+
+
+@override_settings(PROGRESS_SAVE_WINDOW_SECONDS=0)
+class BatchedBackfillTests(TransactionTestCase):
+
+    rows = 2000
+
+    def setUp(self):
+        Lead.objects.bulk_create(
+            Lead(purpose='Business Sale', company_sector='Technology', **CONTACT) for _ in range(self.rows)
+        )
+
+    def test_writes_keep_flowing_during_backfill(self):
+        seeded = list(Lead.objects.values_list('id', flat=True))
+        writer = Writer()
+        writer.start()
+        try:
+            BackfillRunner(BACKFILL, apps, 'api', batch_size=100, sleep_seconds=0.005).run()
+            writes_during_backfill = len(writer.statuses)
+        finally:
+            writer.stopping.set()
+            writer.join(60)
+
+        self.assertIsNone(writer.error)
+        self.assertGreater(writes_during_backfill, 0)
+        self.assertEqual(set(writer.statuses) - {201, 202}, set())
+        # Every row present when it started was backfilled, and the run was recorded as finished
+        self.assertFalse(Lead.objects.filter(id__in=seeded, progress_saved_at__isnull=True).exists())
+        progress = BackfillProgress.objects.get(name=BACKFILL.name)
+        self.assertIsNotNone(progress.finished_at)
+        self.assertGreaterEqual(progress.last_pk, max(seeded))
+        self.assertGreater(progress.batches, 1)
+        # And the writes themselves landed
+        self.assertEqual(Lead.objects.count(), self.rows + writer.statuses.count(201))
+        self.assertEqual(Lead.objects.filter(company_sector='Retail').count(), writer.statuses.count(202))
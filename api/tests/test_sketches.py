@@ -0,0 +1,78 @@
+from io import StringIO
+from unittest import mock
+
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+
+from api import sketches
+from api.management.commands.bench_sqlite_writes import CONTACT, FORM
+from api.models import SectorSketchValue, SectorValuationSketch
+
+
+class SectorSketchTests(TestCase):
+
+    def setUp(self):
+        sketches.registry = sketches.SketchRegistry()
+
+    def _complete(self, sector='Technology', **fields):
+        session_id = self.client.post(
+            '/api/business-evaluation/', data={**CONTACT, 'purpose': 'Business Sale'},
+            content_type='application/json',
+        ).json()['session_id']
+        with self.captureOnCommitCallbacks(execute=True), CaptureQueriesContext(connection) as queries:
+            response = self.client.put(
+                f'/api/business-evaluation/{session_id}/', data={**FORM, 'company_sector': sector, **fields},
+                content_type='application/json',
+            )
+        self.assertEqual(response.status_code, 200, response.content)
+        return queries
+
+    def _percentiles(self, sector='Technology'):
+        return self.client.get(f'/api/sectors/{sector}/valuation-percentiles/').json()
+
+    def test_completion_only_queues_its_values(self):
+        queries = self._complete()
+        self.assertEqual(SectorSketchValue.objects.count(), 1)
+        self.assertFalse(SectorValuationSketch.objects.exists())
+        sketch_writes = [query['sql'] for query in queries if 'sector_valuation_sketches' in query['sql']]
+        self.assertEqual(sketch_writes, [])
+
+    def test_reload_merges_the_queue(self):
+        for profit in ('100000.00', '150000.00', '200000.00'):
+            self._complete(profit=profit)
+        sketches.registry.load()
+
+        self.assertFalse(SectorSketchValue.objects.exists())
+        self.assertEqual(
+            dict(SectorValuationSketch.objects.values_list('metric', 'count')),
+            {'valuation_low': 3, 'valuation_high': 3, 'sde': 3},
+        )
+        self.assertEqual(self._percentiles()['count'], 3)
+        # Merging again adds nothing
+        sketches.registry.load()
+        self.assertEqual(self._percentiles()['count'], 3)
+
+    def test_completing_worker_sees_its_completion_at_once(self):
+        sketches.registry.load()
+        self._complete(sector='Retail')
+        self.assertEqual(self._percentiles('Retail')['count'], 1)
+
+    def test_queued_values_count_when_merging_is_not_possible(self):
+        self._complete()
+        with mock.patch('api.sketches.merge_pending', side_effect=RuntimeError('database is locked')):
+            sketches.registry.load()
+        self.assertEqual(sketches.registry.percentiles('Technology')['count'], 1)
+
+    def test_rebuild_replaces_the_queue(self):
+        self._complete()
+        self._complete()
+        sketches.registry.load()
+        self._complete()
+        call_command('rebuild_valuation_sketches', stdout=StringIO())
+
+        self.assertFalse(SectorSketchValue.objects.exists())
+        self.assertEqual(SectorValuationSketch.objects.get(company_sector='Technology', metric='sde').count, 3)
+        sketches.registry.load()
+        self.assertEqual(self._percentiles()['count'], 3)
@@ -0,0 +1,96 @@
+import random
+from decimal import Decimal
+
+from django.test import SimpleTestCase
+
+from api import valuation
+from api.management.commands.bench_valuation import AMOUNT_FIELDS, lead_input
+from api.models import Lead
+from api.utils import calculate_valuation_decimal
+
+
+# Largest values the Lead columns hold: DecimalField(max_digits=15) and (max_digits=10), 2 places
+MAX_AMOUNT = Decimal('9999999999999.99')
+MAX_MULTIPLIER = Decimal('99999999.99')
+
+BOUNDARY_AMOUNTS = [
+    None, Decimal('0'), Decimal('0.01'), Decimal('-0.01'),
+    Decimal('499.99'), Decimal('500.00'), Decimal('500.01'), Decimal('-500.00'),
+    MAX_AMOUNT, -MAX_AMOUNT,
+]
+BOUNDARY_MULTIPLIERS = [Decimal('0.01'), Decimal('1.00'), Decimal('2.50'), MAX_MULTIPLIER]
+
+
+def random_amount(rng):
+    """Random 2dp amount: a boundary value, or anything up to the column limit in either sign."""
+    roll = rng.random()
+    if roll < 0.2:
+        return rng.choice(BOUNDARY_AMOUNTS)
+    pence = rng.randint(-10 ** rng.randint(1, 15), 10 ** rng.randint(1, 15))
+    return Decimal(pence).scaleb(-2)
+
+
+def random_multiplier(rng):
+    if rng.random() < 0.2:
+        return rng.choice(BOUNDARY_MULTIPLIERS)
+    return Decimal(rng.randint(1, 10 ** rng.randint(1, 10) - 1)).scaleb(-2)
+
+
+def random_lead(rng):
+    """Unsaved Lead with random financials and client-supplied multipliers."""
+    lead = Lead(
+        property_own_or_rent=rng.choice(['own', 'rent', None]),
+        adjust_industry_multipliers=True,
+        lower_multiplier=random_multiplier(rng),
+        upper_multiplier=random_multiplier(rng),
+        **{field: random_amount(rng) for field in AMOUNT_FIELDS},
+    )
+    if rng.random() < 0.3:
+        # Put the low valuation exactly on a £500 boundary to exercise half-even rounding
+        lead.lower_multiplier = Decimal(rng.randint(1, 10))
+        result = calculate_valuation_decimal(lead, lead.lower_multiplier, lead.upper_multiplier)
+        net_assets = lead.net_assets or Decimal('0')
+        total = result['sde'] * lead.lower_multiplier + net_assets
+        lead.net_assets = net_assets - total % 1000 + rng.choice([500, -500, 1500])
+    return lead
+
+
+class IntegerValuationTests(SimpleTestCase):
+    """The integer core in api.valuation against the Decimal reference in api.utils."""
+
+    cases = 5000
+
+    def assertMatchesDecimal(self, lead):
+        expected = calculate_valuation_decimal(lead, lead.lower_multiplier, lead.upper_multiplier)
+        actual = valuation.as_decimals(valuation.valuate(lead_input(lead)))
+        for key in ('low', 'high', 'sde'):
+            self.assertEqual(
+                actual[key], expected[key],
+                f"{key} differs for {({field: getattr(lead, field) for field in AMOUNT_FIELDS})}, "
+                f"multipliers {lead.lower_multiplier}/{lead.upper_multiplier}, {lead.property_own_or_rent}",
+            )
+
+    def test_random_inputs_match_decimal(self):
+        rng = random.Random(0)
+        for _ in range(self.cases):
+            self.assertMatchesDecimal(random_lead(rng))
+
+    def test_boundary_inputs_match_decimal(self):
+        for amount in BOUNDARY_AMOUNTS:
+            for multiplier in BOUNDARY_MULTIPLIERS:
+                for property_own_or_rent in ('own', 'rent'):
+                    self.assertMatchesDecimal(Lead(
+                        property_own_or_rent=property_own_or_rent,
+                        lower_multiplier=multiplier,
+                        upper_multiplier=MAX_MULTIPLIER,
+                        **{field: amount for field in AMOUNT_FIELDS},
+                    ))
+
+    def test_rounds_half_to_even(self):
+        for profit, low in (('500.00', 0), ('1500.00', 2000), ('2500.00', 2000), ('-500.00', 0)):
+            result = valuation.valuate(valuation.from_values(profit=Decimal(profit), lower_multiplier=Decimal('1')))
+            self.assertEqual(result.low, low, profit)
+
+    def test_more_than_two_places_is_rejected(self):
+        with self.assertRaises(valuation.InexactAmountError):
+            valuation.from_values(profit=Decimal('0.001'))
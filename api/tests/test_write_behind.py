@@ -0,0 +1,50 @@
+import tempfile
+from unittest import mock
+
+from django.db import OperationalError
+from django.test import TestCase, override_settings
+
+from api import write_behind
+from api.management.commands.bench_sqlite_writes import CONTACT
+from api.models import Lead
+
+
+class WriteBehindBackpressureTests(TestCase):
+
+    def setUp(self):
+        journal_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(journal_dir.cleanup)
+        settings = override_settings(
+            WRITE_BEHIND_ENABLED=True,
+            WRITE_BEHIND_JOURNAL_DIR=journal_dir.name,
+            WRITE_BEHIND_MAX_ROWS=2,
+        )
+        settings.enable()
+        self.addCleanup(settings.disable)
+
+        self.buffer = write_behind.WriteBehindBuffer()
+        # No background flusher; the test flushes through the request path only
+        with mock.patch.object(write_behind.WriteBehindBuffer, '_run'):
+            self.buffer.start()
+        self.addCleanup(self.buffer._journal.close)
+        patcher = mock.patch('api.write_behind.buffer', self.buffer)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def _post(self):
+        return self.client.post('/api/business-evaluation/', data=CONTACT, content_type='application/json')
+
+    def test_full_buffer_refuses_rows_while_flushing_fails(self):
+        real_insert = self.buffer._insert
+        with mock.patch.object(self.buffer, '_insert', side_effect=OperationalError('database is locked')):
+            self.assertEqual(self._post().status_code, 201)
+            self.assertEqual(self._post().status_code, 201)
+            for _ in range(3):
+                response = self._post()
+                self.assertEqual(response.status_code, 503)
+                self.assertEqual(len(self.buffer._rows), 2)
+
+        with mock.patch.object(self.buffer, '_insert', side_effect=real_insert):
+            self.assertEqual(self._post().status_code, 201)
+        self.assertEqual(Lead.objects.count(), 2)
+        self.assertEqual(len(self.buffer._rows), 1)
@@ -1,10 +1,34 @@
 from django.urls import path
-from .views import BusinessEvaluationView
+from .views import (
+    BusinessEvaluationView,
+    LeadAnalyticsView,
+    LeadSyncView,
+    MemoryMetricsView,
+    PortfolioJobDetailView,
+    PortfolioJobResultsView,
+    PortfolioJobsView,
+    QueryMetricsView,
+    QuickEstimateView,
+    SectorMultipliersView,
+    SectorPercentilesView,
+    SessionCacheMetricsView,
+)
 
 app_name = 'api'
 
 urlpatterns = [
     path('business-evaluation/', BusinessEvaluationView.as_view(), name='business-evaluation-create'),
     path('business-evaluation/<str:session_id>/', BusinessEvaluationView.as_view(), name='business-evaluation-update'),
+    path('leads/', LeadSyncView.as_view(), name='lead-sync'),
+    path('analytics/daily-leads/', LeadAnalyticsView.as_view(), name='analytics-daily-leads'),
+    path('sectors/<str:sector>/valuation-percentiles/', SectorPercentilesView.as_view(), name='sector-valuation-percentiles'),
+    path('sector-multipliers/', SectorMultipliersView.as_view(), name='sector-multipliers'),
+    path('quick-estimate/', QuickEstimateView.as_view(), name='quick-estimate'),
+    path('metrics/session-cache/', SessionCacheMetricsView.as_view(), name='metrics-session-cache'),
+    path('metrics/memory/', MemoryMetricsView.as_view(), name='metrics-memory'),
+    path('metrics/queries/', QueryMetricsView.as_view(), name='metrics-queries'),
+    path('portfolio-jobs/', PortfolioJobsView.as_view(), name='portfolio-jobs'),
+    path('portfolio-jobs/<uuid:job_id>/', PortfolioJobDetailView.as_view(), name='portfolio-job-detail'),
+    path('portfolio-jobs/<uuid:job_id>/results/', PortfolioJobResultsView.as_view(), name='portfolio-job-results'),
 ]
 
@@ -1,11 +1,31 @@
 from decimal import Decimal
 
 from api.models import Lead
+from api.multipliers import clamp_multipliers, table as sector_multipliers
 
 
 ROUNDING_INCREMENT = Decimal('1000')  # Round to nearest thousand
 
 
+def resolve_multipliers(data: Lead):
+    """
+    Return the (lower, upper) multipliers to value a lead with.
+
+    Sector defaults from the multiplier table are used unless the user chose to
+    adjust the industry multipliers or the sector has no entry, in which case the
+    multipliers submitted by the client are used, clamped to the same bounds.
+    """
+    if not data.adjust_industry_multipliers:
+        sector_defaults = sector_multipliers.lookup(data.company_sector)
+        if sector_defaults is not None:
+            return sector_defaults
+
+    if data.lower_multiplier is None or data.upper_multiplier is None:
+        # Only on a PUT without the financials; calculate_valuation_decimal treats them as 0
+        return data.lower_multiplier, data.upper_multiplier
+    return clamp_multipliers(data.lower_multiplier, data.upper_multiplier)
+
+
 def calculate_valuation(data: Lead):
     """
     Calculate business valuation estimate based on financial data.
@@ -14,14 +34,44 @@ def calculate_valuation(data: Lead):
     - SDE = Profit + Non-recurring Expenses + Depreciation + Amortisation + Interest Receivable - Interest Payable
     - Adjusted for salary adjustments and property rent adjustments
     - Valuation = (SDE × Multiplier) + Net Assets
+    - Multipliers come from resolve_multipliers()
+
+    Thin adapter: resolves the multipliers and runs the Decimal formula, which is
+    the fastest path for the Decimal values a Lead carries. Callers holding raw
+    text or integer amounts should use the integer core in api.valuation.
 
     returns:
     {
         "low": valuation_low,
         "high": valuation_high,
         "sde": sde,
+        "lower_multiplier": lower_multiplier,
+        "upper_multiplier": upper_multiplier,
     }
 
+    """
+    lower_multiplier, upper_multiplier = resolve_multipliers(data)
+
+    result = calculate_valuation_decimal(data, lower_multiplier, upper_multiplier)
+    result["lower_multiplier"] = lower_multiplier
+    result["upper_multiplier"] = upper_multiplier
+    return result
+
+
+def calculate_valuation_decimal(data, lower_multiplier, upper_multiplier):
+    """
+    Reference Decimal implementation of the valuation formula.
+
+    Takes any object with the Lead financial attributes and explicit multipliers.
+    This is the oracle the integer core in api.valuation is checked against
+    (see api.tests.test_valuation).
+
+    returns:
+    {
+        "low": valuation_low,
+        "high": valuation_high,
+        "sde": sde,
+    }
     """
     # Ensure all required fields have values (use 0 as default for None)
     profit = data.profit or Decimal('0')
@@ -51,12 +101,10 @@ def calculate_valuation(data: Lead):
 
     # Calculate valuation range
     # Valuation = (SDE × Multiplier) + Net Assets
-    lower_multiplier = data.lower_multiplier or Decimal('0')
-    upper_multiplier = data.upper_multiplier or Decimal('0')
     net_assets = data.net_assets or Decimal('0')
     
-    valuation_low = sde * lower_multiplier
-    valuation_high = sde * upper_multiplier
+    valuation_low = sde * (lower_multiplier or Decimal('0'))
+    valuation_high = sde * (upper_multiplier or Decimal('0'))
 
     valuation_low = valuation_low + net_assets
     valuation_high = valuation_high + net_assets
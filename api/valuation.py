@@ -0,0 +1,142 @@
+"""
+ORM-free valuation core.
+
+Works on ValuationInput, a compact immutable record of integer pence and multiplier
+hundredths, so callers (previews, batch jobs, benchmarks) don't need a Lead instance.
+The arithmetic is exact integer math and matches the Decimal implementation in
+api.utils, including round-half-even to the nearest £1000.
+
+The integer formula itself is cheaper than the Decimal one, but converting Decimal
+inputs costs more than it saves, so it pays off when a ValuationInput is built once
+and valued many times (batch jobs, simulations). api.utils.calculate_valuation(lead)
+keeps using the Decimal implementation for model instances (see bench_valuation).
+"""
+from decimal import Decimal
+from typing import NamedTuple
+
+
+ROUNDING_INCREMENT_POUNDS = 1000
+
+
+class InexactAmountError(ValueError):
+    """
+    Raised when an amount has more than 2 decimal places (or a multiplier more than 2)
+    and so cannot be represented exactly in the integer fast path.
+    """
+
+
+class ValuationInput(NamedTuple):
+    """
+    Inputs to the valuation formula.
+    Money amounts are integer pence; multipliers are integer hundredths (3.5x -> 350).
+    """
+    profit: int = 0
+    depreciation: int = 0
+    amortisation: int = 0
+    non_recurring_expenses: int = 0
+    interest_receivable: int = 0
+    interest_payable: int = 0
+    salary_adjustment: int = 0
+    property_rent_adjustment: int = 0
+    net_assets: int = 0
+    lower_multiplier: int = 0
+    upper_multiplier: int = 0
+
+
+class ValuationResult(NamedTuple):
+    """Valuation range in whole pounds and SDE in pence."""
+    low: int
+    high: int
+    sde: int
+
+
+def to_hundredths(value):
+    """
+    Convert a Decimal (or int) with at most 2 decimal places to an integer count of
+    hundredths. None counts as zero.
+
+    Raises:
+        InexactAmountError: The value has more than 2 decimal places
+    """
+    if not value:
+        return 0
+    numerator, denominator = value.as_integer_ratio()
+    if 100 % denominator:
+        raise InexactAmountError(f'{value} has more than 2 decimal places')
+    return numerator * (100 // denominator)
+
+
+def from_values(profit=None, depreciation=None, amortisation=None, non_recurring_expenses=None,
+                interest_receivable=None, interest_payable=None, salary_adjustment=None,
+                property_own_or_rent=None, property_market_rent_adjustment=None,
+                net_assets=None, lower_multiplier=None, upper_multiplier=None):
+    """
+    Build a ValuationInput from Decimal amounts named like the Lead fields.
+
+    The property rent adjustment only applies when the property is owned.
+    """
+    return ValuationInput(
+        profit=to_hundredths(profit),
+        depreciation=to_hundredths(depreciation),
+        amortisation=to_hundredths(amortisation),
+        non_recurring_expenses=to_hundredths(non_recurring_expenses),
+        interest_receivable=to_hundredths(interest_receivable),
+        interest_payable=to_hundredths(interest_payable),
+        salary_adjustment=to_hundredths(salary_adjustment),
+        property_rent_adjustment=(
+            to_hundredths(property_market_rent_adjustment) if property_own_or_rent == 'own' else 0
+        ),
+        net_assets=to_hundredths(net_assets),
+        lower_multiplier=to_hundredths(lower_multiplier),
+        upper_multiplier=to_hundredths(upper_multiplier),
+    )
+
+
+def _round_to_increment(value, divisor):
+    """Divide and round half to even, like Decimal.quantize under the default context."""
+    quotient, remainder = divmod(value, divisor)
+    twice = 2 * remainder
+    if twice > divisor or (twice == divisor and quotient % 2):
+        quotient += 1
+    return quotient
+
+
+def valuate(data: ValuationInput) -> ValuationResult:
+    """
+    Run the valuation formula on integer inputs.
+
+    - SDE = Profit + Depreciation + Amortisation + Non-recurring Expenses
+            + Interest Receivable - Interest Payable + Salary and Rent Adjustments
+    - Valuation = (SDE × Multiplier) + Net Assets, rounded to the nearest £1000
+    """
+    sde = (
+        data.profit
+        + data.depreciation
+        + data.amortisation
+        + data.non_recurring_expenses
+        + data.interest_receivable
+        - data.interest_payable
+        + data.salary_adjustment
+        + data.property_rent_adjustment
+    )
+
+    # pence × hundredths = 1/10000 of a pound
+    net_assets = data.net_assets * 100
+    divisor = ROUNDING_INCREMENT_POUNDS * 10000
+    low = _round_to_increment(sde * data.lower_multiplier + net_assets, divisor)
+    high = _round_to_increment(sde * data.upper_multiplier + net_assets, divisor)
+
+    return ValuationResult(
+        low=low * ROUNDING_INCREMENT_POUNDS,
+        high=high * ROUNDING_INCREMENT_POUNDS,
+        sde=sde,
+    )
+
+
+def as_decimals(result: ValuationResult):
+    """Return a result in the {'low', 'high', 'sde'} Decimal shape used by the API."""
+    return {
+        'low': Decimal(result.low),
+        'high': Decimal(result.high),
+        'sde': Decimal(result.sde).scaleb(-2),
+    }
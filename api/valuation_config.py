@@ -25,6 +25,8 @@ MIN_VALUATION = Decimal('50000')  # Minimum business valuation threshold
 ROUNDING_INCREMENT = Decimal('1000')  # Round to nearest thousand
 
 # Sector-specific multipliers (optional)
+# Used as defaults by api.multipliers; rows in the SectorMultiplier table (admin) take precedence.
+# Values are clamped to the multiplier bounds above.
 # Uncomment and adjust based on your sector classification:
 # SECTOR_MULTIPLIERS = {
 #     '1': {'low': Decimal('3.5'), 'high': Decimal('5.5')},  # Example sector
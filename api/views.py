@@ -1,21 +1,97 @@
 from rest_framework.views import APIView
 from rest_framework.response import Response
+from rest_framework.parsers import MultiPartParser
+from rest_framework.permissions import DjangoModelPermissions, IsAdminUser, IsAuthenticated
 from rest_framework import status
 from django.db import transaction
+from django.db.models import Q
+from django.conf import settings
+from django.http import HttpResponse, StreamingHttpResponse
+from django.urls import reverse
+from django.utils import timezone
+from django.utils.cache import patch_cache_control
+from datetime import date, datetime, timedelta
+import base64
+import json
 import logging
+import time
+import uuid
 
-from .models import Lead
-from .serializers import LeadSerializer
+from . import (
+    estimates,
+    memory_profiling,
+    portfolio,
+    progress,
+    rollups,
+    session_cache,
+    simulation,
+    sketches,
+    slow_queries,
+    write_behind,
+)
+from .db_routers import replica_reads
+from .multipliers import table as sector_multipliers
+from .models import Lead, LeadDailyRollup, PortfolioJob, StaleLeadError
+from .serializers import LeadProgressSerializer, LeadSerializer, LeadSyncSerializer
 
 logger = logging.getLogger(__name__)
 
 
+def _etag_matches(request, etag, header='If-None-Match'):
+    """True if the request's If-None-Match (or other conditional header) lists this ETag."""
+    tags = [tag.strip() for tag in request.headers.get(header, '').split(',')]
+    return etag in tags or '*' in tags
+
+
+def _encode_cursor(lead):
+    """Opaque cursor for the keyset position just after a lead."""
+    position = json.dumps([lead.updated_at.isoformat(), lead.id]).encode()
+    return base64.urlsafe_b64encode(position).decode().rstrip('=')
+
+
+def _decode_cursor(cursor):
+    """
+    Return the (updated_at, id) position of a cursor.
+
+    Raises:
+        ValueError: Malformed cursor
+    """
+    try:
+        updated_at, lead_id = json.loads(base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)))
+        updated_at = datetime.fromisoformat(updated_at)
+    except (TypeError, ValueError) as e:
+        raise ValueError(f'Malformed cursor: {cursor}') from e
+    if not isinstance(lead_id, int) or timezone.is_naive(updated_at):
+        raise ValueError(f'Malformed cursor: {cursor}')
+    return updated_at, lead_id
+
+
+class CanViewLeads(DjangoModelPermissions):
+    """
+    Authenticated users with the "Can view lead" permission (superusers have it;
+    grant it to the CRM integration's user in the admin).
+    """
+    perms_map = {
+        **DjangoModelPermissions.perms_map,
+        'GET': ['%(app_label)s.view_%(model_name)s'],
+        'HEAD': ['%(app_label)s.view_%(model_name)s'],
+    }
+
+
 class BusinessEvaluationView(APIView):
     """
     API endpoint to handle business valuation form submissions.
     
     POST /api/business-evaluation/ - Create partial lead (contact info)
+    PATCH /api/business-evaluation/<session_id>/ - Autosave form progress
     PUT /api/business-evaluation/<session_id>/ - Update with complete data
+    
+    The PUT lookup goes through api.session_cache; see that module for how stale
+    cache entries are detected.
+    
+    GET and PUT responses carry the lead's version as ETag. A PUT with If-Match only
+    applies to that version (412 otherwise), and a PUT that loses a race with another
+    write to the lead gets 409; both return the lead's current state.
     """
     
     def post(self, request, *args, **kwargs):
@@ -24,25 +100,29 @@ class BusinessEvaluationView(APIView):
         
         Returns:
             - 201 Created: Partial lead successfully created with session_id
+              (id is null when write-behind buffering is enabled)
             - 400 Bad Request: Validation errors
             - 500 Internal Server Error: Database errors
+            - 503 Service Unavailable: Write-behind buffer full and the database
+              not accepting its rows
         """
         serializer = LeadSerializer(data=request.data)
         
         if serializer.is_valid():
             try:
-                with transaction.atomic():
-                    lead = serializer.save()
-                    
-                    logger.info(
-                        f"Partial lead created: ID={lead.id}, "
-                        f"Session={lead.session_id}, "
-                        f"Name={lead.name}, Email={lead.email}"
-                    )
+                if write_behind.enabled():
+                    # Inserted by the write-behind flusher shortly after (see api.write_behind)
+                    lead = write_behind.buffer.append(serializer.partial_lead_fields(serializer.validated_data))
+                else:
+                    with transaction.atomic():
+                        lead = serializer.save()
+                    session_cache.remember(lead)
+                
+                logger.info("Partial lead created: ID=%s, Session=%s", lead.id, lead.session_id)
                 
                 # Return lead data with session_id
                 response_serializer = LeadSerializer(lead)
-                return Response(
+                response = Response(
                     {
                         'id': lead.id,
                         'session_id': lead.session_id,
@@ -51,6 +131,17 @@ class BusinessEvaluationView(APIView):
                     },
                     status=status.HTTP_201_CREATED
                 )
+                response['ETag'] = self._session_etag(lead.version)
+                return response
+            except write_behind.BufferFullError as e:
+                logger.error(f"Write-behind buffer full, refusing partial lead: {str(e)}")
+                return Response(
+                    {
+                        'error': 'Too many contact submissions waiting to be saved, please retry',
+                        'details': str(e)
+                    },
+                    status=status.HTTP_503_SERVICE_UNAVAILABLE
+                )
             except Exception as e:
                 logger.error(f"Error creating partial lead: {str(e)}", exc_info=True)
                 return Response(
@@ -69,14 +160,67 @@ class BusinessEvaluationView(APIView):
                 status=status.HTTP_400_BAD_REQUEST
             )
     
+    def get(self, request, session_id=None, *args, **kwargs):
+        """
+        Return the saved fields of a session so the form can be resumed.
+        
+        The ETag is the lead's version. A matching If-None-Match is answered with
+        304 after a single-column lookup, without loading or serializing the lead.
+        
+        Returns:
+            - 200 OK: Saved lead fields
+            - 304 Not Modified: Client's copy is current
+            - 400 Bad Request: Malformed session ID
+            - 404 Not Found: Session ID not found
+        """
+        if not session_id:
+            return self.http_method_not_allowed(request)
+        
+        try:
+            session_id = uuid.UUID(session_id)
+        except ValueError:
+            return self._invalid_session_id(session_id)
+        
+        # Make this worker's buffered writes for the session visible first
+        progress.buffer.flush_session(session_id)
+        if write_behind.buffer.contains(session_id):
+            write_behind.buffer.flush()
+        
+        leads = Lead.objects.filter(session_id=session_id)
+        version = leads.values_list('version', flat=True).first()
+        if version is None:
+            return self._lead_not_found(session_id)
+        
+        if _etag_matches(request, self._session_etag(version)):
+            response = HttpResponse(status=status.HTTP_304_NOT_MODIFIED)
+            response['ETag'] = self._session_etag(version)
+        else:
+            lead = leads.select_related(*Lead.SIDE_TABLES).get()
+            response = Response(
+                {
+                    'session_id': lead.session_id,
+                    'data': LeadProgressSerializer(lead).data,
+                },
+                status=status.HTTP_200_OK
+            )
+            response['ETag'] = self._session_etag(lead.version)
+        
+        # Personal data: only the browser may keep it, and must revalidate before reuse
+        patch_cache_control(response, private=True, no_cache=True)
+        return response
+    
     def put(self, request, session_id=None, *args, **kwargs):
         """
         Update existing lead with complete data and calculate valuation.
+        With ?bands=1 the response also carries Monte Carlo valuation
+        percentiles (see api.simulation).
         
         Returns:
             - 200 OK: Lead successfully updated with valuation
             - 404 Not Found: Session ID not found
-            - 400 Bad Request: Validation errors
+            - 400 Bad Request: Malformed session ID or validation errors
+            - 409 Conflict: Another request updated the lead first
+            - 412 Precondition Failed: If-Match doesn't match the lead's version
             - 500 Internal Server Error: Database errors
         """
         if not session_id:
@@ -89,56 +233,725 @@ class BusinessEvaluationView(APIView):
             )
         
         try:
-            lead = Lead.objects.get(session_id=session_id)
+            session_id = uuid.UUID(session_id)
+        except ValueError:
+            return self._invalid_session_id(session_id)
+        
+        progress.buffer.discard(session_id)
+        if write_behind.buffer.contains(session_id):
+            write_behind.buffer.flush()
+        
+        try:
+            lead = self._get_lead(session_id)
+        except Lead.DoesNotExist:
+            return self._lead_not_found(session_id)
+        
+        try:
+            return self._complete_lead(request, lead)
+        except StaleLeadError:
+            # Cached lead was out of date; retry once against the database
+            session_cache.stats.record_stale()
+            session_cache.forget(session_id)
+        
+        try:
+            lead = session_cache.load_lead(session_id)
+            return self._complete_lead(request, lead, fresh=True)
         except Lead.DoesNotExist:
+            return self._lead_not_found(session_id)
+        except StaleLeadError:
+            # Written by another request between our read and our write
+            return self._lead_conflict(session_id, status.HTTP_409_CONFLICT)
+    
+    def patch(self, request, session_id=None, *args, **kwargs):
+        """
+        Autosave field-level progress for a session.
+        
+        Changes are buffered and written together after a short window
+        (see api.progress); valuation and email only run on the final PUT.
+        
+        Returns:
+            - 202 Accepted: Progress queued for saving
+            - 400 Bad Request: Malformed session ID or validation errors
+            - 404 Not Found: Session ID not found
+        """
+        if not session_id:
+            return self.http_method_not_allowed(request)
+        
+        try:
+            session_id = uuid.UUID(str(session_id))
+        except ValueError:
+            return self._invalid_session_id(session_id)
+        
+        if not self._lead_exists(session_id):
+            return self._lead_not_found(session_id)
+        
+        serializer = LeadProgressSerializer(data=request.data, partial=True)
+        if not serializer.is_valid():
             return Response(
                 {
-                    'error': 'Lead not found',
-                    'details': f'No lead found with session_id: {session_id}'
+                    'error': 'Validation failed',
+                    'details': serializer.errors
                 },
-                status=status.HTTP_404_NOT_FOUND
+                status=status.HTTP_400_BAD_REQUEST
             )
         
+        if serializer.validated_data:
+            progress.buffer.add(session_id, serializer.validated_data)
+        
+        return Response(
+            {
+                'session_id': session_id,
+                'message': 'Progress saved',
+                'fields': sorted(serializer.validated_data),
+            },
+            status=status.HTTP_202_ACCEPTED
+        )
+    
+    def _get_lead(self, session_id):
+        """
+        Look up the lead for a session.
+        
+        With write-behind enabled, a lead POSTed to another worker may not be
+        inserted yet, so a miss is retried once after a flush interval.
+        """
+        try:
+            return session_cache.get_lead(session_id)
+        except Lead.DoesNotExist:
+            if not write_behind.enabled():
+                raise
+        time.sleep(2 * write_behind.buffer.flush_seconds)
+        return session_cache.load_lead(session_id)
+    
+    def _lead_exists(self, session_id):
+        """Like _get_lead, but without loading the lead."""
+        if write_behind.buffer.contains(session_id) or session_cache.exists(session_id):
+            return True
+        if not write_behind.enabled():
+            return False
+        time.sleep(2 * write_behind.buffer.flush_seconds)
+        return session_cache.exists(session_id)
+    
+    def _session_etag(self, version):
+        return f'"v{version}"'
+    
+    def _invalid_session_id(self, session_id):
+        return Response(
+            {
+                'error': 'Invalid session ID',
+                'details': f'Malformed session_id: {session_id}'
+            },
+            status=status.HTTP_400_BAD_REQUEST
+        )
+    
+    def _lead_not_found(self, session_id):
+        return Response(
+            {
+                'error': 'Lead not found',
+                'details': f'No lead found with session_id: {session_id}'
+            },
+            status=status.HTTP_404_NOT_FOUND
+        )
+    
+    def _lead_conflict(self, session_id, status_code):
+        """The lead's current state, for a PUT that was based on an older version."""
+        try:
+            lead = session_cache.load_lead(session_id)
+        except Lead.DoesNotExist:
+            return self._lead_not_found(session_id)
+        
+        if status_code == status.HTTP_412_PRECONDITION_FAILED:
+            details = f'If-Match does not match the current version ({lead.version}) of the lead'
+        else:
+            details = f'The lead was updated by another request; it is now at version {lead.version}'
+        response = Response(
+            {
+                'error': 'Lead was modified',
+                'details': details,
+                'session_id': lead.session_id,
+                'data': LeadProgressSerializer(lead).data,
+            },
+            status=status_code
+        )
+        response['ETag'] = self._session_etag(lead.version)
+        return response
+    
+    def _complete_lead(self, request, lead, fresh=False):
+        """
+        Validate and save the complete submission for a lead.
+        
+        fresh is True when the lead was just read from the database rather than
+        the session cache, so a version mismatch is the client's, not the cache's.
+        
+        Raises:
+            StaleLeadError: The row changed since the lead was read (or, for a
+                cached lead, If-Match didn't match it)
+        """
+        if request.headers.get('If-Match') is not None:
+            if not _etag_matches(request, self._session_etag(lead.version), header='If-Match'):
+                if not fresh:
+                    raise StaleLeadError(f"Lead {lead.id} version {lead.version} doesn't match If-Match")
+                return self._lead_conflict(lead.session_id, status.HTTP_412_PRECONDITION_FAILED)
+        
         serializer = LeadSerializer(lead, data=request.data, partial=True)
         
-        if serializer.is_valid():
-            try:
-                with transaction.atomic():
-                    lead = serializer.save()
-                    
-                    logger.info(
-                        f"Lead completed: ID={lead.id}, "
-                        f"Session={lead.session_id}, "
-                        f"Name={lead.name}, Email={lead.email}, "
-                        f"Valuation: {lead.valuation_low:.0f} - {lead.valuation_high:.0f}"
-                    )
+        if not serializer.is_valid():
+            return Response(
+                {
+                    'error': 'Validation failed',
+                    'details': serializer.errors
+                },
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        try:
+            with transaction.atomic():
+                lead = serializer.save()
                 
-                # Return lead data with valuation
-                response_serializer = LeadSerializer(lead)
-                return Response(
-                    {
-                        'id': lead.id,
-                        'message': 'Business valuation request submitted successfully',
-                        'submitted_at': lead.submitted_at.isoformat(),
-                        'valuation': response_serializer.data,
-                    },
-                    status=status.HTTP_200_OK
+                logger.info(
+                    "Lead completed: ID=%s, Session=%s, Valuation: %.0f - %.0f",
+                    lead.id, lead.session_id, lead.valuation_low, lead.valuation_high,
                 )
+        except StaleLeadError:
+            raise
+        except Exception as e:
+            logger.error(f"Error updating lead: {str(e)}", exc_info=True)
+            return Response(
+                {
+                    'error': 'Failed to complete valuation',
+                    'details': str(e)
+                },
+                status=status.HTTP_500_INTERNAL_SERVER_ERROR
+            )
+        
+        session_cache.forget(lead.session_id)
+        
+        # Return lead data with valuation
+        response_serializer = LeadSerializer(lead)
+        data = {
+            'id': lead.id,
+            'message': 'Business valuation request submitted successfully',
+            'submitted_at': lead.submitted_at.isoformat(),
+            'valuation': response_serializer.data,
+        }
+        if request.query_params.get('bands') in ('1', 'true'):
+            # The lead is committed by now; a failed simulation only loses the bands
+            try:
+                data['valuation_bands'] = simulation.bands_for_lead(lead)
             except Exception as e:
-                logger.error(f"Error updating lead: {str(e)}", exc_info=True)
-                return Response(
-                    {
-                        'error': 'Failed to complete valuation',
-                        'details': str(e)
-                    },
-                    status=status.HTTP_500_INTERNAL_SERVER_ERROR
-                )
+                logger.error(f"Error simulating valuation bands for lead {lead.id}: {str(e)}", exc_info=True)
+                data['valuation_bands'] = None
+        response = Response(data, status=status.HTTP_200_OK)
+        response['ETag'] = self._session_etag(lead.version)
+        return response
+
+
+class LeadAnalyticsView(APIView):
+    """
+    Dashboard read endpoint backed by the daily rollup table.
+
+    GET /api/analytics/daily-leads/?start=YYYY-MM-DD&end=YYYY-MM-DD&sector=...&user_type=...
+
+    Reads only pre-aggregated rows, so the cost depends on the size of the date
+    range requested rather than on the number of leads.
+    """
+    permission_classes = [IsAdminUser]
+
+    DEFAULT_RANGE_DAYS = 30
+    MAX_RANGE_DAYS = 366
+
+    @replica_reads()
+    def get(self, request, *args, **kwargs):
+        """
+        Return daily rollup rows and totals for the requested range.
+
+        Returns:
+            - 200 OK: Rollup rows and totals
+            - 400 Bad Request: Invalid date range
+        """
+        try:
+            end = date.fromisoformat(request.query_params['end']) if 'end' in request.query_params else timezone.localdate()
+            start = (
+                date.fromisoformat(request.query_params['start'])
+                if 'start' in request.query_params
+                else end - timedelta(days=self.DEFAULT_RANGE_DAYS - 1)
+            )
+        except ValueError as e:
+            return Response(
+                {
+                    'error': 'Invalid date',
+                    'details': str(e)
+                },
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        if start > end or (end - start).days >= self.MAX_RANGE_DAYS:
+            return Response(
+                {
+                    'error': 'Invalid date range',
+                    'details': f'start must not be after end and the range must be under {self.MAX_RANGE_DAYS} days'
+                },
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        queryset = LeadDailyRollup.objects.filter(day__gte=start, day__lte=end, leads_created__gt=0)
+        if 'sector' in request.query_params:
+            queryset = queryset.filter(company_sector=request.query_params['sector'])
+        if 'user_type' in request.query_params:
+            queryset = queryset.filter(user_type=request.query_params['user_type'])
+
+        rows = list(queryset.order_by('day', 'company_sector', 'user_type').values(
+            'day',
+            'company_sector',
+            'user_type',
+            *rollups.COUNTER_FIELDS,
+            *rollups.TOTAL_FIELDS,
+        ))
+
+        return Response(
+            {
+                'start': start.isoformat(),
+                'end': end.isoformat(),
+                'totals': rollups.summarize(rows),
+                'rows': rows,
+            },
+            status=status.HTTP_200_OK
+        )
+
+
+class LeadSyncView(APIView):
+    """
+    Incremental lead export for CRM synchronization.
+
+    GET /api/leads/?cursor=...&limit=100&is_complete=true&sector=...&fields=id,email,turnover
+
+    Leads are returned in (updated_at, id) order and paginated by keyset: the
+    cursor encodes the last position returned, so every page is one range scan of
+    the (updated_at, id) index, however deep the sync is. A lead that changes moves
+    to the end and is returned again. Keep the last cursor and poll with it later
+    to get only leads changed since. Leads updated within LEAD_SYNC_SETTLE_SECONDS
+    are held back until the next poll, so a transaction that commits late can't
+    slip in behind a cursor.
+    """
+    permission_classes = [CanViewLeads]
+    queryset = Lead.objects.none()
+
+    DEFAULT_PAGE_SIZE = 100
+    MAX_PAGE_SIZE = 500
+
+    def get(self, request, *args, **kwargs):
+        """
+        Return a page of leads and the cursor to continue from.
+
+        Query parameters:
+            cursor: Position returned by the previous page
+            updated_since: ISO 8601 datetime to start a sync from (without cursor)
+            limit: Page size (default 100, at most 500)
+            is_complete: true or false
+            sector: company_sector
+            fields: Comma-separated fields to return (default all)
+
+        Returns:
+            - 200 OK: Leads, the next cursor and whether more leads are ready now
+            - 400 Bad Request: Invalid query parameter
+        """
+        params = request.query_params
+        try:
+            limit = int(params.get('limit', self.DEFAULT_PAGE_SIZE))
+            if not 1 <= limit <= self.MAX_PAGE_SIZE:
+                raise ValueError(f'limit must be between 1 and {self.MAX_PAGE_SIZE}')
+            position = _decode_cursor(params['cursor']) if 'cursor' in params else None
+            updated_since = datetime.fromisoformat(params['updated_since']) if 'updated_since' in params else None
+            if updated_since is not None and timezone.is_naive(updated_since):
+                updated_since = timezone.make_aware(updated_since)
+            is_complete = self._parse_bool('is_complete', params.get('is_complete'))
+            fields = self._parse_fields(params.get('fields'))
+        except ValueError as e:
+            return Response(
+                {
+                    'error': 'Invalid query parameter',
+                    'details': str(e)
+                },
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        leads = Lead.objects.order_by('updated_at', 'id')
+        if is_complete is not None:
+            leads = leads.filter(is_complete=is_complete)
+        if 'sector' in params:
+            leads = leads.filter(company_sector=params['sector'])
+        if position is not None:
+            updated_at, lead_id = position
+            # (updated_at, id) > position; the first filter bounds the index scan
+            leads = leads.filter(updated_at__gte=updated_at).filter(Q(updated_at__gt=updated_at) | Q(id__gt=lead_id))
+        elif updated_since is not None:
+            leads = leads.filter(updated_at__gte=updated_since)
+        settle = timedelta(seconds=getattr(settings, 'LEAD_SYNC_SETTLE_SECONDS', 5.0))
+        leads = leads.filter(updated_at__lte=timezone.now() - settle)
+
+        # Read only the requested columns, joining a side table only if one of its fields is
+        columns, sides = Lead.split_fields(dict.fromkeys(fields))
+        side_columns = [f'{accessor}__{name}' for accessor, names in sides.items() for name in names]
+        leads = leads.select_related(*sides).only('id', 'updated_at', *columns, *side_columns)
+
+        page = list(leads[:limit + 1])
+        has_more = len(page) > limit
+        page = page[:limit]
+        cursor = _encode_cursor(page[-1]) if page else params.get('cursor')
+
+        return Response(
+            {
+                'results': LeadSyncSerializer(page, many=True, fields=fields).data,
+                'cursor': cursor,
+                'has_more': has_more,
+            },
+            status=status.HTTP_200_OK
+        )
+
+    def _parse_bool(self, name, value):
+        if value is None:
+            return None
+        if value.lower() in ('true', '1'):
+            return True
+        if value.lower() in ('false', '0'):
+            return False
+        raise ValueError(f'{name} must be true or false')
+
+    def _parse_fields(self, value):
+        available = LeadSyncSerializer.Meta.fields
+        if not value:
+            return list(available)
+        fields = [name.strip() for name in value.split(',') if name.strip()]
+        unknown = sorted(set(fields) - set(available))
+        if unknown:
+            raise ValueError(f"Unknown fields: {', '.join(unknown)}")
+        return fields
+
+
+class SectorPercentilesView(APIView):
+    """
+    Valuation percentiles for a sector.
+
+    GET /api/sectors/<sector>/valuation-percentiles/
+
+    Served from the per-process sketch registry; never queries the leads table.
+    """
+
+    def get(self, request, sector, *args, **kwargs):
+        """
+        Return p10/p50/p90 of valuation_low, valuation_high and sde for a sector.
+
+        Returns:
+            - 200 OK: Percentile summary
+            - 404 Not Found: No completed leads for this sector
+        """
+        summary = sketches.registry.percentiles(sector)
+        if summary is None:
+            return Response(
+                {
+                    'error': 'Sector not found',
+                    'details': f'No completed valuations for sector: {sector}'
+                },
+                status=status.HTTP_404_NOT_FOUND
+            )
+
+        return Response({'sector': sector, **summary}, status=status.HTTP_200_OK)
+
+
+class SectorMultipliersView(APIView):
+    """
+    Sector multiplier table for the front-end.
+
+    GET /api/sector-multipliers/
+
+    The body is pre-rendered once per table version and served with a strong ETag,
+    so unchanged tables are answered with 304 Not Modified.
+    """
+
+    def get(self, request, *args, **kwargs):
+        """
+        Return the sector multiplier table.
+
+        Returns:
+            - 200 OK: Multiplier table with version
+            - 304 Not Modified: Client already has this version
+        """
+        snapshot = sector_multipliers.snapshot()
+        etag = f'"{snapshot.version}"'
+
+        if _etag_matches(request, etag):
+            response = HttpResponse(status=status.HTTP_304_NOT_MODIFIED)
         else:
+            response = HttpResponse(snapshot.body, content_type='application/json')
+
+        response['ETag'] = etag
+        patch_cache_control(response, public=True, no_cache=True)
+        return response
+
+
+class SessionCacheMetricsView(APIView):
+    """
+    Session lookup cache metrics for this worker process.
+
+    GET /api/metrics/session-cache/
+    """
+    permission_classes = [IsAdminUser]
+
+    def get(self, request, *args, **kwargs):
+        return Response(session_cache.stats.as_dict(), status=status.HTTP_200_OK)
+
+
+class MemoryMetricsView(APIView):
+    """
+    Memory use of this worker process: RSS, live threads, the DEBUG query log and,
+    with MEMORY_PROFILING_ENABLED, the top allocation sites, their growth since
+    the last periodic snapshot and per-view allocation per request.
+
+    GET /api/metrics/memory/?limit=20&group_by=lineno|filename|traceback
+    """
+    permission_classes = [IsAdminUser]
+
+    def get(self, request, *args, **kwargs):
+        group_by = request.query_params.get('group_by', 'lineno')
+        if group_by not in ('lineno', 'filename', 'traceback'):
+            return Response(
+                {
+                    'error': 'Invalid group_by',
+                    'details': 'group_by must be lineno, filename or traceback'
+                },
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        try:
+            limit = int(request.query_params.get('limit', getattr(settings, 'MEMORY_TOP_N', 20)))
+        except ValueError:
+            return Response(
+                {
+                    'error': 'Invalid limit',
+                    'details': 'limit must be an integer'
+                },
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        return Response(memory_profiling.profiler.report(max(limit, 1), group_by), status=status.HTTP_200_OK)
+
+
+class QueryMetricsView(APIView):
+    """
+    SQL timing summary of this worker process, by statement fingerprint (count,
+    total, p95, the endpoints that ran it, captured EXPLAIN plans) and by endpoint.
+    Requires SLOW_QUERY_ENABLED.
+
+    GET /api/metrics/queries/?limit=50&order_by=total|count|max|slow
+    DELETE /api/metrics/queries/ starts the summary over.
+    """
+    permission_classes = [IsAdminUser]
+    ORDERINGS = ('total', 'count', 'max', 'slow')
+
+    def get(self, request, *args, **kwargs):
+        order_by = request.query_params.get('order_by', 'total')
+        if order_by not in self.ORDERINGS:
+            return Response(
+                {
+                    'error': 'Invalid order_by',
+                    'details': f'order_by must be one of {", ".join(self.ORDERINGS)}'
+                },
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        try:
+            limit = int(request.query_params.get('limit', 50))
+        except ValueError:
+            return Response(
+                {
+                    'error': 'Invalid limit',
+                    'details': 'limit must be an integer'
+                },
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        summary = slow_queries.stats.as_dict(max(limit, 1), order_by)
+        summary['enabled'] = slow_queries.enabled()
+        return Response(summary, status=status.HTTP_200_OK)
+
+    def delete(self, request, *args, **kwargs):
+        slow_queries.stats.reset()
+        return Response(status=status.HTTP_204_NO_CONTENT)
+
+
+class QuickEstimateView(APIView):
+    """
+    Instant rough valuation from financial figures, before a lead exists.
+
+    POST /api/quick-estimate/
+
+    Read-only: no lead is created and the leads table is never queried. Results are
+    memoized per worker on the normalized inputs (see api.estimates).
+    """
+    authentication_classes = []
+
+    def post(self, request, *args, **kwargs):
+        """
+        Estimate a valuation range.
+
+        Returns:
+            - 200 OK: Estimated valuation range
+            - 400 Bad Request: Validation errors
+        """
+        inputs, errors = estimates.parse_request(request.data)
+        if errors:
             return Response(
                 {
                     'error': 'Validation failed',
-                    'details': serializer.errors
+                    'details': errors
+                },
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        return Response(estimates.estimate(inputs), status=status.HTTP_200_OK)
+
+
+class PortfolioJobsView(APIView):
+    """
+    Queue a portfolio (CSV of businesses) for batch valuation.
+
+    POST /api/portfolio-jobs/  (multipart, field "file")
+
+    Only validates and stores the file; rows are valued by the run_portfolio_jobs
+    worker process (see api.portfolio), so uploads don't tie up web workers.
+    """
+    permission_classes = [IsAuthenticated]
+    parser_classes = [MultiPartParser]
+
+    def post(self, request, *args, **kwargs):
+        """
+        Create a portfolio job.
+
+        Returns:
+            - 202 Accepted: Job queued, with status and results URLs
+            - 400 Bad Request: Missing, oversized or malformed file
+        """
+        upload = request.FILES.get('file')
+        max_bytes = getattr(settings, 'PORTFOLIO_MAX_UPLOAD_BYTES', 10 * 1024 * 1024)
+        if upload is None or upload.size > max_bytes:
+            return Response(
+                {
+                    'error': 'Invalid file',
+                    'details': f'Upload a CSV file of at most {max_bytes} bytes in the "file" field'
                 },
                 status=status.HTTP_400_BAD_REQUEST
             )
 
+        data = upload.read()
+        try:
+            total_rows = portfolio.check_upload(data)
+        except portfolio.PortfolioFileError as e:
+            return Response(
+                {
+                    'error': 'Invalid file',
+                    'details': str(e)
+                },
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        job = PortfolioJob.objects.create(
+            created_by=request.user,
+            filename=upload.name[:255],
+            input_csv=data,
+            total_rows=total_rows,
+        )
+        logger.info("Portfolio job %s queued: %s rows", job.job_id, total_rows)
+
+        return Response(
+            {
+                **_portfolio_job_data(job),
+                'status_url': reverse('api:portfolio-job-detail', args=[job.job_id]),
+                'results_url': reverse('api:portfolio-job-results', args=[job.job_id]),
+            },
+            status=status.HTTP_202_ACCEPTED
+        )
+
+
+class PortfolioJobDetailView(APIView):
+    """
+    Progress of a portfolio job.
+
+    GET /api/portfolio-jobs/<job_id>/
+    """
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request, job_id, *args, **kwargs):
+        """
+        Returns:
+            - 200 OK: Job status and progress
+            - 404 Not Found: No such job for this user
+        """
+        job = _get_portfolio_job(request, job_id)
+        if job is None:
+            return _portfolio_job_not_found(job_id)
+        return Response(_portfolio_job_data(job), status=status.HTTP_200_OK)
+
+
+class PortfolioJobResultsView(APIView):
+    """
+    Download the results of a finished portfolio job.
+
+    GET /api/portfolio-jobs/<job_id>/results/
+
+    Streams CSV straight from the results table, one row per input row.
+    """
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request, job_id, *args, **kwargs):
+        """
+        Returns:
+            - 200 OK: CSV of valuations (or per-row errors)
+            - 404 Not Found: No such job for this user
+            - 409 Conflict: Job has not succeeded (yet)
+        """
+        job = _get_portfolio_job(request, job_id)
+        if job is None:
+            return _portfolio_job_not_found(job_id)
+        if job.status != 'succeeded':
+            return Response(
+                {
+                    'error': 'Results not available',
+                    'details': f'Job is {job.status}'
+                },
+                status=status.HTTP_409_CONFLICT
+            )
+
+        response = StreamingHttpResponse(portfolio.stream_results(job), content_type='text/csv')
+        response['Content-Disposition'] = f'attachment; filename="portfolio-{job.job_id}.csv"'
+        return response
+
+
+def _get_portfolio_job(request, job_id):
+    """The job if it exists and belongs to the user (staff see all jobs), else None."""
+    jobs = PortfolioJob.objects.defer('input_csv')
+    if not request.user.is_staff:
+        jobs = jobs.filter(created_by=request.user)
+    try:
+        return jobs.get(job_id=job_id)
+    except PortfolioJob.DoesNotExist:
+        return None
+
+
+def _portfolio_job_not_found(job_id):
+    return Response(
+        {
+            'error': 'Job not found',
+            'details': f'No portfolio job found with id: {job_id}'
+        },
+        status=status.HTTP_404_NOT_FOUND
+    )
+
+
+def _portfolio_job_data(job):
+    return {
+        'job_id': job.job_id,
+        'status': job.status,
+        'filename': job.filename,
+        'total_rows': job.total_rows,
+        'processed_rows': job.processed_rows,
+        'failed_rows': job.failed_rows,
+        'error': job.error,
+        'created_at': job.created_at,
+        'started_at': job.started_at,
+        'finished_at': job.finished_at,
+    }
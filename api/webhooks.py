@@ -0,0 +1,254 @@
+"""
+Webhook fan-out of lead events to downstream systems (CRM, analytics).
+
+Recording is a transactional outbox: completing a lead inserts one WebhookEvent in
+the same transaction (when WEBHOOKS_ENABLED), so an event exists if and only if the
+change committed. Nothing is sent from the request path.
+
+The run_webhooks command delivers them. Each active WebhookEndpoint reads the event
+log in id order from its last_event_id and receives up to WEBHOOK_BATCH_SIZE events
+per POST, as {"events": [{"id", "type", "created_at", "data"}, ...]}, signed with
+its secret:
+
+    X-Webhook-Signature: t=<unix time>,v1=<hex HMAC-SHA256 of "<t>.<body>">
+
+(see verify_signature). Any 2xx response acknowledges the whole batch. Endpoints
+are delivered to concurrently, at most WEBHOOK_CONCURRENCY at once, and each is
+leased by one dispatcher at a time. A failed batch is retried after an exponential,
+jittered backoff. After WEBHOOK_CIRCUIT_THRESHOLD failures in a row the circuit
+opens: the endpoint is left alone for WEBHOOK_CIRCUIT_COOLDOWN_SECONDS, then probed
+with a single event, and only a successful probe resumes full batches.
+
+Delivery is at least once and in order per endpoint; receivers should ignore event
+ids they have already processed. Events are held back for WEBHOOK_SETTLE_SECONDS so
+one committing late can't be skipped. Events every endpoint has received are deleted
+after WEBHOOK_EVENT_RETENTION_DAYS.
+"""
+import hashlib
+import hmac
+import json
+import logging
+import random
+import time
+import urllib.error
+import urllib.request
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import connection
+from django.db.models import F, Max, Min, Q
+from django.utils import timezone
+
+from api.models import WebhookEndpoint, WebhookEvent
+
+logger = logging.getLogger(__name__)
+
+SIGNATURE_HEADER = 'X-Webhook-Signature'
+
+
+def enabled():
+    return getattr(settings, 'WEBHOOKS_ENABLED', False)
+
+
+def record_lead_event(lead, event_type):
+    """
+    Record an event for a lead. Call inside the transaction that saves the lead
+    so the event commits (or rolls back) with it.
+    """
+    if not enabled():
+        return None
+
+    from api.serializers import LeadSyncSerializer
+
+    return WebhookEvent.objects.create(event_type=event_type, lead=lead, payload=LeadSyncSerializer(lead).data)
+
+
+def sign(secret, timestamp, body):
+    """Signature header value for a request body."""
+    digest = hmac.new(secret.encode(), f'{timestamp}.'.encode() + body, hashlib.sha256).hexdigest()
+    return f't={timestamp},v1={digest}'
+
+
+def verify_signature(secret, body, header, tolerance_seconds=300):
+    """
+    Check a received X-Webhook-Signature header against the raw request body.
+    For receivers; also rejects signatures older than tolerance_seconds (replays).
+    """
+    try:
+        parts = dict(part.split('=', 1) for part in header.split(','))
+        timestamp = int(parts['t'])
+    except (KeyError, ValueError):
+        return False
+    if abs(time.time() - timestamp) > tolerance_seconds:
+        return False
+    return hmac.compare_digest(sign(secret, timestamp, body), header)
+
+
+def circuit_state(endpoint, now=None):
+    """'closed', 'open' (cooling down) or 'half-open' (next attempt is a probe)."""
+    if endpoint.consecutive_failures < getattr(settings, 'WEBHOOK_CIRCUIT_THRESHOLD', 5):
+        return 'closed'
+    now = now or timezone.now()
+    if endpoint.next_attempt_at is not None and endpoint.next_attempt_at > now:
+        return 'open'
+    return 'half-open'
+
+
+def dispatch(executor, concurrency):
+    """
+    One dispatcher round: deliver to up to `concurrency` due endpoints in parallel
+    on the executor's threads. Returns (endpoints, events delivered, requests made).
+    """
+    endpoints = claim_due_endpoints(head_event_id(), concurrency)
+    results = list(executor.map(deliver, endpoints))
+    return len(endpoints), sum(events for events, _ in results), sum(requests for _, requests in results)
+
+
+def claim_due_endpoints(head_event_id, limit):
+    """
+    Lease up to `limit` active endpoints that are behind the log and not backing
+    off, longest waiting first. Each must be released by deliver().
+    """
+    now = timezone.now()
+    due = (
+        WebhookEndpoint.objects.filter(is_active=True, last_event_id__lt=head_event_id)
+        .filter(Q(next_attempt_at__isnull=True) | Q(next_attempt_at__lte=now))
+        .filter(Q(leased_until__isnull=True) | Q(leased_until__lt=now))
+        .order_by(F('last_delivered_at').asc(nulls_first=True))
+    )
+    claimed = []
+    for endpoint in due[:limit]:
+        # Another dispatcher may have leased it since the SELECT
+        leased = WebhookEndpoint.objects.filter(pk=endpoint.pk).filter(
+            Q(leased_until__isnull=True) | Q(leased_until__lt=now)
+        ).update(leased_until=_lease_until())
+        if leased:
+            claimed.append(endpoint)
+    return claimed
+
+
+def deliver(endpoint, max_batches=10):
+    """
+    Send an endpoint its pending events, batch by batch, until it has caught up,
+    a batch fails or max_batches were sent. Runs on a dispatcher thread.
+
+    Returns (events delivered, requests made).
+    """
+    batch_size = getattr(settings, 'WEBHOOK_BATCH_SIZE', 100)
+    delivered = requests = 0
+    try:
+        for _ in range(max_batches):
+            probing = circuit_state(endpoint) == 'half-open'
+            events = list(
+                _settled_events().filter(id__gt=endpoint.last_event_id)
+                .order_by('id')
+                .values('id', 'event_type', 'created_at', 'payload')[:1 if probing else batch_size]
+            )
+            if not events:
+                break
+
+            requests += 1
+            error = _post(endpoint, events)
+            if error is not None:
+                _record_failure(endpoint, error)
+                break
+
+            endpoint.last_event_id = events[-1]['id']
+            endpoint.consecutive_failures = 0
+            endpoint.next_attempt_at = None
+            endpoint.last_delivered_at = timezone.now()
+            endpoint.last_error = ''
+            endpoint.leased_until = _lease_until()
+            endpoint.save(update_fields=[
+                'last_event_id', 'consecutive_failures', 'next_attempt_at', 'last_delivered_at', 'last_error',
+                'leased_until', 'updated_at',
+            ])
+            delivered += len(events)
+            if probing:
+                logger.info("Webhook endpoint %s recovered; circuit closed", endpoint.name)
+    except Exception as e:
+        logger.error(f"Webhook delivery to {endpoint.name} failed: {str(e)}", exc_info=True)
+    finally:
+        WebhookEndpoint.objects.filter(pk=endpoint.pk).update(leased_until=None)
+        # Dispatcher threads have their own DB connection; don't leak it
+        connection.close()
+    return delivered, requests
+
+
+def prune_events():
+    """Delete events older than the retention period that every endpoint has received."""
+    cutoff = timezone.now() - timedelta(days=getattr(settings, 'WEBHOOK_EVENT_RETENTION_DAYS', 7))
+    old = WebhookEvent.objects.filter(created_at__lt=cutoff)
+    delivered_to_all = WebhookEndpoint.objects.filter(is_active=True).aggregate(cursor=Min('last_event_id'))['cursor']
+    if delivered_to_all is not None:
+        old = old.filter(id__lte=delivered_to_all)
+    deleted, _ = old.delete()
+    return deleted
+
+
+def head_event_id():
+    return _settled_events().aggregate(head=Max('id'))['head'] or 0
+
+
+def _settled_events():
+    """
+    Events older than WEBHOOK_SETTLE_SECONDS. Ids are assigned at insert but rows
+    become visible at commit, so a younger event could still be joined by one with
+    a lower id; an endpoint's cursor must not pass it first.
+    """
+    settle = timedelta(seconds=getattr(settings, 'WEBHOOK_SETTLE_SECONDS', 2.0))
+    return WebhookEvent.objects.filter(created_at__lte=timezone.now() - settle)
+
+
+def _lease_until():
+    """Lease expiry: long enough for one batch, renewed after each."""
+    return timezone.now() + timedelta(seconds=2 * getattr(settings, 'WEBHOOK_TIMEOUT_SECONDS', 10) + 30)
+
+
+def _post(endpoint, events):
+    """POST one batch. Returns None on a 2xx response, else an error description."""
+    body = json.dumps(
+        {
+            'events': [
+                {'id': event['id'], 'type': event['event_type'], 'created_at': event['created_at'], 'data': event['payload']}
+                for event in events
+            ],
+        },
+        cls=DjangoJSONEncoder,
+    ).encode()
+    request = urllib.request.Request(endpoint.url, data=body, method='POST', headers={
+        'Content-Type': 'application/json',
+        'User-Agent': 'business-evaluator-webhooks',
+        SIGNATURE_HEADER: sign(endpoint.secret, int(time.time()), body),
+    })
+    try:
+        with urllib.request.urlopen(request, timeout=getattr(settings, 'WEBHOOK_TIMEOUT_SECONDS', 10)) as response:
+            response.read()
+        return None
+    except urllib.error.HTTPError as e:
+        return f'HTTP {e.code} for events {events[0]["id"]}-{events[-1]["id"]}'
+    except (urllib.error.URLError, OSError) as e:
+        return f'{type(e).__name__}: {getattr(e, "reason", e)}'
+
+
+def _record_failure(endpoint, error):
+    """Back off exponentially (with jitter); open the circuit after repeated failures."""
+    failures = endpoint.consecutive_failures + 1
+    threshold = getattr(settings, 'WEBHOOK_CIRCUIT_THRESHOLD', 5)
+    if failures >= threshold:
+        delay = getattr(settings, 'WEBHOOK_CIRCUIT_COOLDOWN_SECONDS', 300)
+        if failures == threshold:
+            logger.warning(f"Webhook endpoint {endpoint.name} circuit opened after {failures} failures: {error}")
+        else:
+            logger.warning(f"Webhook endpoint {endpoint.name} probe failed, circuit stays open: {error}")
+    else:
+        base = getattr(settings, 'WEBHOOK_BACKOFF_BASE_SECONDS', 2.0)
+        delay = min(base * 2 ** (failures - 1), getattr(settings, 'WEBHOOK_BACKOFF_MAX_SECONDS', 300))
+        delay *= random.uniform(0.5, 1.0)
+        logger.warning(f"Webhook delivery to {endpoint.name} failed ({error}); retrying in {delay:.1f}s")
+
+    endpoint.consecutive_failures = failures
+    endpoint.next_attempt_at = timezone.now() + timedelta(seconds=delay)
+    endpoint.last_error = error
+    endpoint.save(update_fields=['consecutive_failures', 'next_attempt_at', 'last_error', 'updated_at'])
@@ -0,0 +1,321 @@
+"""
+Opt-in write-behind buffering for partial-lead creation (WRITE_BEHIND_ENABLED).
+
+The POST handler validates the contact data, pre-generates the session_id, appends
+the row to this worker's journal and in-memory buffer, and returns without touching
+the database. A background flusher bulk_creates buffered rows every
+WRITE_BEHIND_FLUSH_MS or as soon as WRITE_BEHIND_BATCH_SIZE rows are waiting.
+
+Durability: every row is appended to a journal segment before the POST returns.
+Segments are rotated on each flush and deleted once their rows are committed. Each
+worker holds an exclusive lock on its own lock file; on startup a worker replays
+the segments of any worker whose lock is free (i.e. that process is gone). Replay
+is idempotent: rows whose session_id is already in the table are skipped.
+
+Failures: a batch that fails is put back and retried with the next flush. After
+WRITE_BEHIND_MAX_BATCH_FAILURES failures in a row the rows are inserted one at a
+time, so one bad row can't hold up the rest: rows failing with a data error
+(constraint violation, bad value) are moved to a dead-letter file in the journal
+directory (dead-letter-<pid>.jsonl) and logged; rows failing with a database
+operational error (locked, connection lost) are journaled again and kept for the
+next flush. Replay handles its segments the same way. While failing rows fill the
+buffer to WRITE_BEHIND_MAX_ROWS, new rows are refused with BufferFullError (the POST
+answers 503) rather than growing it further.
+
+Reads: a PUT for a session still in this worker's buffer flushes it first. A PUT
+that lands on another worker before the flush retries its lookup once after a
+flush interval (see BusinessEvaluationView.put).
+"""
+import json
+import logging
+import os
+import threading
+from pathlib import Path
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import InterfaceError, OperationalError, connection, transaction
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from api import rollups
+from api.models import Lead
+
+logger = logging.getLogger(__name__)
+
+
+class BufferFullError(Exception):
+    """The buffer is at WRITE_BEHIND_MAX_ROWS and flushing it failed."""
+
+
+def enabled():
+    return getattr(settings, 'WRITE_BEHIND_ENABLED', False)
+
+
+class WriteBehindBuffer:
+    """
+    Bounded per-process buffer of partial leads waiting to be inserted.
+    """
+
+    def __init__(self):
+        self._rows = {}
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._wakeup = threading.Condition(self._lock)
+        self._thread = None
+        self._lock_file = None
+        self._journal = None
+        self._segment = 0
+        self._closed_segments = []
+        self._failures = 0
+
+    @property
+    def flush_seconds(self):
+        return getattr(settings, 'WRITE_BEHIND_FLUSH_MS', 50) / 1000
+
+    @property
+    def batch_size(self):
+        return getattr(settings, 'WRITE_BEHIND_BATCH_SIZE', 100)
+
+    @property
+    def max_rows(self):
+        return getattr(settings, 'WRITE_BEHIND_MAX_ROWS', 1000)
+
+    @property
+    def max_batch_failures(self):
+        return getattr(settings, 'WRITE_BEHIND_MAX_BATCH_FAILURES', 3)
+
+    @property
+    def journal_dir(self):
+        return Path(getattr(settings, 'WRITE_BEHIND_JOURNAL_DIR', settings.BASE_DIR / 'journal'))
+
+    def start(self):
+        """Replay journals left by dead workers, claim this worker's journal and start the flusher."""
+        with self._lock:
+            if self._thread is not None:
+                return
+            self.journal_dir.mkdir(parents=True, exist_ok=True)
+            self.recover()
+            self._lock_file = self._claim(self.journal_dir / f'leads-{os.getpid()}.lock')
+            self._rotate_segment()
+            self._thread = threading.Thread(target=self._run, name='lead-write-behind', daemon=True)
+            self._thread.start()
+
+    def append(self, fields):
+        """
+        Buffer a validated partial lead and journal it. Returns the unsaved Lead.
+
+        Raises BufferFullError if the buffer is full and can't be flushed.
+        """
+        if self._thread is None:
+            self.start()
+
+        lead = Lead(**fields)
+        lead.submitted_at = timezone.now()
+        lead.updated_at = lead.submitted_at
+
+        if len(self._rows) >= self.max_rows:
+            # Buffer full: apply backpressure by flushing in the request thread
+            self.flush()
+
+        entry = {'session_id': lead.session_id, 'submitted_at': lead.submitted_at, 'fields': fields}
+        with self._lock:
+            if len(self._rows) >= self.max_rows:
+                # The flush failed and put its rows back
+                raise BufferFullError(f"{len(self._rows)} leads are waiting to be inserted")
+            self._write_journal(entry)
+            self._rows[lead.session_id] = (lead, entry)
+            if len(self._rows) >= self.batch_size:
+                self._wakeup.notify()
+        return lead
+
+    def contains(self, session_id):
+        return session_id in self._rows
+
+    def flush(self):
+        """Insert everything buffered so far. Returns the number of rows written."""
+        with self._flush_lock:
+            with self._lock:
+                if not self._rows:
+                    return 0
+                rows, self._rows = self._rows, {}
+                self._rotate_segment()
+
+            try:
+                self._insert([lead for lead, _ in rows.values()])
+                written, retry = len(rows), []
+            except Exception as e:
+                self._failures += 1
+                if self._failures < self.max_batch_failures:
+                    logger.error(
+                        f"Write-behind flush of {len(rows)} leads failed ({self._failures} in a row), "
+                        f"will retry: {str(e)}",
+                        exc_info=True,
+                    )
+                    with self._lock:
+                        self._rows = {**rows, **self._rows}
+                    return 0
+
+                logger.error(
+                    f"Write-behind flush of {len(rows)} leads failed {self._failures} times in a row, "
+                    f"inserting them one at a time: {str(e)}"
+                )
+                written, retry = self._insert_each(rows.values())
+
+            if retry:
+                # Journal them again, so the closed segments below can go
+                with self._lock:
+                    for _, entry in retry:
+                        self._write_journal(entry)
+                    self._rows = {**{lead.session_id: (lead, entry) for lead, entry in retry}, **self._rows}
+            else:
+                self._failures = 0
+
+            # Every row journaled in a closed segment is now committed, dead-lettered or journaled again
+            while self._closed_segments:
+                self._closed_segments.pop().unlink(missing_ok=True)
+            return written
+
+    def recover(self):
+        """Replay and remove journals whose owning worker is no longer running."""
+        for lock_path in sorted(self.journal_dir.glob('leads-*.lock')):
+            lock_file = self._claim(lock_path, blocking=False)
+            if lock_file is None:
+                continue
+            try:
+                owner = lock_path.stem
+                complete = True
+                for segment in sorted(self.journal_dir.glob(f'{owner}-*.jsonl')):
+                    replayed, retry = self._replay(segment)
+                    logger.warning(f"Replayed {replayed} buffered leads from {segment.name}")
+                    if retry:
+                        # Left for the next worker start; rows already inserted are skipped then
+                        logger.error(f"{retry} leads in {segment.name} could not be replayed yet")
+                        complete = False
+                        continue
+                    segment.unlink()
+                if complete:
+                    lock_path.unlink(missing_ok=True)
+            finally:
+                lock_file.close()
+
+    def _run(self):
+        while True:
+            with self._lock:
+                self._wakeup.wait(self.flush_seconds)
+            try:
+                self.flush()
+            finally:
+                connection.close()
+
+    def _insert(self, leads, replayed_at=None):
+        with transaction.atomic():
+            Lead.objects.bulk_create(leads, batch_size=self.batch_size)
+            # Financial fields POSTed with the contact details go to the side tables
+            side_rows = {}
+            for lead in leads:
+                for row in lead.pending_side_rows():
+                    side_rows.setdefault(type(row), []).append(row)
+            for model, rows in side_rows.items():
+                model.objects.bulk_create(rows, batch_size=self.batch_size)
+            if replayed_at is not None:
+                # bulk_create stamps auto_now_add fields; restore the original POST times
+                for lead, submitted_at in zip(leads, replayed_at):
+                    Lead.objects.filter(session_id=lead.session_id).update(submitted_at=submitted_at)
+                    lead.submitted_at = submitted_at
+            rollups.record_created_batch(leads)
+
+    def _insert_each(self, items, replayed=False):
+        """
+        Insert (lead, journal entry) pairs one at a time after a batch failed.
+        Returns (rows inserted, pairs to retry later); rows with data errors are
+        dead-lettered.
+        """
+        inserted, retry = 0, []
+        for lead, entry in items:
+            try:
+                self._insert([lead], replayed_at=[lead.submitted_at] if replayed else None)
+                inserted += 1
+            except (OperationalError, InterfaceError) as e:
+                logger.warning(f"Write-behind insert of lead {lead.session_id} failed, will retry: {str(e)}")
+                retry.append((lead, entry))
+            except Exception as e:
+                self._dead_letter(entry, e)
+        return inserted, retry
+
+    def _dead_letter(self, entry, error):
+        path = self.journal_dir / f'dead-letter-{os.getpid()}.jsonl'
+        with open(path, 'a', encoding='utf-8') as dead_letter:
+            dead_letter.write(json.dumps({**entry, 'error': str(error)}, cls=DjangoJSONEncoder) + '\n')
+        logger.error(f"Write-behind lead {entry['session_id']} could not be inserted, moved to {path.name}: {error}")
+
+    def _replay(self, segment):
+        """Insert a dead worker's journaled rows. Returns (rows inserted, rows left to retry)."""
+        entries = []
+        with open(segment, encoding='utf-8') as journal:
+            for line in journal:
+                try:
+                    entries.append(json.loads(line))
+                except ValueError:
+                    # Torn final write from the crash; everything before it is intact
+                    break
+
+        existing = set(
+            str(session_id) for session_id in Lead.objects.filter(
+                session_id__in=[entry['session_id'] for entry in entries]
+            ).values_list('session_id', flat=True)
+        )
+        items = []
+        for entry in entries:
+            if entry['session_id'] in existing:
+                continue
+            lead = Lead(**{**entry['fields'], 'session_id': entry['session_id']})
+            for field in Lead._meta.concrete_fields:
+                setattr(lead, field.attname, field.to_python(getattr(lead, field.attname)))
+            for name, value in entry['fields'].items():
+                accessor = Lead.SIDE_FIELDS.get(name)
+                if accessor is not None:
+                    setattr(lead, name, Lead.side_model(accessor)._meta.get_field(name).to_python(value))
+            lead.submitted_at = parse_datetime(entry['submitted_at'])
+            items.append((lead, entry))
+
+        if not items:
+            return 0, 0
+        leads = [lead for lead, _ in items]
+        try:
+            self._insert(leads, replayed_at=[lead.submitted_at for lead in leads])
+        except Exception as e:
+            logger.error(f"Replay of {segment.name} failed, inserting its leads one at a time: {str(e)}")
+            inserted, retry = self._insert_each(items, replayed=True)
+            return inserted, len(retry)
+        return len(items), 0
+
+    def _rotate_segment(self):
+        """Close the current journal segment (if any) and start a new one."""
+        if self._journal is not None:
+            self._journal.close()
+            self._closed_segments.append(Path(self._journal.name))
+        self._segment += 1
+        path = self.journal_dir / f'leads-{os.getpid()}-{self._segment:08d}.jsonl'
+        self._journal = open(path, 'a', encoding='utf-8')
+
+    def _write_journal(self, entry):
+        self._journal.write(json.dumps(entry, cls=DjangoJSONEncoder) + '\n')
+        self._journal.flush()
+        if getattr(settings, 'WRITE_BEHIND_FSYNC', False):
+            os.fsync(self._journal.fileno())
+
+    @staticmethod
+    def _claim(path, blocking=True):
+        import fcntl
+
+        lock_file = open(path, 'a')
+        try:
+            fcntl.flock(lock_file, fcntl.LOCK_EX | (0 if blocking else fcntl.LOCK_NB))
+        except BlockingIOError:
+            lock_file.close()
+            return None
+        return lock_file
+
+
+buffer = WriteBehindBuffer()
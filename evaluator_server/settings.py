@@ -36,6 +36,8 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'api.memory_profiling.MemoryProfilingMiddleware',
+    'api.slow_queries.SlowQueryMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'whitenoise.middleware.WhiteNoiseMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
@@ -96,6 +98,68 @@ DATABASES = {
     }
 }
 
+# Optional read replica for admin list views, exports and analytics (api.db_routers).
+# Defaults to the primary's credentials. For local testing with SQLite, point
+# DB_REPLICA_NAME at a copy of the primary database file.
+db_replica_name = config('DB_REPLICA_NAME', default='')
+if db_replica_name:
+    DATABASES['replica'] = {
+        'ENGINE': db_engine,
+        'NAME': db_replica_name,
+        'USER': config('DB_REPLICA_USER', default=DATABASES['default']['USER']),
+        'PASSWORD': config('DB_REPLICA_PASSWORD', default=DATABASES['default']['PASSWORD']),
+        'HOST': config('DB_REPLICA_HOST', default=DATABASES['default']['HOST']),
+        'PORT': config('DB_REPLICA_PORT', default=DATABASES['default']['PORT']),
+        'TEST': {'MIRROR': 'default'},
+    }
+
+# Tests run on a file rather than SQLite's shared in-memory database: that one
+# answers concurrent writers with "table is locked" instead of waiting on the busy
+# timeout, and api.tests.test_lead_concurrency writes from several threads
+if DATABASES['default']['ENGINE'] == 'django.db.backends.sqlite3':
+    DATABASES['default']['TEST'] = {'NAME': config('DB_TEST_NAME', default=str(BASE_DIR / 'test_db.sqlite3'))}
+
+DATABASE_ROUTERS = ['api.db_routers.PrimaryReplicaRouter']
+
+# SQLite production mode for running several gunicorn workers on one SQLite file:
+# WAL and the pragmas below on every new connection (api.signals.configure_sqlite_connection),
+# and BEGIN IMMEDIATE for transactions (evaluator_server.sqlite_backend).
+SQLITE_PRODUCTION_MODE = config('SQLITE_PRODUCTION_MODE', default=False, cast=bool)
+SQLITE_PRAGMAS = {}
+if SQLITE_PRODUCTION_MODE:
+    SQLITE_PRAGMAS = {
+        # busy_timeout first: switching to WAL itself needs the lock
+        'busy_timeout': config('SQLITE_BUSY_TIMEOUT_MS', default=5000, cast=int),
+        'journal_mode': 'WAL',
+        'synchronous': 'NORMAL',
+        'mmap_size': config('SQLITE_MMAP_SIZE', default=256 * 1024 * 1024, cast=int),
+        'cache_size': -config('SQLITE_CACHE_SIZE_KB', default=64 * 1024, cast=int),  # negative = KiB
+    }
+    for database in DATABASES.values():
+        if database['ENGINE'] == 'django.db.backends.sqlite3':
+            database['ENGINE'] = 'evaluator_server.sqlite_backend'
+
+
+# Caches
+# 'lead_sessions' backs the session lookup cache on the PUT path (api.session_cache).
+# Defaults to a per-process LRU; point it at a shared backend, e.g.
+# SESSION_CACHE_BACKEND=django.core.cache.backends.filebased.FileBasedCache with
+# SESSION_CACHE_LOCATION=/var/tmp/lead_sessions, or set it to
+# django.core.cache.backends.dummy.DummyCache to disable caching.
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    'lead_sessions': {
+        'BACKEND': config('SESSION_CACHE_BACKEND', default='django.core.cache.backends.locmem.LocMemCache'),
+        'LOCATION': config('SESSION_CACHE_LOCATION', default='lead-sessions'),
+        'TIMEOUT': config('SESSION_CACHE_TTL', default=900, cast=int),
+        'OPTIONS': {
+            'MAX_ENTRIES': config('SESSION_CACHE_MAX_ENTRIES', default=10000, cast=int),
+        },
+    },
+}
+
 
 # Password validation
 # https://docs.djangoproject.com/en/4.2/ref/settings/#auth-password-validators
@@ -200,7 +264,98 @@ CONTACT_PHONE = config('CONTACT_PHONE', default='(0) 20 3011 1373')
 SITE_URL = config('SITE_URL', default='https://chelseacorporate.com')
 BACKEND_URL = config('BACKEND_URL', default='http://localhost:8000')
 
+# Valuation percentiles: how often each worker refreshes sector sketches from the DB
+VALUATION_SKETCH_RELOAD_SECONDS = config('VALUATION_SKETCH_RELOAD_SECONDS', default=300, cast=int)
+
+# Sector multipliers: how often each worker checks the table for changes
+SECTOR_MULTIPLIER_RELOAD_SECONDS = config('SECTOR_MULTIPLIER_RELOAD_SECONDS', default=60, cast=int)
+
+# Quick estimates: memoized results kept per worker
+QUICK_ESTIMATE_CACHE_SIZE = config('QUICK_ESTIMATE_CACHE_SIZE', default=4096, cast=int)
+
+# Form progress autosave: successive PATCHes for a session inside this window are
+# coalesced into one write (0 writes every PATCH immediately)
+PROGRESS_SAVE_WINDOW_SECONDS = config('PROGRESS_SAVE_WINDOW_SECONDS', default=2.0, cast=float)
+
+# Write-behind buffering for partial-lead POSTs (opt-in, see api.write_behind)
+WRITE_BEHIND_ENABLED = config('WRITE_BEHIND_ENABLED', default=False, cast=bool)
+WRITE_BEHIND_FLUSH_MS = config('WRITE_BEHIND_FLUSH_MS', default=50, cast=int)
+WRITE_BEHIND_BATCH_SIZE = config('WRITE_BEHIND_BATCH_SIZE', default=100, cast=int)
+WRITE_BEHIND_MAX_ROWS = config('WRITE_BEHIND_MAX_ROWS', default=1000, cast=int)
+WRITE_BEHIND_JOURNAL_DIR = config('WRITE_BEHIND_JOURNAL_DIR', default=str(BASE_DIR / 'journal'))
+WRITE_BEHIND_FSYNC = config('WRITE_BEHIND_FSYNC', default=False, cast=bool)
+# Failed flushes in a row before rows are inserted one at a time and bad ones dead-lettered
+WRITE_BEHIND_MAX_BATCH_FAILURES = config('WRITE_BEHIND_MAX_BATCH_FAILURES', default=3, cast=int)
+
+# Monte Carlo valuation bands for PUT ?bands=1 (api.simulation, needs numpy)
+VALUATION_SIMULATION_DRAWS = config('VALUATION_SIMULATION_DRAWS', default=20000, cast=int)
+VALUATION_SIMULATION_SEED = config('VALUATION_SIMULATION_SEED', default=0, cast=int)
+VALUATION_SIMULATION_CACHE_SIZE = config('VALUATION_SIMULATION_CACHE_SIZE', default=1024, cast=int)
+
+# Portfolio batch valuation (api.portfolio, run by `manage.py run_portfolio_jobs`)
+PORTFOLIO_MAX_UPLOAD_BYTES = config('PORTFOLIO_MAX_UPLOAD_BYTES', default=10 * 1024 * 1024, cast=int)
+PORTFOLIO_MAX_ROWS = config('PORTFOLIO_MAX_ROWS', default=50000, cast=int)
+PORTFOLIO_WORKERS = config('PORTFOLIO_WORKERS', default=2, cast=int)
+PORTFOLIO_CHUNK_SIZE = config('PORTFOLIO_CHUNK_SIZE', default=500, cast=int)
+PORTFOLIO_WORKER_NICE = config('PORTFOLIO_WORKER_NICE', default=10, cast=int)
+PORTFOLIO_JOB_STALE_SECONDS = config('PORTFOLIO_JOB_STALE_SECONDS', default=300, cast=int)
+
+# Online schema changes (api.online_schema): batched backfills commit this many rows
+# per transaction, pause between batches, halve the batch when one takes longer
+# than ONLINE_SCHEMA_MAX_BATCH_MS, and on PostgreSQL give up on a lock after
+# ONLINE_SCHEMA_LOCK_TIMEOUT_MS (then retry smaller) instead of queueing writers
+ONLINE_SCHEMA_BATCH_SIZE = config('ONLINE_SCHEMA_BATCH_SIZE', default=1000, cast=int)
+ONLINE_SCHEMA_BATCH_SLEEP_MS = config('ONLINE_SCHEMA_BATCH_SLEEP_MS', default=50, cast=int)
+ONLINE_SCHEMA_MAX_BATCH_MS = config('ONLINE_SCHEMA_MAX_BATCH_MS', default=250, cast=int)
+ONLINE_SCHEMA_LOCK_TIMEOUT_MS = config('ONLINE_SCHEMA_LOCK_TIMEOUT_MS', default=2000, cast=int)
+
+# CRM lead sync (GET /api/leads/): leads updated less than this long ago are held
+# back, so a transaction committing late can't slip in behind a client's cursor
+LEAD_SYNC_SETTLE_SECONDS = config('LEAD_SYNC_SETTLE_SECONDS', default=5.0, cast=float)
+
+# Webhooks (api.webhooks): completed leads are recorded as events and POSTed in
+# signed batches to the WebhookEndpoints configured in the admin by `manage.py run_webhooks`
+WEBHOOKS_ENABLED = config('WEBHOOKS_ENABLED', default=False, cast=bool)
+WEBHOOK_BATCH_SIZE = config('WEBHOOK_BATCH_SIZE', default=100, cast=int)
+WEBHOOK_CONCURRENCY = config('WEBHOOK_CONCURRENCY', default=4, cast=int)
+WEBHOOK_TIMEOUT_SECONDS = config('WEBHOOK_TIMEOUT_SECONDS', default=10.0, cast=float)
+WEBHOOK_BACKOFF_BASE_SECONDS = config('WEBHOOK_BACKOFF_BASE_SECONDS', default=2.0, cast=float)
+WEBHOOK_BACKOFF_MAX_SECONDS = config('WEBHOOK_BACKOFF_MAX_SECONDS', default=300.0, cast=float)
+WEBHOOK_CIRCUIT_THRESHOLD = config('WEBHOOK_CIRCUIT_THRESHOLD', default=5, cast=int)
+WEBHOOK_CIRCUIT_COOLDOWN_SECONDS = config('WEBHOOK_CIRCUIT_COOLDOWN_SECONDS', default=300.0, cast=float)
+WEBHOOK_SETTLE_SECONDS = config('WEBHOOK_SETTLE_SECONDS', default=2.0, cast=float)
+WEBHOOK_EVENT_RETENTION_DAYS = config('WEBHOOK_EVENT_RETENTION_DAYS', default=7, cast=int)
+
+# Memory instrumentation (api.memory_profiling): tracemalloc in each worker, growth
+# logged every MEMORY_SNAPSHOT_EVERY requests, per-request allocation of the
+# MEMORY_PROFILED_VIEWS, and GET /api/metrics/memory/. Costs CPU and memory; off
+# by default. MEMORY_RECYCLE_RSS_MB (0 = off) retires a gunicorn worker after the
+# request that takes it over that RSS, independently of profiling.
+MEMORY_PROFILING_ENABLED = config('MEMORY_PROFILING_ENABLED', default=False, cast=bool)
+MEMORY_PROFILING_FRAMES = config('MEMORY_PROFILING_FRAMES', default=1, cast=int)
+MEMORY_SNAPSHOT_EVERY = config('MEMORY_SNAPSHOT_EVERY', default=1000, cast=int)
+MEMORY_TOP_N = config('MEMORY_TOP_N', default=20, cast=int)
+MEMORY_PROFILED_VIEWS = config('MEMORY_PROFILED_VIEWS', default='BusinessEvaluationView', cast=Csv())
+MEMORY_RECYCLE_RSS_MB = config('MEMORY_RECYCLE_RSS_MB', default=0, cast=int)
+
+# Slow-query capture (api.slow_queries): every query of a request is timed and
+# summarized by statement fingerprint at GET /api/metrics/queries/; those over
+# SLOW_QUERY_THRESHOLD_MS are logged with a deduplicated EXPLAIN plan, re-explained
+# at most every SLOW_QUERY_EXPLAIN_INTERVAL_SECONDS per statement
+SLOW_QUERY_ENABLED = config('SLOW_QUERY_ENABLED', default=False, cast=bool)
+SLOW_QUERY_THRESHOLD_MS = config('SLOW_QUERY_THRESHOLD_MS', default=100.0, cast=float)
+SLOW_QUERY_EXPLAIN = config('SLOW_QUERY_EXPLAIN', default=True, cast=bool)
+SLOW_QUERY_EXPLAIN_INTERVAL_SECONDS = config('SLOW_QUERY_EXPLAIN_INTERVAL_SECONDS', default=3600, cast=int)
+SLOW_QUERY_MAX_FINGERPRINTS = config('SLOW_QUERY_MAX_FINGERPRINTS', default=500, cast=int)
+
 # Logging configuration
+# Records are queued and written by a background thread with emails and phone
+# numbers masked (api.structured_logging). LOG_FORMAT=json emits JSON lines;
+# LOG_SAMPLE_RATE keeps that fraction of INFO/DEBUG records (warnings and
+# errors are always kept).
+LOG_FORMAT = config('LOG_FORMAT', default='text')
+LOG_SAMPLE_RATE = config('LOG_SAMPLE_RATE', default=1.0, cast=float)
+
 LOGGING = {
     'version': 1,
     'disable_existing_loggers': False,
@@ -213,11 +368,21 @@ LOGGING = {
             'format': '{levelname} {message}',
             'style': '{',
         },
+        'json': {
+            '()': 'api.structured_logging.JsonFormatter',
+        },
+    },
+    'filters': {
+        'sample_success': {
+            '()': 'api.structured_logging.SuccessSampler',
+            'rate': LOG_SAMPLE_RATE,
+        },
     },
     'handlers': {
         'console': {
-            'class': 'logging.StreamHandler',
-            'formatter': 'verbose',
+            'class': 'api.structured_logging.NonBlockingStreamHandler',
+            'formatter': 'json' if LOG_FORMAT == 'json' else 'verbose',
+            'filters': ['sample_success'],
         },
     },
     'root': {
@@ -0,0 +1,21 @@
+"""
+SQLite backend for production mode (SQLITE_PRODUCTION_MODE).
+
+Identical to django.db.backends.sqlite3 except that transactions start with
+BEGIN IMMEDIATE. With the default deferred BEGIN, a transaction that reads and
+then writes has to upgrade its lock, and when another connection is already
+writing SQLite returns "database is locked" at once instead of waiting on the
+busy timeout. BEGIN IMMEDIATE takes the write lock up front, so concurrent
+writers queue on busy_timeout instead.
+
+Pragmas (WAL, busy_timeout, ...) are applied by api.signals.configure_sqlite_connection.
+Django 5.1+ supports OPTIONS={'transaction_mode': 'IMMEDIATE'} natively, which makes
+this backend unnecessary after an upgrade.
+"""
+from django.db.backends.sqlite3 import base
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+
+    def _start_transaction_under_autocommit(self):
+        self.cursor().execute('BEGIN IMMEDIATE')
@@ -20,6 +20,36 @@ errorlog = '-'
 loglevel = 'info'
 access_log_format = '%(h)s %(l)s %(u)s %(t)s "%(r)s" %(s)s %(b)s "%(f)s" "%(a)s"'
 
+# Access and error lines go through the same non-blocking queue as the app logs
+# (api.structured_logging), sampled by LOG_SAMPLE_RATE; 4xx/5xx are always kept.
+logconfig_dict = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'formatters': {
+        'json': {'()': 'api.structured_logging.JsonFormatter'},
+        'plain': {'format': '%(message)s'},
+    },
+    'filters': {
+        'sample_success': {
+            '()': 'api.structured_logging.SuccessSampler',
+            'rate': float(os.getenv('LOG_SAMPLE_RATE', '1.0')),
+        },
+    },
+    'handlers': {
+        'access': {
+            'class': 'api.structured_logging.NonBlockingStreamHandler',
+            'stream': 'ext://sys.stdout',
+            'redact_pii': False,
+            'formatter': 'json' if os.getenv('LOG_FORMAT') == 'json' else 'plain',
+            'filters': ['sample_success'],
+        },
+    },
+    'root': {'level': 'INFO', 'handlers': []},
+    'loggers': {
+        'gunicorn.access': {'handlers': ['access'], 'level': 'INFO', 'propagate': False},
+    },
+}
+
 # Process naming
 proc_name = 'evaluator-server'
 
@@ -31,6 +61,47 @@ user = None
 group = None
 tmp_upload_dir = None
 
+
+def post_worker_init(worker):
+    """Warm per-process caches so the first requests don't pay for loading them."""
+    from api import write_behind
+    from api.sketches import registry
+
+    try:
+        registry.load()
+    except Exception as e:
+        worker.log.warning(f"Could not preload valuation sketches: {e}")
+
+    if write_behind.enabled():
+        # Also replays journals left behind by crashed workers
+        write_behind.buffer.start()
+
+
+def worker_exit(server, worker):
+    """Write out buffered leads and form progress before the worker goes away."""
+    from api import progress, write_behind
+
+    for buffer in (write_behind.buffer, progress.buffer):
+        try:
+            buffer.flush()
+        except Exception as e:
+            worker.log.warning(f"Could not flush {buffer.__class__.__name__}: {e}")
+
+
+def post_request(worker, req, environ, resp):
+    """
+    Retire the worker once its RSS passes MEMORY_RECYCLE_RSS_MB; the arbiter starts
+    a fresh one. Memory-based instead of max_requests, so workers that don't grow
+    are left alone.
+    """
+    from api import memory_profiling
+
+    rss = memory_profiling.memory_limit_exceeded()
+    if rss and worker.alive:
+        worker.log.info(f"Worker {worker.pid} RSS {rss / 2**20:.0f} MB over limit, recycling")
+        worker.alive = False
+
+
 # SSL (if needed)
 # keyfile = None
 # certfile = None